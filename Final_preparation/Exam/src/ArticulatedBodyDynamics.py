@@ -0,0 +1,280 @@
+import numpy as np
+from utils import *
+from Integrators import simulate, as_trajectory, allocate_output
+
+# Featherstone's Articulated Body Algorithm (ABA) for serial chains
+# It computes the forward dynamics in O(n) without building or inverting the mass matrix
+# Spatial vectors are ordered as [angular; linear]
+# Reference: R. Featherstone, Rigid Body Dynamics Algorithms, 2008 (Table 7.1 for ABA, Table 5.1 for RNEA)
+
+# The helpers below also accept a batch of vectors/angles (...,3), (...,6), (...) and return (...,3,3), (...,6,6)
+def _skew3(v):
+    v = np.asarray(v, dtype='float')
+    K = np.zeros(v.shape[:-1] + (3,3))
+    K[...,0,1], K[...,0,2], K[...,1,2] = -v[...,2], v[...,1], -v[...,0]
+    K[...,1,0], K[...,2,0], K[...,2,1] = v[...,2], -v[...,1], v[...,0]
+    return K
+
+# Plucker transform from frame A to frame B, where B is given by the homogeneous matrix H (B w.r.t. A)
+def _spatial_transform(H):
+    E = get_rotation(H).T
+    X = np.zeros((6,6))
+    X[:3,:3] = E
+    X[3:,3:] = E
+    X[3:,:3] = -E @ _skew3(get_position(H))
+    return X
+
+# Spatial cross product for motion vectors (v x)
+def _crm(v):
+    X = np.zeros(np.shape(v)[:-1] + (6,6))
+    X[...,:3,:3] = _skew3(v[...,:3])
+    X[...,3:,3:] = X[...,:3,:3]
+    X[...,3:,:3] = _skew3(v[...,3:])
+    return X
+
+# Spatial cross product for force vectors (v x*)
+def _crf(v):
+    return -np.swapaxes(_crm(v), -1, -2)
+
+# Spatial inertia of a body about its frame origin, the center of mass is com and inertia_com is about the center of mass
+def _spatial_inertia(mass, com, inertia_com):
+    C = _skew3(com)
+    I = np.zeros((6,6))
+    I[:3,:3] = inertia_com + mass * C @ C.T
+    I[:3,3:] = mass * C
+    I[3:,:3] = mass * C.T
+    I[3:,3:] = mass * np.eye(3)
+    return I
+
+def _axis_rotation(axis, theta):
+    # Rodrigues formula
+    K = _skew3(axis)
+    theta = np.asarray(theta, dtype='float')[...,None,None]
+    return np.eye(3) + np.sin(theta)*K + (1-np.cos(theta))*(K@K)
+
+# Matrix-vector product for batches: (...,6,6) x (...,6) -> (...,6)
+def _mv(X, v):
+    return np.einsum("...ij,...j->...i", X, v)
+
+
+class ArticulatedBody:
+    # joint_type: "R" (revolute) or "P" (prismatic) for each joint
+    # joint_axis: the unit axis of each joint expressed in its own joint frame
+    # tree_transforms: constant homogeneous transform from the previous link frame to the joint frame (before the joint motion)
+    # mass, com, inertia: mass, center of mass (in the link frame) and 3x3 inertia about the center of mass of each link
+    # gravity: gravity vector in the base frame
+    def __init__(self, joint_type, joint_axis, tree_transforms, mass, com, inertia, gravity):
+        self.n = len(joint_type)
+        self.joint_type = joint_type
+        self.joint_axis = [np.array(a, dtype='float').reshape(3) for a in joint_axis]
+        self.tree_transforms = tree_transforms
+        self.X_tree = [_spatial_transform(H) for H in tree_transforms]
+        self.inertia_spatial = [_spatial_inertia(mass[i], np.array(com[i], dtype='float').reshape(3), np.array(inertia[i], dtype='float').reshape(3,3)) for i in range(self.n)]
+        self.gravity = np.array(gravity, dtype='float').reshape(3)
+        # Motion subspace of each joint (6,)
+        self.S = []
+        for i in range(self.n):
+            s = np.zeros(6)
+            if(self.joint_type[i] == "R"):
+                s[:3] = self.joint_axis[i]
+            else:
+                s[3:] = self.joint_axis[i]
+            self.S.append(s)
+        # The base is accelerated opposite to the gravity instead of applying the gravity on each link
+        self.a_base = np.zeros(6)
+        self.a_base[3:] = -self.gravity
+
+    # qi: scalar or (B,) for a batch
+    def _joint_transform(self, i, qi):
+        qi = np.asarray(qi, dtype='float')
+        XJ = np.zeros(qi.shape + (6,6))
+        XJ[...] = np.eye(6)
+        if(self.joint_type[i] == "R"):
+            E = np.swapaxes(_axis_rotation(self.joint_axis[i], qi), -1, -2)
+            XJ[...,:3,:3] = E
+            XJ[...,3:,3:] = E
+        else:
+            XJ[...,3:,:3] = -_skew3(self.joint_axis[i]*qi[...,None])
+        return XJ @ self.X_tree[i]
+
+    # Forward dynamics for a single state: returns ddq (n,)
+    def forward_dynamics(self, q, dq, u):
+        n = self.n
+        q = np.array(q, dtype='float').reshape(n)
+        dq = np.array(dq, dtype='float').reshape(n)
+        u = np.array(u, dtype='float').reshape(n)
+        Xup = [None]*n
+        v = [None]*n
+        c = [None]*n
+        IA = [None]*n
+        pA = [None]*n
+        U = [None]*n
+        d = np.zeros(n)
+        uu = np.zeros(n)
+        # Pass 1: velocities and bias forces (root to tip)
+        for i in range(n):
+            Xup[i] = self._joint_transform(i, q[i])
+            vJ = self.S[i]*dq[i]
+            v[i] = vJ if i == 0 else Xup[i] @ v[i-1] + vJ
+            c[i] = _crm(v[i]) @ vJ
+            IA[i] = self.inertia_spatial[i].copy()
+            pA[i] = _crf(v[i]) @ self.inertia_spatial[i] @ v[i]
+        # Pass 2: articulated-body inertias (tip to root)
+        for i in range(n-1, -1, -1):
+            U[i] = IA[i] @ self.S[i]
+            d[i] = self.S[i] @ U[i]
+            uu[i] = u[i] - self.S[i] @ pA[i]
+            if(i > 0):
+                Ia = IA[i] - np.outer(U[i], U[i])/d[i]
+                pa = pA[i] + Ia @ c[i] + U[i]*uu[i]/d[i]
+                IA[i-1] += Xup[i].T @ Ia @ Xup[i]
+                pA[i-1] += Xup[i].T @ pa
+        # Pass 3: accelerations (root to tip)
+        ddq = np.zeros(n)
+        a_prev = self.a_base
+        for i in range(n):
+            a = Xup[i] @ a_prev + c[i]
+            ddq[i] = (uu[i] - U[i] @ a)/d[i]
+            a_prev = a + self.S[i]*ddq[i]
+        return ddq
+
+    # Forward dynamics (ABA) for a batch of states: q, dq, u (B,n) -> ddq (B,n)
+    # Same passes as forward_dynamics() with the batch as the leading axis
+    def forward_dynamics_batch(self, q, dq, u):
+        n = self.n
+        B = len(q)
+        Xup = [None]*n
+        v = [None]*n
+        c = [None]*n
+        IA = [None]*n
+        pA = [None]*n
+        U = [None]*n
+        d = np.zeros((B,n))
+        uu = np.zeros((B,n))
+        for i in range(n):
+            Xup[i] = self._joint_transform(i, q[:,i])
+            vJ = dq[:,i,None]*self.S[i]
+            v[i] = vJ if i == 0 else _mv(Xup[i], v[i-1]) + vJ
+            c[i] = _mv(_crm(v[i]), vJ)
+            IA[i] = np.repeat(self.inertia_spatial[i][None], B, axis=0)
+            pA[i] = _mv(_crf(v[i]), v[i] @ self.inertia_spatial[i].T)
+        for i in range(n-1, -1, -1):
+            U[i] = IA[i] @ self.S[i]
+            d[:,i] = U[i] @ self.S[i]
+            uu[:,i] = u[:,i] - pA[i] @ self.S[i]
+            if(i > 0):
+                Ia = IA[i] - U[i][:,:,None]*U[i][:,None,:]/d[:,i,None,None]
+                pa = pA[i] + _mv(Ia, c[i]) + U[i]*(uu[:,i]/d[:,i])[:,None]
+                XupT = np.swapaxes(Xup[i], -1, -2)
+                IA[i-1] += XupT @ Ia @ Xup[i]
+                pA[i-1] += _mv(XupT, pa)
+        ddq = np.zeros((B,n))
+        a_prev = self.a_base
+        for i in range(n):
+            a = _mv(Xup[i], a_prev) + c[i]
+            ddq[:,i] = (uu[:,i] - np.sum(U[i]*a, axis=-1))/d[:,i]
+            a_prev = a + ddq[:,i,None]*self.S[i]
+        return ddq
+
+    # Recursive Newton-Euler inverse dynamics for a single state: returns u (n,)
+    def inverse_dynamics(self, q, dq, ddq):
+        n = self.n
+        q = np.array(q, dtype='float').reshape(n)
+        dq = np.array(dq, dtype='float').reshape(n)
+        ddq = np.array(ddq, dtype='float').reshape(n)
+        Xup = [None]*n
+        f = [None]*n
+        v_prev = np.zeros(6)
+        a_prev = self.a_base
+        for i in range(n):
+            Xup[i] = self._joint_transform(i, q[i])
+            vJ = self.S[i]*dq[i]
+            v = Xup[i] @ v_prev + vJ
+            a = Xup[i] @ a_prev + self.S[i]*ddq[i] + _crm(v) @ vJ
+            f[i] = self.inertia_spatial[i] @ a + _crf(v) @ self.inertia_spatial[i] @ v
+            v_prev, a_prev = v, a
+        u = np.zeros(n)
+        for i in range(n-1, -1, -1):
+            u[i] = self.S[i] @ f[i]
+            if(i > 0):
+                f[i-1] = f[i-1] + Xup[i].T @ f[i]
+        return u
+
+    # integrator: one of Integrators.INTEGRATORS (Default: semi-implicit Euler with step dt)
+    # out: optional preallocated (qt, dqt, ddqt), returns (T,n) arrays
+    def direct(self, q0, dq0, ut, dt=0.0004, debug=False, integrator="semi-implicit-euler", step=None, out=None, **integrator_kwargs):
+        qt, dqt, ddqt, self.simulation_time, self.simulation_stats = simulate(self, q0, dq0, ut, dt=dt, integrator=integrator, step=step, debug=debug, out=out, **integrator_kwargs)
+        return qt, dqt, ddqt
+
+    # qt, dqt, ddqt: (T,n) arrays or lists of (n,1) arrays, out: optional preallocated (T,n), returns ut (T,n)
+    def inverse(self, qt, dqt, ddqt, out=None):
+        qt, dqt, ddqt = as_trajectory(qt, self.n), as_trajectory(dqt, self.n), as_trajectory(ddqt, self.n)
+        ut = allocate_output(len(qt), self.n, out)
+        for i in range(len(qt)):
+            ut[i] = self.inverse_dynamics(qt[i], dqt[i], ddqt[i])
+        return ut
+
+
+# RR planar manipulator (Same parameters as EulerLagrange)
+class ArticulatedBodyRR(ArticulatedBody):
+    def __init__(self):
+        self.length = 0.4
+        self.l = [2*self.length, 2*self.length]
+        self.d = [0, self.length]
+        self.inertia = [1, 2]
+        self.mass = [3, 4]
+        super().__init__(joint_type=["R", "R"],
+                         joint_axis=[[0,0,1], [0,0,1]],
+                         tree_transforms=[translation_x(0), translation_x(self.l[0])],
+                         mass=self.mass,
+                         com=[[self.d[0],0,0], [self.d[1],0,0]],
+                         inertia=[self.inertia[0]*np.eye(3), self.inertia[1]*np.eye(3)],
+                         gravity=[0, -9.81, 0])
+
+
+# RPP manipulator (Same kinematics as the transition matrices of EulerLagrange2)
+# A1 = Rx(q1) Tx(l1), A2 = A1 Tx(q2) Tx(l2), A3 = A2 Tz(q3) Tz(-l3)
+class ArticulatedBodyRPP(ArticulatedBody):
+    def __init__(self):
+        self.inertia = [10, 4, 1]
+        self.mass = [10, 5, 1]
+        self.lengths = [1, 0.5, 0.2]
+        super().__init__(joint_type=["R", "P", "P"],
+                         joint_axis=[[1,0,0], [1,0,0], [0,0,1]],
+                         tree_transforms=[translation_x(0), translation_x(self.lengths[0]), translation_x(self.lengths[1])],
+                         mass=self.mass,
+                         com=[[0.5*self.lengths[0],0,0], [0.5*self.lengths[1],0,0], [0,0,0.5*self.lengths[2]]],
+                         inertia=[self.inertia[i]*np.eye(3) for i in range(3)],
+                         gravity=[0, -9.81, 0])
+
+
+if __name__ == "__main__":
+    from EulerLagrangeDynamics2 import EulerLagrange, EulerLagrange2
+    import sympy as sp
+    print("--------------------- RR: ABA vs Euler-Lagrange ---------------------")
+    aba = ArticulatedBodyRR()
+    el = EulerLagrange()
+    q0 = np.array([-np.pi/2, np.pi/2]).reshape(2,1)
+    dq0 = np.array([0.5,0]).reshape(2,1)
+    ut = [np.array([5*np.sin(i/500),0]).reshape(2,1) for i in range(5000)]
+    qt_aba, dqt_aba, _ = aba.direct(q0, dq0, ut)
+    qt_el, dqt_el, _ = el.direct(q0, dq0, ut)
+    print(f"Max error (q): {np.max(np.abs(qt_aba - qt_el))}")
+    print(f"Max error (dq): {np.max(np.abs(dqt_aba - dqt_el))}")
+
+    print("--------------------- RPP: ABA vs Euler-Lagrange ---------------------")
+    aba = ArticulatedBodyRPP()
+    el2 = EulerLagrange2()
+    M, C, G = el2._calc_dynamics()
+    params = {el2.I1:el2.inertia[0], el2.I2:el2.inertia[1], el2.I3:el2.inertia[2],
+              el2.m1:el2.mass[0], el2.m2:el2.mass[1], el2.m3:el2.mass[2],
+              el2.l1:el2.lengths[0], el2.l2:el2.lengths[1], el2.l3:el2.lengths[2],
+              el2.h:el2.height_offset, el2.g:9.81}
+    f = sp.lambdify(el2.q+el2.dq, [M.subs(params), C.subs(params), G.subs(params)], "numpy")
+    max_err = 0
+    for i in range(100):
+        q, dq, u = np.random.uniform(-1, 1, (3,3))
+        M_np, C_np, G_np = [np.array(x, dtype='float') for x in f(*q, *dq)]
+        ddq_el = np.linalg.solve(M_np, u.reshape(3,1) - C_np@dq.reshape(3,1) - G_np).squeeze()
+        max_err = max(max_err, np.max(np.abs(aba.forward_dynamics(q, dq, u) - ddq_el)))
+    print(f"Max error (ddq) over 100 random states: {max_err}")
@@ -0,0 +1,97 @@
+import numpy as np
+import warnings
+from tqdm import tqdm
+from Integrators import as_trajectory
+
+# Least-squares identification of the dynamic parameters from logged trajectories and torques
+# The model has to be linear in its parameters: regressor(qt, dqt, ddqt) -> Y (T,n,p) with Y theta = u
+# (EulerLagrange: base parameters [a1, ..., a5], EulerLagrange2: base parameters [m2, m3, I1+I2+I3])
+# As in the calibration, only the normal equations sum(Y^T Y) and sum(Y^T u) are accumulated,
+# so a long log can be processed in chunks with a bounded memory
+
+class DynamicIdentification:
+    def __init__(self, dynamics):
+        self.dynamics = dynamics
+        self.n = dynamics.n
+        self.num_parameters = len(dynamics.dynamics_parameters())
+        self.reset()
+
+    def reset(self):
+        self.sum1 = np.zeros((self.num_parameters, self.num_parameters))
+        self.sum2 = np.zeros((self.num_parameters, 1))
+        self.sum_u2 = 0
+        self.num_samples = 0
+
+    # Accumulate one chunk of the log: qt, dqt, ddqt, ut (T,n)
+    def update(self, qt, dqt, ddqt, ut):
+        Y = self.dynamics.regressor(qt, dqt, ddqt).reshape(-1, self.num_parameters)
+        u = as_trajectory(ut, self.n).reshape(-1, 1)
+        self.sum1 += Y.T @ Y
+        self.sum2 += Y.T @ u
+        self.sum_u2 += float(u.T @ u)
+        self.num_samples += len(u)
+
+    # Solve the accumulated normal equations
+    # If the regressor is rank deficient (parameters that do not affect the torques or only as a combination with others),
+    # the minimum norm solution is returned, it still reproduces the torques
+    def solve(self, rcond=None):
+        theta = np.linalg.lstsq(self.sum1, self.sum2, rcond=rcond)[0]
+        self.rank = np.linalg.matrix_rank(self.sum1)
+        self.theta = theta.reshape(self.num_parameters)
+        return self.theta
+
+    # RMS of the torque residual Y theta - u over all the accumulated samples (without going through the log again)
+    def rms_residual(self, theta=None):
+        theta = self.theta if theta is None else theta
+        theta = np.array(theta, dtype=np.float64).reshape(self.num_parameters, 1)
+        residual = self.sum_u2 - 2*float(theta.T @ self.sum2) + float(theta.T @ self.sum1 @ theta)
+        return np.sqrt(max(residual, 0)/self.num_samples)
+
+    # Identify from a whole log (arrays or np.load(..., mmap_mode="r")), processed in chunks of chunk_size samples
+    # apply: set the identified parameters in the dynamics model, only if the regressor has a full rank
+    # (otherwise the minimum norm solution is not the physical parameters, a RuntimeWarning is raised and the model is kept)
+    def identify(self, qt, dqt, ddqt, ut, chunk_size=10000, apply=False, debug=False):
+        self.reset()
+        for i in tqdm(range(0, len(qt), chunk_size), disable=not debug):
+            chunk = slice(i, i+chunk_size)
+            self.update(qt[chunk], dqt[chunk], ddqt[chunk], ut[chunk])
+        theta = self.solve()
+        if(apply and self.rank < self.num_parameters):
+            warnings.warn(f"The regressor has rank {self.rank}/{self.num_parameters} (not exciting trajectory or not base parameters), the identified parameters are not applied", RuntimeWarning, stacklevel=2)
+        elif(apply):
+            self.dynamics.set_dynamics_parameters(theta)
+        if(debug):
+            print(f"Samples: {self.num_samples}, rank: {self.rank}/{self.num_parameters}, RMS residual: {self.rms_residual()}")
+        return theta
+
+
+# Exciting trajectory: sum of sinusoids for each joint
+def excitation_trajectory(n, tf=20, dt=1/1000, num_harmonics=3, amplitude=1, seed=0):
+    rng = np.random.default_rng(seed)
+    time = np.arange(0, tf, dt)
+    w = 2*np.pi*rng.uniform(0.1, 1, (num_harmonics, n))
+    a = amplitude/num_harmonics*rng.uniform(-1, 1, (num_harmonics, n))
+    phase = rng.uniform(0, 2*np.pi, (num_harmonics, n))
+    arg = time[:,None,None]*w + phase
+    qt = np.sum(a*np.sin(arg), axis=1)
+    dqt = np.sum(a*w*np.cos(arg), axis=1)
+    ddqt = np.sum(-a*w**2*np.sin(arg), axis=1)
+    return qt, dqt, ddqt
+
+
+if __name__ == "__main__":
+    from EulerLagrangeDynamics2 import EulerLagrange, EulerLagrange2
+    np.set_printoptions(precision=4, suppress=True)
+    for dyn in [EulerLagrange(), EulerLagrange2()]:
+        print(f"--------------------- {type(dyn).__name__} ---------------------")
+        qt, dqt, ddqt = excitation_trajectory(dyn.n, amplitude=0.5 if dyn.n == 3 else 1)
+        ut = dyn.inverse(qt, dqt, ddqt)
+        # Measurement noise on the torques
+        ut_measured = ut + np.random.normal(0, 0.1, ut.shape)
+        theta_true = dyn.dynamics_parameters()
+
+        identification = DynamicIdentification(dyn)
+        theta = identification.identify(qt, dqt, ddqt, ut_measured, chunk_size=5000, debug=True)
+        print(f"True parameters:       {theta_true}")
+        print(f"Identified parameters: {theta}")
+        print(f"Max torque prediction error: {np.max(np.abs(dyn.regressor(qt, dqt, ddqt) @ theta - ut))}")
@@ -2,7 +2,13 @@ import numpy as np
 from utils import *
 import sympy as sp
 from tqdm import tqdm
+from Integrators import simulate, as_trajectory, allocate_output
+# The closed-form model of the 2-link planar arm (EulerLagrange) is shared with the manipulators package
+from manipulators.dynamics import PlanarRRDynamics
 
+# The constant entries of the lambdified matrices (nested lists) are scalars, they are broadcasted to the batch of size B -> (B, rows, cols)
+def _to_batch(X, B):
+    return np.moveaxis(np.array([[np.broadcast_to(x, (B,)) for x in row] for row in X], dtype=np.float64), -1, 0)
 
 class EulerLagrange2:
     def __init__(self):
@@ -59,7 +65,7 @@ class EulerLagrange2:
         self.o = [self.o0, self.o1, self.o2]
         
         # Calculations of z vectors: According to the axis of the joint in the transition matrix
-        self.z0 = self.mat(np.array([0,1,0]).reshape(3,1)) # from A0 which is I
+        self.z0 = self.mat(np.array([1,0,0]).reshape(3,1)) # from A1 (rotation about x-axis)
         self.z1 = self.A1[:3,0] # from A1
         self.z2 = self.A2[:3,2]
         self.z = [self.z0, self.z1, self.z2]
@@ -70,7 +76,7 @@ class EulerLagrange2:
             for k in range(self.n):
                 for j in range(self.n):
                     for i in range(self.n):
-                        c_ijk = 0.5*(M[k, j].diff(q[i])+M[k, i].diff(q[j])+M[i,j].diff(q[k]))
+                        c_ijk = 0.5*(M[k, j].diff(q[i])+M[k, i].diff(q[j])-M[i,j].diff(q[k]))
                         C[k, j] = C[k, j]+c_ijk*dq[i]
             return C      
 
@@ -87,7 +93,7 @@ class EulerLagrange2:
                 Jvij = None
                 Jwij = None
                 if(j <= i):
-                    if(self.joint_type[i] == "R"):
+                    if(self.joint_type[j] == "R"):
                         Jvij = self.z[j].cross(self.oc[i] - self.o[j])
                         Jwij = self.z[j]
                     else:
@@ -114,93 +120,85 @@ class EulerLagrange2:
         
         return M, C, G
     
-    def direct(self, q0, dq0, ut, dt=0.0004, debug=False):
-        M, C, G = self._calc_dynamics()
-        qt = [q0.reshape(3,1)]
-        dqt = [dq0.reshape(3,1)]
-        ddqt = [np.zeros((self.n, 1))]
-        
-        for i in tqdm(range(1,len(ut)+1)):
-            q = qt[i-1].copy().squeeze()
-            dq = dqt[i-1].copy().squeeze()
-            ddq = ddqt[i-1].copy().squeeze()
-            u = ut[i-1].copy()
-            if(debug):
-                print(q[1])
-            
-            M_np = np.array(M.subs({self.q1:q[0], self.q2:q[1], self.q3:q[2],
-                                    self.I1:self.inertia[0], self.I2:self.inertia[1], self.I3:self.inertia[2],
-                                    self.m1:self.mass[0], self.m2:self.mass[1], self.m3:self.mass[2],
-                                    self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
-                                    self.h:self.height_offset})).astype(np.float)
-            # print(M_np)
-            # M_np = M_np.astype(np.float)
-            
-            C_np = np.array(C.subs({self.q1:q[0], self.q2:q[1], self.q3:q[2],
-                                    self.dq1:dq[0], self.dq2:dq[1], self.dq3:dq[2],
-                                    self.I1:self.inertia[0], self.I2:self.inertia[1], self.I3:self.inertia[2],
-                                    self.m1:self.mass[0], self.m2:self.mass[1], self.m3:self.mass[2],
-                                    self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
-                                    self.h:self.height_offset})).astype(np.float64)
-            
-            G_np = np.array(G.subs({self.q1:q[0], self.q2:q[1], self.q3:q[2],
-                                    self.I1:self.inertia[0], self.I2:self.inertia[1], self.I3:self.inertia[2],
-                                    self.m1:self.mass[0], self.m2:self.mass[1], self.m3:self.mass[2],
-                                    self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
-                                    self.g:self.gravity, self.h:self.height_offset})).astype(np.float64)
-                       
-            # Semi-implicit Euler integration -> https://en.wikipedia.org/wiki/Semi-implicit_Euler_method#:~:text=The%20semi%2Dimplicit%20Euler%20is,integrator%2C%20unlike%20the%20standard%20method.&text=This%20is%20clear%20advantage%20over,standard)%20Euler%20and%20backward%20Euler.
-            ddq = np.linalg.inv(M_np) @ (u.reshape(self.n,1)-G_np-(C_np@(dq.reshape(self.n,1)))) 
-            dq = dq.reshape(self.n,1) + ddq*dt
-            q = q.reshape(self.n,1) + dq*dt
-            if(debug):
-                print(q)
-                print(dq)
-                print(ddq)
-                print("UUUU")
-                print(u)
-            if(debug):
-                print("--------------")
-            # ddqt.append([ddq[1], ddq[0]])
-            # dqt.append([dq[1], dq[0]])
-            # qt.append([q[1], q[0]])
-            ddqt.append(ddq)
-            dqt.append(dq)
-            qt.append(q)
-                        
+    # Compile M, C, G into numpy functions of (q, dq) with the numerical parameters substituted (only once)
+    # They return nested lists (not arrays) as the entries can be a mix of constants and arrays for a batch
+    def _compile_dynamics(self):
+        if(getattr(self, "_dynamics_np", None) is None):
+            M, C, G = self._calc_dynamics()
+            params = {self.I1:self.inertia[0], self.I2:self.inertia[1], self.I3:self.inertia[2],
+                      self.m1:self.mass[0], self.m2:self.mass[1], self.m3:self.mass[2],
+                      self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
+                      self.g:self.gravity, self.h:self.height_offset}
+            self._dynamics_np = sp.lambdify(self.q + self.dq, [M.subs(params).tolist(), C.subs(params).tolist(), G.subs(params).tolist()], "numpy")
+        return self._dynamics_np
+
+    def forward_dynamics(self, q, dq, u):
+        q = np.array(q, dtype=np.float64).reshape(self.n)
+        dq = np.array(dq, dtype=np.float64).reshape(self.n)
+        u = np.array(u, dtype=np.float64).reshape(self.n,1)
+        M_np, C_np, G_np = [np.array(x, dtype=np.float64) for x in self._compile_dynamics()(*q, *dq)]
+        return np.linalg.solve(M_np, u-G_np-(C_np@(dq.reshape(self.n,1)))).reshape(self.n)
+
+    # Forward dynamics for a batch of states: q, dq, u (B,n) -> ddq (B,n)
+    def forward_dynamics_batch(self, q, dq, u):
+        M_np, C_np, G_np = [_to_batch(X, len(q)) for X in self._compile_dynamics()(*q.T, *dq.T)]
+        rhs = u - G_np[..., 0] - np.einsum("bij,bj->bi", C_np, dq)
+        return np.linalg.solve(M_np, rhs[..., None])[..., 0]
+
+    # The lambdified functions can not be pickled (process pool in Integrators.simulate_batch), they are compiled again when needed
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_dynamics_np"] = None
+        state["_regressor_np"] = None
+        return state
+
+    # The torques are linear in the dynamic parameters [m1, m2, m3, I1, I2, I3], but not all of them can be identified:
+    # m1 does not appear in the torques (the center of mass of link 1 is on the axis of joint 1, x-axis)
+    # and I1, I2, I3 only as their sum (all the links rotate with joint 1 only), so the regressor has rank 3/6
+    # The identifiable (base) parameters are theta = [m2, m3, I1+I2+I3]: Y(q,dq,ddq) theta = u
+    def dynamics_parameters(self):
+        return np.array([self.mass[1], self.mass[2], sum(self.inertia)], dtype=np.float64)
+
+    # m1 is kept and I1 takes the change of the inertias sum (I2, I3 are kept), the torques only depend on the base parameters
+    def set_dynamics_parameters(self, theta):
+        theta = np.array(theta, dtype=np.float64).reshape(3)
+        self.mass = [self.mass[0], theta[0], theta[1]]
+        self.inertia = [theta[2] - self.inertia[1] - self.inertia[2], self.inertia[1], self.inertia[2]]
+        self._dynamics_np = None
+
+    # Y = d(M ddq + C dq + G)/d[m1, m2, m3, I1, I2, I3], compiled once with the kinematic parameters substituted
+    def _compile_regressor(self):
+        if(getattr(self, "_regressor_np", None) is None):
+            M, C, G = self._calc_dynamics()
+            u = M*self.mat(self.ddq) + C*self.mat(self.dq) + G
+            Y = u.jacobian(self.m + self.I)
+            params = {self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
+                      self.g:self.gravity, self.h:self.height_offset}
+            self._regressor_np = sp.lambdify(self.q + self.dq + self.ddq, Y.subs(params).tolist(), "numpy")
+        return self._regressor_np
+
+    # qt, dqt, ddqt: (T,n) arrays or lists of (n,1) arrays, returns Y (T,n,3) of the base parameters
+    # (the columns of m2 and m3, the columns of I1, I2, I3 are the same column of their sum)
+    def regressor(self, qt, dqt, ddqt):
+        qt, dqt, ddqt = as_trajectory(qt, self.n), as_trajectory(dqt, self.n), as_trajectory(ddqt, self.n)
+        Y = _to_batch(self._compile_regressor()(*qt.T, *dqt.T, *ddqt.T), len(qt))
+        return Y[..., [1, 2, 3]]
+
+    # integrator: one of Integrators.INTEGRATORS (Default: semi-implicit Euler with step dt)
+    # out: optional preallocated (qt, dqt, ddqt), returns (T,n) arrays
+    def direct(self, q0, dq0, ut, dt=0.0004, debug=False, integrator="semi-implicit-euler", step=None, out=None, **integrator_kwargs):
+        qt, dqt, ddqt, self.simulation_time, self.simulation_stats = simulate(self, q0, dq0, ut, dt=dt, integrator=integrator, step=step, debug=debug, out=out, **integrator_kwargs)
         return qt, dqt, ddqt
     
-    def inverse(self, qt, dqt, ddqt):
-        M, C, G = self._calc_dynamics()
-        ut = []
+    # qt, dqt, ddqt: (T,n) arrays or lists of (n,1) arrays, out: optional preallocated (T,n), returns ut (T,n)
+    def inverse(self, qt, dqt, ddqt, out=None):
+        qt, dqt, ddqt = as_trajectory(qt, self.n), as_trajectory(dqt, self.n), as_trajectory(ddqt, self.n)
+        ut = allocate_output(len(qt), self.n, out)
+        dynamics_np = self._compile_dynamics()
         for i in tqdm(range(0,len(qt))):
-            q = qt[i].copy().squeeze()
-            dq = dqt[i].copy().squeeze()
-            ddq = ddqt[i].copy().squeeze()
-            
-            M_np = np.array(M.subs({self.q1:q[0], self.q2:q[1], self.q3:q[2],
-                                    self.I1:self.inertia[0], self.I2:self.inertia[1], self.I3:self.inertia[2],
-                                    self.m1:self.mass[0], self.m2:self.mass[1], self.m3:self.mass[2],
-                                    self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
-                                    self.h:self.height_offset}))
-            
-            C_np = np.array(C.subs({self.q1:q[0], self.q2:q[1], self.q3:q[2],
-                                    self.dq1:dq[0], self.dq2:dq[1], self.dq3:dq[2],
-                                    self.I1:self.inertia[0], self.I2:self.inertia[1], self.I3:self.inertia[2],
-                                    self.m1:self.mass[0], self.m2:self.mass[1], self.m3:self.mass[2],
-                                    self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
-                                    self.h:self.height_offset}))
-            
-            G_np = np.array(G.subs({self.q1:q[0], self.q2:q[1], self.q3:q[2],
-                                    self.I1:self.inertia[0], self.I2:self.inertia[1], self.I3:self.inertia[2],
-                                    self.m1:self.mass[0], self.m2:self.mass[1], self.m3:self.mass[2],
-                                    self.l1:self.lengths[0], self.l2:self.lengths[1], self.l3:self.lengths[2],
-                                    self.g:self.gravity, self.h:self.height_offset}))
-                                    
-            u = np.array(M_np@(ddq.reshape(self.n,1)) + C_np@(dq.reshape(self.n,1)) + G_np).reshape(self.n,1)
-            ut.append(u)
-            # print(i)
-        return np.array(ut).astype(np.float)
+            M_np, C_np, G_np = [np.array(x, dtype=np.float64) for x in dynamics_np(*qt[i], *dqt[i])]
+            ut[i] = M_np@ddqt[i] + C_np@dqt[i] + G_np.reshape(self.n)
+        return ut
         
 class EulerLagrange:
     def __init__(self):
@@ -210,81 +208,65 @@ class EulerLagrange:
         self.gravity = 9.81
         self.inertia = [1, 2]
         self.mass = [3, 4]
+        self.n = 2
+        # Identified [a1, a2, a3, a4, a5] (set_dynamics_parameters), they replace the ones calculated from the parameters above
+        self.base_parameters = None
         
-    def direct(self, q0, dq0, ut, dt=0.0004, debug=False):
-        a1 = self.inertia[0] + self.mass[0]*(self.d[0]**2) + self.inertia[1] + self.mass[1]*(self.d[1]**2) + self.mass[1]*(self.l[0]**2)
-        a2 = self.mass[1]*self.l[0]*self.d[1]
-        a3 = self.inertia[1] + self.mass[1]*(self.d[1]**2)
-        a4 = self.gravity * (self.mass[0]*self.d[0] + self.mass[1]*self.l[0])
-        a5 = self.gravity * (self.mass[1]*self.d[1])
+    # The package model with the current parameters, the identified base parameters replace its coefficients
+    def _model(self):
+        model = PlanarRRDynamics(self.l, self.d, self.inertia, self.mass, self.gravity)
+        if(self.base_parameters is not None):
+            model.a1, model.a2, model.a3, model.a4, model.a5 = self.base_parameters
+        return model
 
-        qt = [q0]
-        dqt = [dq0]
-        ddqt = [np.array([0,0]).reshape(2,1)]
-        
-        for i in range(1,len(ut)+1):
-            q = qt[i-1].copy()
-            dq = dqt[i-1].copy()
-            ddq = ddqt[i-1].copy()
-            u = ut[i-1].copy()
-            if(debug):
-                print(q[1])
-            M = np.array([[a1+2*a2*np.cos(q[1]), a3+a2*np.cos(q[1])], [a3+a2*np.cos(q[1]), a3]]).astype(np.float64)
-            
-            c = np.array([-a2*np.sin(q[1]*(dq[1]**2+2*dq[0]*dq[1])), a2*np.sin(q[1])*(dq[1]**2)]).reshape(2,1)
-            
-            C = np.array([[-2*a2*np.sin(q[1])*dq[1], -a2*np.sin(q[1])*dq[1]], [a2*np.sin(q[1])*dq[0], 0]]).reshape(2,2)
-            
-            G = np.array([a4*np.cos(q[0]) + a5*np.cos(q[0]+q[1]), a5*np.cos(q[0]+q[1])]).reshape(2,1)
-            # q = q + dq*dt
-            # dq = dq + ddq*dt
-            # ddq = np.linalg.inv(M) @ (u-G-(C@dq).astype(np.float64))    
+    def _calc_dynamics_parameters(self):
+        model = self._model()
+        return model.a1, model.a2, model.a3, model.a4, model.a5
 
-            # Semi-implicit Euler integration -> https://en.wikipedia.org/wiki/Semi-implicit_Euler_method#:~:text=The%20semi%2Dimplicit%20Euler%20is,integrator%2C%20unlike%20the%20standard%20method.&text=This%20is%20clear%20advantage%20over,standard)%20Euler%20and%20backward%20Euler.
-            # print("C", (C@dq).astype(np.float64))
-            # print("c", c)
-            ddq = np.linalg.inv(M) @ (u-G-(C@dq).astype(np.float64))   
-            dq = dq + ddq*dt
-            q = q + dq*dt
-            if(debug):
-                print(q)
-                print(dq)
-                print(ddq)
-                print("UUUU")
-                print(u)
-            if(debug):
-                print("--------------")
-            # ddqt.append([ddq[1], ddq[0]])
-            # dqt.append([dq[1], dq[0]])
-            # qt.append([q[1], q[0]])
-            ddqt.append(ddq)
-            dqt.append(dq)
-            qt.append(q)
-            
-        
+    def forward_dynamics(self, q, dq, u):
+        return self._model().acceleration(q, dq, u)[0]
+
+    # Forward dynamics for a batch of states: q, dq, u (B,n) -> ddq (B,n)
+    # The parameters (mass, inertia, ...) can also be (B,) arrays to simulate a batch of perturbed models
+    def forward_dynamics_batch(self, q, dq, u):
+        return self._model().acceleration(q, dq, u)
+
+    # The torques are linear in the base (lumped) parameters theta = [a1, a2, a3, a4, a5]: Y(q,dq,ddq) theta = u
+    # The masses and inertias can not be identified separately, only these combinations of them
+    def dynamics_parameters(self):
+        return np.array(self._calc_dynamics_parameters(), dtype=np.float64)
+
+    def set_dynamics_parameters(self, theta):
+        self.base_parameters = np.array(theta, dtype=np.float64).reshape(5)
+
+    # qt, dqt, ddqt: (T,n) arrays or lists of (n,1) arrays, returns Y (T,n,5)
+    def regressor(self, qt, dqt, ddqt):
+        qt, dqt, ddqt = as_trajectory(qt, self.n), as_trajectory(dqt, self.n), as_trajectory(ddqt, self.n)
+        q, dq, ddq = qt.T, dqt.T, ddqt.T
+        c2, s2, c1, c12 = np.cos(q[1]), np.sin(q[1]), np.cos(q[0]), np.cos(q[0]+q[1])
+        Y = np.zeros((len(qt), self.n, 5))
+        Y[:,0,0] = ddq[0]
+        Y[:,0,1] = 2*c2*ddq[0] + c2*ddq[1] - s2*(2*dq[0]*dq[1] + dq[1]**2)
+        Y[:,0,2] = ddq[1]
+        Y[:,0,3] = c1
+        Y[:,0,4] = c12
+        Y[:,1,1] = c2*ddq[0] + s2*dq[0]**2
+        Y[:,1,2] = ddq[0] + ddq[1]
+        Y[:,1,4] = c12
+        return Y
+
+    # integrator: one of Integrators.INTEGRATORS (Default: semi-implicit Euler with step dt)
+    # out: optional preallocated (qt, dqt, ddqt), returns (T,n) arrays
+    def direct(self, q0, dq0, ut, dt=0.0004, debug=False, integrator="semi-implicit-euler", step=None, out=None, **integrator_kwargs):
+        qt, dqt, ddqt, self.simulation_time, self.simulation_stats = simulate(self, q0, dq0, ut, dt=dt, integrator=integrator, step=step, debug=debug, out=out, **integrator_kwargs)
         return qt, dqt, ddqt
     
-    def inverse(self, qt, dqt, ddqt):
-        a1 = self.inertia[0] + self.mass[0]*(self.d[0]**2) + self.inertia[1] + self.mass[1]*(self.d[1]**2) + self.mass[1]*(self.l[0]**2)
-        a2 = self.mass[1]*self.l[0]*self.d[1]
-        a3 = self.inertia[1] + self.mass[1]*(self.d[1]**2)
-        a4 = self.gravity * (self.mass[0]*self.d[0] + self.mass[1]*self.l[0])
-        a5 = self.gravity * (self.mass[1]*self.d[1])
-        
-        ut = []
-        for i in range(0,len(qt)):
-            q = qt[i].copy()
-            dq = dqt[i].copy()
-            ddq = ddqt[i].copy()
-            
-            M = np.array([[a1+2*a2*np.cos(q[1]), a3+a2*np.cos(q[1])], [a3+a2*np.cos(q[1]), a3]]).squeeze()
-            
-            c = np.array([-a2*np.sin(q[1]*(dq[1]**2+2*dq[0]*dq[1])), a2*np.sin(q[1])*(dq[1]**2)]).reshape(2,1)
-            C = np.array([[-2*a2*np.sin(q[1])*dq[1], -a2*np.sin(q[1])*dq[1]], [a2*np.sin(q[1])*dq[0], 0]]).reshape(2,2)
-            G = np.array([a4*np.cos(q[0]) + a5*np.cos(q[0]+q[1]), a5*np.cos(q[0]+q[1])]).reshape(2,1)
-            
-            ut.append(M@ddq + (C@dq).astype(np.float64) + G)
-            
+    # qt, dqt, ddqt: (T,n) arrays or lists of (n,1) arrays, out: optional preallocated (T,n), returns ut (T,n)
+    def inverse(self, qt, dqt, ddqt, out=None):
+        qt, dqt, ddqt = as_trajectory(qt, self.n), as_trajectory(dqt, self.n), as_trajectory(ddqt, self.n)
+        ut = allocate_output(len(qt), self.n, out)
+        # Vectorized over the whole trajectory
+        ut[:] = self._model().inverse(qt, dqt, ddqt)
         return ut
     
     
@@ -0,0 +1,335 @@
+import numpy as np
+from tqdm import tqdm
+
+# Integrators for the second order system ddq = f(t, q, dq)
+# Any dynamics model that implements forward_dynamics(q, dq, u) can be simulated with them through simulate()
+# Each integrator counts the number of evaluations of f (nfev)
+
+class SemiImplicitEuler:
+    name = "semi-implicit-euler"
+    adaptive = False
+
+    # Semi-implicit Euler integration -> https://en.wikipedia.org/wiki/Semi-implicit_Euler_method
+    # It is the same scheme that has been used in direct() of all the dynamics models
+    def step(self, f, t, q, dq, h):
+        ddq = f(t, q, dq)
+        dq = dq + ddq*h
+        q = q + dq*h
+        return q, dq, ddq, 1
+
+
+class Symplectic:
+    name = "symplectic"
+    adaptive = False
+
+    # Stormer-Verlet (velocity Verlet / leapfrog), 2nd order and symplectic for velocity independent forces
+    # The velocity used in the 2nd evaluation is the half-step velocity
+    def step(self, f, t, q, dq, h):
+        ddq = f(t, q, dq)
+        dq_half = dq + 0.5*h*ddq
+        q = q + h*dq_half
+        ddq_new = f(t+h, q, dq_half)
+        dq = dq_half + 0.5*h*ddq_new
+        return q, dq, ddq, 2
+
+
+class RK4:
+    name = "rk4"
+    adaptive = False
+
+    # Classical 4th order Runge-Kutta on the 1st order system x = (q, dq)
+    def step(self, f, t, q, dq, h):
+        k1_q, k1_dq = dq, f(t, q, dq)
+        k2_q = dq + 0.5*h*k1_dq
+        k2_dq = f(t+0.5*h, q + 0.5*h*k1_q, k2_q)
+        k3_q = dq + 0.5*h*k2_dq
+        k3_dq = f(t+0.5*h, q + 0.5*h*k2_q, k3_q)
+        k4_q = dq + h*k3_dq
+        k4_dq = f(t+h, q + h*k3_q, k4_q)
+        q = q + h/6*(k1_q + 2*k2_q + 2*k3_q + k4_q)
+        dq = dq + h/6*(k1_dq + 2*k2_dq + 2*k3_dq + k4_dq)
+        return q, dq, k1_dq, 4
+
+
+class RK45:
+    name = "rk45"
+    adaptive = True
+
+    # Dormand-Prince 5(4) coefficients
+    c = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+    a = [[],
+         [1/5],
+         [3/40, 9/40],
+         [44/45, -56/15, 32/9],
+         [19372/6561, -25360/2187, 64448/6561, -212/729],
+         [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+         [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]]
+    b5 = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+    b4 = np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+    # min_step: the simulation fails if a step smaller than it is rejected (diverging or stiff dynamics)
+    def __init__(self, rtol=1e-6, atol=1e-8, safety=0.9, min_factor=0.2, max_factor=5.0, min_step=1e-10):
+        self.rtol = rtol
+        self.atol = atol
+        self.safety = safety
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.min_step = min_step
+
+    # One trial step of size h: returns the 5th order solution and the error norm (accept the step if it is <= 1)
+    # q, dq can be (n,) or a batch (B,n), for a batch the error norm is the worst one over the batch
+    def step(self, f, t, q, dq, h):
+        n = q.shape[-1]
+        x = np.concatenate([q, dq], axis=-1)
+        K = np.empty((7,) + x.shape)
+        for s in range(7):
+            xs = x + h*(np.tensordot(self.a[s], K[:s], axes=1) if s > 0 else 0)
+            K[s, ..., :n] = xs[..., n:]
+            K[s, ..., n:] = f(t + self.c[s]*h, xs[..., :n], xs[..., n:])
+        x_new = x + h*np.tensordot(self.b5, K, axes=1)
+        err = h*np.tensordot(self.b5 - self.b4, K, axes=1)
+        scale = self.atol + self.rtol*np.maximum(np.abs(x), np.abs(x_new))
+        err_norm = np.max(np.sqrt(np.mean((err/scale)**2, axis=-1)))
+        return x_new[..., :n], x_new[..., n:], K[0, ..., n:], 7, err_norm
+
+    # A non finite error (NaN/inf from a diverging step) shrinks the step as much as allowed
+    def next_step_size(self, h, err_norm):
+        if(not np.isfinite(err_norm)):
+            return h*self.min_factor
+        if(err_norm == 0):
+            return h*self.max_factor
+        factor = self.safety*err_norm**(-1/5)
+        return h*min(self.max_factor, max(self.min_factor, factor))
+
+
+INTEGRATORS = {SemiImplicitEuler.name: SemiImplicitEuler,
+               Symplectic.name: Symplectic,
+               RK4.name: RK4,
+               RK45.name: RK45}
+
+def get_integrator(integrator, **kwargs):
+    if(isinstance(integrator, str)):
+        if(integrator not in INTEGRATORS):
+            raise ValueError(f"Unknown integrator {integrator}, available: {list(INTEGRATORS.keys())}")
+        return INTEGRATORS[integrator](**kwargs)
+    return integrator
+
+# Control input sampled every dt (ut[i] is applied during [i*dt, (i+1)*dt)) as a function of time
+# zoh: zero-order hold (as in direct()), linear: linear interpolation between the samples
+# shape: shape of one sample, n or (B,n) for a batch
+def control_signal(ut, dt, shape, interpolation="zoh"):
+    shape = tuple(np.atleast_1d(shape))
+    if(callable(ut)):
+        return lambda t: np.array(ut(t), dtype='float').reshape(shape)
+    u = np.asarray(ut, dtype='float').reshape((len(ut),) + shape)
+    N = len(u)
+    if(interpolation == "zoh"):
+        # small tolerance to not fall in the previous sample because of the floating point errors in t
+        return lambda t: u[min(max(int(t/dt + 1e-9), 0), N-1)]
+    elif(interpolation == "linear"):
+        def u_linear(t):
+            s = min(max(t/dt, 0), N-1)
+            i = min(int(s), N-2) if N > 1 else 0
+            alpha = s - i
+            return u[i] if N == 1 else (1-alpha)*u[i] + alpha*u[i+1]
+        return u_linear
+    raise ValueError(f"Unknown interpolation {interpolation}")
+
+# View a trajectory (list of (n,1)/(n,) samples or an array) as a (T,n) float array, no copy if it is already one
+def as_trajectory(x, n):
+    return np.asarray(x, dtype='float').reshape(len(x), n)
+
+# Allocate the output of inverse() (T,n) or check the one provided by the caller
+def allocate_output(T, n, out=None):
+    if(out is None):
+        return np.empty((T, n))
+    if(np.shape(out) != (T, n)):
+        raise ValueError(f"out should have shape {(T, n)}")
+    return out
+
+# Allocate the outputs (qt, dqt, ddqt) as views of a single contiguous (3,...,T,n) buffer or check the ones provided by the caller
+#   batch: () for a single rollout -> (T,n), (B,) for a batch -> (B,T,n)
+def allocate_trajectory(T, n, out=None, batch=()):
+    shape = tuple(batch) + (T, n)
+    if(out is None):
+        return tuple(np.empty((3,) + shape))
+    if(len(out) != 3 or any(np.shape(o) != shape for o in out)):
+        raise ValueError(f"out should be (qt, dqt, ddqt) each with shape {shape}")
+    return tuple(out)
+
+# Integrate ddq = f(t, q, dq) from (q, dq) until tf, q and dq are (n,) or a batch (B,n) that is advanced in lockstep
+# Returns qt, dqt, ddqt with the time along the axis before the last one, time (T,) and stats
+def _integrate(f, q, dq, tf, h, integrator, max_step, out=None, debug=False):
+    batch, n = q.shape[:-1], q.shape[-1]
+    t = 0.0
+    stats = {"steps": 0, "nfev": 0, "rejected": 0}
+
+    if(not integrator.adaptive):
+        num_steps = int(round(tf/h))
+        qt, dqt, ddqt = allocate_trajectory(num_steps+1, n, out, batch)
+        time = np.arange(num_steps+1)*h
+        qt[..., 0, :], dqt[..., 0, :], ddqt[..., 0, :] = q, dq, 0
+        for i in tqdm(range(num_steps), disable=not debug):
+            q, dq, ddqt[..., i+1, :], nfev = integrator.step(f, time[i], q, dq, h)
+            qt[..., i+1, :], dqt[..., i+1, :] = q, dq
+            stats["nfev"] += nfev
+        stats["steps"] = num_steps
+    else:
+        if(out is not None):
+            raise ValueError("out is not supported for adaptive integrators as the number of steps is not known in advance")
+        # The buffer grows by doubling its capacity
+        capacity = int(tf/h) + 2
+        buffer = np.empty((3,) + batch + (capacity, n))
+        time = np.empty(capacity)
+        time[0] = t
+        buffer[0, ..., 0, :], buffer[1, ..., 0, :], buffer[2, ..., 0, :] = q, dq, 0
+        while t < tf - 1e-12:
+            h = min(h, max_step, tf - t)
+            q_new, dq_new, ddq, nfev, err_norm = integrator.step(f, t, q, dq, h)
+            stats["nfev"] += nfev
+            if(np.isfinite(err_norm) and err_norm <= 1):
+                t += h
+                q, dq = q_new, dq_new
+                stats["steps"] += 1
+                k = stats["steps"]
+                if(k >= capacity):
+                    capacity *= 2
+                    buffer = np.concatenate([buffer, np.empty_like(buffer)], axis=-2)
+                    time = np.concatenate([time, np.empty_like(time)])
+                time[k] = t
+                buffer[0, ..., k, :], buffer[1, ..., k, :], buffer[2, ..., k, :] = q, dq, ddq
+            else:
+                stats["rejected"] += 1
+                if(h < integrator.min_step):
+                    raise RuntimeError(f"Step size {h} at t = {t} is below the minimum step {integrator.min_step} (error norm: {err_norm}), the dynamics diverge or are too stiff")
+            h = integrator.next_step_size(h, err_norm)
+        T = stats["steps"] + 1
+        qt, dqt, ddqt, time = buffer[0, ..., :T, :], buffer[1, ..., :T, :], buffer[2, ..., :T, :], time[:T]
+
+    if(debug):
+        print(f"Integrator: {integrator.name}, steps: {stats['steps']}, rejected: {stats['rejected']}, function evaluations: {stats['nfev']}")
+    return qt, dqt, ddqt, time, stats
+
+def _final_time(ut, dt, tf):
+    if(tf is None):
+        if(callable(ut)):
+            raise ValueError("tf should be provided when ut is a function")
+        tf = len(ut)*dt
+    return tf
+
+def _default_interpolation(integrator, interpolation):
+    if(interpolation is None):
+        interpolation = "zoh" if isinstance(integrator, (SemiImplicitEuler, Symplectic)) else "linear"
+    return interpolation
+
+# Simulate the dynamics model from (q0, dq0) under the control ut
+#   dynamics: object with attribute n and method forward_dynamics(q, dq, u) -> ddq
+#   ut: control samples every dt (list/array with len(ut) samples) or a function of time u(t)
+#   dt: sampling time of ut, the simulation runs for tf = len(ut)*dt if tf is not given
+#   step: integration step size (default dt), for rk45 it is the initial step size
+#   out: optional preallocated (qt, dqt, ddqt) with shape (num_steps+1, n) each (only for the fixed step integrators)
+# Returns qt, dqt, ddqt as (T,n) arrays, time (T,) and stats {"steps", "nfev", "rejected"}
+def simulate(dynamics, q0, dq0, ut, dt=0.0004, integrator="semi-implicit-euler", step=None, tf=None,
+             interpolation=None, max_step=None, debug=False, out=None, **integrator_kwargs):
+    integrator = get_integrator(integrator, **integrator_kwargs)
+    n = dynamics.n
+    tf = _final_time(ut, dt, tf)
+    u = control_signal(ut, dt, n, _default_interpolation(integrator, interpolation))
+    f = lambda t, q, dq: np.asarray(dynamics.forward_dynamics(q, dq, u(t)), dtype='float').reshape(n)
+    q = np.array(q0, dtype='float').reshape(n)
+    dq = np.array(dq0, dtype='float').reshape(n)
+    h = dt if step is None else step
+    return _integrate(f, q, dq, tf, h, integrator, tf if max_step is None else max_step, out, debug)
+
+def _simulate_rollout(args):
+    dynamics, q0, dq0, ut, kwargs = args
+    return simulate(dynamics, q0, dq0, ut, **kwargs)
+
+# Simulate B rollouts (parameter sweeps, Monte-Carlo tests)
+#   dynamics: one model for all the rollouts or a list of B models (e.g. with perturbed mass/inertia)
+#   q0, dq0: (n,) shared or (B,n)
+#   ut: (N,n) shared, (B,N,n) per rollout or a function of time returning (n,) or (B,n)
+#   processes: None -> if the model implements forward_dynamics_batch(q, dq, u) with (B,n) arrays,
+#              the B rollouts are advanced in lockstep with one vectorized call per function evaluation,
+#              otherwise (or with a list of models or processes given) each rollout is simulated by simulate() in a process pool
+#   out: optional preallocated (qt, dqt, ddqt) with shape (B, num_steps+1, n) each (only for the fixed step integrators)
+# Returns qt, dqt, ddqt as (B,T,n) arrays, time (T,) and stats
+# With the process pool and an adaptive integrator each rollout has its own time grid, so qt, dqt, ddqt, time and stats are lists
+def simulate_batch(dynamics, q0, dq0, ut, dt=0.0004, integrator="semi-implicit-euler", step=None, tf=None,
+                   interpolation=None, max_step=None, debug=False, out=None, processes=None, **integrator_kwargs):
+    models = dynamics if isinstance(dynamics, (list, tuple)) else None
+    n = (models[0] if models is not None else dynamics).n
+    q0 = np.asarray(q0, dtype='float')
+    dq0 = np.asarray(dq0, dtype='float')
+    B = len(models) if models is not None else 1
+    for x in (q0, dq0):
+        if(x.ndim > 1 and x.shape[-1] == n):
+            B = max(B, x.shape[0])
+    if(not callable(ut)):
+        ut = np.asarray(ut, dtype='float')
+        # samples as (n,1) column vectors
+        if(ut.ndim > 2 and ut.shape[-2:] == (n, 1)):
+            ut = ut[..., 0]
+        if(ut.ndim > 2):
+            B = max(B, ut.shape[0])
+    q = np.broadcast_to(q0.reshape(-1, n), (B, n)).copy()
+    dq = np.broadcast_to(dq0.reshape(-1, n), (B, n)).copy()
+    tf = _final_time(ut if callable(ut) or ut.ndim == 2 else ut[0], dt, tf)
+
+    if(models is None and processes is None and hasattr(dynamics, "forward_dynamics_batch")):
+        integrator = get_integrator(integrator, **integrator_kwargs)
+        if(callable(ut)):
+            u_fun = ut
+            ut = lambda t: np.broadcast_to(np.asarray(u_fun(t), dtype='float').reshape(-1, n), (B, n))
+        elif(ut.ndim == 2):
+            ut = np.broadcast_to(ut[:, None, :], (len(ut), B, n))
+        else:
+            ut = np.swapaxes(ut, 0, 1)
+        u = control_signal(ut, dt, (B, n), _default_interpolation(integrator, interpolation))
+        f = lambda t, q, dq: dynamics.forward_dynamics_batch(q, dq, u(t))
+        h = dt if step is None else step
+        return _integrate(f, q, dq, tf, h, integrator, tf if max_step is None else max_step, out, debug)
+
+    # Process pool fallback
+    from multiprocessing import Pool
+    models = models if models is not None else [dynamics]*B
+    if(callable(ut)):
+        raise ValueError("ut should be an array of samples for the process pool (a function of time can not be sent to the workers)")
+    uts = ut if ut.ndim > 2 else [ut]*B
+    kwargs = dict(dt=dt, integrator=integrator, step=step, tf=tf, interpolation=interpolation, max_step=max_step, **integrator_kwargs)
+    with Pool(processes) as pool:
+        results = list(tqdm(pool.imap(_simulate_rollout, [(models[b], q[b], dq[b], uts[b], kwargs) for b in range(B)]), total=B, disable=not debug))
+    qt, dqt, ddqt, time, stats = [list(x) for x in zip(*results)]
+    if(len(set(len(x) for x in time)) > 1):
+        return qt, dqt, ddqt, time, stats
+    qt, dqt, ddqt = allocate_trajectory(len(time[0]), n, out, (B,))
+    for b, result in enumerate(results):
+        qt[b], dqt[b], ddqt[b] = result[:3]
+    total = {key: sum(x[key] for x in stats) for key in stats[0]}
+    return qt, dqt, ddqt, time[0], total
+
+if __name__ == "__main__":
+    from ArticulatedBodyDynamics import ArticulatedBodyRR
+    dyn = ArticulatedBodyRR()
+    q0 = np.array([-np.pi/2, np.pi/2])
+    dq0 = np.array([0, 0])
+    tf = 10
+    ut = lambda t: np.array([5*np.sin(t), 0])
+    # Reference solution with very small steps
+    q_ref, dq_ref, _, _, _ = simulate(dyn, q0, dq0, ut, tf=tf, integrator="rk45", step=1e-3, rtol=1e-12, atol=1e-12)
+    for (integrator, step) in [("semi-implicit-euler", 0.0004), ("symplectic", 0.005), ("rk4", 0.01), ("rk45", 0.01)]:
+        qt, dqt, ddqt, time, stats = simulate(dyn, q0, dq0, ut, tf=tf, integrator=integrator, step=step)
+        print(f"{integrator:>20} step: {step}, steps: {stats['steps']}, nfev: {stats['nfev']}, error in q(tf): {np.max(np.abs(qt[-1] - q_ref[-1]))}")
+
+    # Batch of rollouts from random initial configurations: vectorized lockstep vs one simulate() per rollout
+    import time as timer
+    B = 20
+    q0_batch = np.random.uniform(-np.pi, np.pi, (B, 2))
+    ut = np.zeros((2500, 2))
+    start = timer.time()
+    qt_batch, _, _, _, _ = simulate_batch(dyn, q0_batch, dq0, ut, dt=0.004)
+    batch_time = timer.time() - start
+    start = timer.time()
+    qt_serial = [simulate(dyn, q0_batch[b], dq0, ut, dt=0.004)[0] for b in range(B)]
+    serial_time = timer.time() - start
+    print(f"{B} rollouts: batch {batch_time:.2f} s, serial {serial_time:.2f} s, max difference: {np.max(np.abs(qt_batch - np.array(qt_serial)))}")
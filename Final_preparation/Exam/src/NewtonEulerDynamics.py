@@ -1,6 +1,7 @@
 import numpy as np
 from utils import *
 from tqdm import tqdm
+from Integrators import simulate, as_trajectory, allocate_output
 
 class NewtonEuler:
     def __init__(self,):
@@ -17,35 +18,34 @@ class NewtonEuler:
         self.joint_type = ["R", "P", "P"]
         # self.joint_axis = [0, 1, 2]
 
-    def direct(self, q0, dq0, ut, dt=0.0004):
-        qt = [q0.reshape(3,1)]
-        dqt = [dq0.reshape(3,1)]
-        ddqt = [np.zeros((self.n, 1))]
+    def forward_dynamics(self, q, dq, u):
+        q = np.array(q, dtype=np.float64).reshape(self.n)
+        dq = np.array(dq, dtype=np.float64).reshape(self.n)
         zeros = np.array([np.zeros((self.n, 1))])
-        for i in tqdm(range(1,len(ut)+1)):
-            q = qt[i-1].copy().squeeze()
-            dq = dqt[i-1].copy().squeeze()
-            ddq = ddqt[i-1].copy().squeeze()
-            u = ut[i-1].copy()
-            
-            n = np.array(self.inverse2(np.array([q]), np.array([dq]), np.array([zeros]))).squeeze().reshape((3,1))
-            
-            M = np.zeros((self.n, self.n))
-            for j in range(self.n):
-                e_i = np.eye(self.n)[j] # np.array([0,0,1]).reshape((3,1))
-                Mi = np.array(self.inverse2(np.array([q]), np.array([zeros]), np.array([e_i]))).squeeze().reshape((3,))
-                M[:,j] = Mi
-            # print(np.linalg.pinv(M))
-            # print(u, n)
-            ddq = np.linalg.pinv(M) @ (u.reshape((3,1))-n)
-            dq = dq.reshape(self.n,1) + ddq*dt
-            q = q.reshape(self.n,1) + dq*dt
-            
-            ddqt.append(ddq)
-            dqt.append(dq)
-            qt.append(q)
+        n = np.array(self.inverse2(np.array([q]), np.array([dq]), np.array([zeros]))).squeeze().reshape((3,1))
+        
+        M = np.zeros((self.n, self.n))
+        for j in range(self.n):
+            e_i = np.eye(self.n)[j] # np.array([0,0,1]).reshape((3,1))
+            Mi = np.array(self.inverse2(np.array([q]), np.array([zeros]), np.array([e_i]))).squeeze().reshape((3,))
+            M[:,j] = Mi
+        # print(np.linalg.pinv(M))
+        # print(u, n)
+        return (np.linalg.pinv(M) @ (np.array(u).reshape((3,1))-n)).reshape(self.n)
+
+    # integrator: one of Integrators.INTEGRATORS (Default: semi-implicit Euler with step dt)
+    # out: optional preallocated (qt, dqt, ddqt), returns (T,n) arrays
+    def direct(self, q0, dq0, ut, dt=0.0004, debug=True, integrator="semi-implicit-euler", step=None, out=None, **integrator_kwargs):
+        qt, dqt, ddqt, self.simulation_time, self.simulation_stats = simulate(self, q0, dq0, ut, dt=dt, integrator=integrator, step=step, debug=debug, out=out, **integrator_kwargs)
         return qt, dqt, ddqt
 
+    # qt, dqt, ddqt: (T,n) arrays or lists of (n,1) arrays, out: optional preallocated (T,n), returns ut (T,n)
+    def inverse(self, qt, dqt, ddqt, out=None):
+        qt, dqt, ddqt = as_trajectory(qt, self.n), as_trajectory(dqt, self.n), as_trajectory(ddqt, self.n)
+        ut = allocate_output(len(qt), self.n, out)
+        for i in range(len(qt)):
+            ut[i] = np.array(self.inverse2(qt[i:i+1], dqt[i:i+1], ddqt[i:i+1]), dtype=np.float64).reshape(self.n)
+        return ut
 
     def inverse2(self, qt, dqt, ddqt):
         ut = []
@@ -1,120 +1,30 @@
 import numpy as np
-import sympy as sp
-from matplotlib import pyplot as plt
-
-def translation_x(l):
-    return np.array([[1,0,0, l],
-                     [0,1,0, 0],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def translation_y(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, l],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def translation_z(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 0],
-                     [0,0,1, l],
-                     [0,0,0, 1]], dtype='float')
-
-def rotation_x(theta):
-    return np.array([[1,         0,          0, 0],
-                     [0,np.cos(theta),-np.sin(theta), 0],
-                     [0,np.sin(theta), np.cos(theta), 0],
-                     [0,         0,          0, 1]], dtype='float')
-
-
-def rotation_y(theta):
-    return np.array([[np.cos(theta) ,0,np.sin(theta), 0],
-                     [0          ,1,         0, 0],
-                     [-np.sin(theta),0,np.cos(theta), 0],
-                     [0          ,0,         0, 1]], dtype='float')
-
-def rotation_z(theta):
-    return np.array([[np.cos(theta),-np.sin(theta),0, 0],
-                     [np.sin(theta), np.cos(theta),0, 0],
-                     [0         ,0          ,1, 0],
-                     [0         ,0          ,0, 1]], dtype='float')
-
-
-def rotation_x3(theta):
-    return np.array([[1,         0,          0],
-                     [0,np.cos(theta),-np.sin(theta)],
-                     [0,np.sin(theta), np.cos(theta)]], dtype='float')
-
-
-def rotation_y3(theta):
-    return np.array([[np.cos(theta) ,0,np.sin(theta)],
-                     [0          ,1,         0],
-                     [-np.sin(theta),0,np.cos(theta)]], dtype='float')
-
-def rotation_z3(theta):
-    return np.array([[np.cos(theta),-np.sin(theta),0],
-                     [np.sin(theta), np.cos(theta),0],
-                     [0         ,0          ,1]], dtype='float')
-
-
-
-def dtranslation_x(l):
-    return np.array([[1,0,0, 1],
-                     [0,1,0, 0],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def dtranslation_y(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 1],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def dtranslation_z(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 0],
-                     [0,0,1, 1],
-                     [0,0,0, 1]], dtype='float')
-
-def drotation_x(theta):
-    return np.array([[0,         0,          0, 0],
-                     [0,-np.sin(theta), -np.cos(theta), 0],
-                     [0, np.cos(theta), -np.sin(theta), 0],
-                     [0,         0,          0, 0]], dtype='float')
-
-
-def drotation_y(theta):
-    return np.array([[-np.sin(theta), 0,  np.cos(theta), 0],
-                     [0          ,0,         0, 0],
-                     [-np.cos(theta), 0, -np.sin(theta), 0],
-                     [0          ,0,         0, 0]], dtype='float')
-
-def drotation_z(theta):
-    return np.array([[-np.sin(theta),-np.cos(theta),0, 0],
-                     [ np.cos(theta), -np.sin(theta),0, 0],
-                     [0         ,0          ,0, 0],
-                     [0         ,0          ,0, 0]], dtype='float')
-
+# The homogeneous transformations come from the manipulators package, the helpers below are specific to this exam
+from manipulators.transforms import *
 
 def sp_translation_x(l):
+    import sympy as sp
     return sp.Matrix(np.array([[1,0,0, l],
                      [0,1,0, 0],
                      [0,0,1, 0],
                      [0,0,0, 1]]))
 
 def sp_translation_y(l):
+    import sympy as sp
     return sp.Matrix(np.array([[1,0,0, 0],
                      [0,1,0, l],
                      [0,0,1, 0],
                      [0,0,0, 1]]))
 
 def sp_translation_z(l):
+    import sympy as sp
     return sp.Matrix(np.array([[1,0,0, 0],
                      [0,1,0, 0],
                      [0,0,1, l],
                      [0,0,0, 1]]))
 
 def sp_rotation_x(theta):
+    import sympy as sp
     return sp.Matrix(np.array([[1,         0,          0, 0],
                      [0,sp.cos(theta),-sp.sin(theta), 0],
                      [0,sp.sin(theta), sp.cos(theta), 0],
@@ -122,22 +32,19 @@ def sp_rotation_x(theta):
 
 
 def sp_rotation_y(theta):
+    import sympy as sp
     return sp.Matrix(np.array([[sp.cos(theta) ,0,sp.sin(theta), 0],
                      [0          ,1,         0, 0],
                      [-sp.sin(theta),0,sp.cos(theta), 0],
                      [0          ,0,         0, 1]]))
 
 def sp_rotation_z(theta):
+    import sympy as sp
     return sp.Matrix(np.array([[sp.cos(theta),-sp.sin(theta),0, 0],
                      [sp.sin(theta), sp.cos(theta),0, 0],
                      [0         ,0          ,1, 0],
                      [0         ,0          ,0, 1]]))
 
-def get_rotation(H):
-    return H[:3,:3]
-
-def get_position(H):
-    return H[:3,3]
 
 def calc_error(H1, H2):
     shape = np.array(H1).shape
@@ -148,6 +55,7 @@ def calc_error(H1, H2):
     return error
 
 def check_diff(eq1, eq2):
+    import sympy as sp
     return sp.simplify(eq1 - eq2) == 0
 
 def print_matrix(f):
@@ -155,15 +63,12 @@ def print_matrix(f):
         print("Rotation:\n", get_rotation(f))
         print("Position:\n", get_position(f)) 
 
-def pos2hom(pos):
-    hom = np.zeros((4,4))
-    hom[:3,3] = pos.T
-    hom[3,3] = 1
-    return hom
 
 def plot_u(u, n=2, dt=1/1000, title="Control Input", time=None):
+    from matplotlib import pyplot as plt
     
-    u = np.array(u).reshape(len(u), n)
+    # No copy if u is already a (T,n) array
+    u = np.asarray(u, dtype='float').reshape(len(u), n)
     time = np.linspace(0, dt*len(u), len(u)) if time is None else time
 
     fig, ax = plt.subplots(1)
@@ -178,11 +83,13 @@ def plot_u(u, n=2, dt=1/1000, title="Control Input", time=None):
     plt.show()
 
 def plot_trajectory(traj,n=2, dt=1/100, title="Trajectory", time=None):
+    from matplotlib import pyplot as plt
     q, dq, ddq = traj[:]
     
-    q = np.array(q).squeeze()
-    dq = np.array(dq).squeeze()
-    ddq = np.array(ddq).squeeze()
+    # No copy if q, dq, ddq are already (T,n) arrays
+    q = np.asarray(q, dtype='float').reshape(len(q), n)
+    dq = np.asarray(dq, dtype='float').reshape(len(dq), n)
+    ddq = np.asarray(ddq, dtype='float').reshape(len(ddq), n)
     
     time = np.linspace(0, dt*len(q), len(q)) if time is None else time
 
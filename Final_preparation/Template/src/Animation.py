@@ -0,0 +1,95 @@
+# Animation pipeline for long trajectories (e.g. 25000 steps of EulerLagrange.direct at dt=0.0004)
+# The samples are pulled lazily from any iterable (list, array, generator such as EulerLagrange.direct_iter)
+# and decimated to the display rate: only one sample per displayed frame is turned into a frame and rendered
+# The trail history has a bounded size: its points are kept on a time schedule (one point per period of simulation time),
+# when it is full every other point is dropped and the period is doubled (the old history gets coarser, never longer)
+import numpy as np
+
+# Samples (idx, t, sample) to display at fps, speed: simulation seconds per real second
+# A sample is kept when its time reaches the next display time, the others are skipped without being stored
+def decimate(samples, dt, fps=30, speed=1):
+    display_dt = speed/fps
+    next_time = 0
+    for idx, sample in enumerate(samples):
+        t = idx*dt
+        if(t + 1e-12 >= next_time):
+            # After a gap (dt > display_dt) the schedule restarts from the current time
+            next_time = max(next_time + display_dt, t)
+            yield idx, t, sample
+
+
+class TrailHistory:
+    # period: simulation time between two stored points, max_points: size of the history
+    def __init__(self, period, max_points=500):
+        self.period = period
+        self.max_points = max(2, max_points)
+        self.times = []
+        self.points = []
+
+    # return added, compacted (the stored points changed and have to be drawn again)
+    def add(self, t, p):
+        if(len(self.times) > 0 and t - self.times[-1] + 1e-12 < self.period):
+            return False, False
+        self.times.append(t)
+        self.points.append(np.asarray(p, dtype=np.float64).reshape(-1))
+        if(len(self.points) <= self.max_points):
+            return True, False
+        # Keep the last point, drop every other one before it
+        self.times = self.times[::-1][::2][::-1]
+        self.points = self.points[::-1][::2][::-1]
+        self.period *= 2
+        return True, True
+
+
+# Render the samples with vis (RobotVisualization_vpython) at fps
+# frame(idx, sample) -> frame in the format of render_frame, it is only called for the displayed samples
+# trail: True to draw the path of the "node" of the frames, or a function trail(idx, sample) -> point
+# trail_period: simulation time between the trail points (default: one point per displayed frame)
+# return the number of rendered frames
+def animate(vis, samples, frame, dt, fps=30, speed=1, trail=None, trail_period=None, max_trail_points=500):
+    vis.rate = fps
+    vis.clear_trail()
+    history = None
+    if(trail is not None and trail is not False):
+        history = TrailHistory(speed/fps if trail_period is None else trail_period, max_trail_points)
+    num_frames = 0
+    for idx, t, sample in decimate(samples, dt, fps=fps, speed=speed):
+        frame_sub = frame(idx, sample)
+        if(history is not None):
+            if(trail is True):
+                p = [f[1] for f in frame_sub if f[0] == "node"][-1]
+            else:
+                p = trail(idx, sample)
+            added, compacted = history.add(t, p)
+            if(compacted):
+                vis.set_trail(history.points)
+            elif(added):
+                frame_sub = frame_sub + [["trajectory_trail", p]]
+        vis.render_frame(frame_sub, axis=False)
+        num_frames += 1
+    return num_frames
+
+
+if __name__ == "__main__":
+    from EulerLagrangeDynamics import EulerLagrange
+    from visualization import RobotVisualization_vpython
+    from time import time
+    dt = 0.0004
+    simulation_times_steps = 25000
+    q0 = np.array([-np.pi/2, np.pi/2]).reshape(2,1)
+    dq0 = np.array([0,0]).reshape(2,1)
+    ut = (np.zeros((2,1)) for i in range(simulation_times_steps))
+    l = EulerLagrange().l
+
+    # 2-link planar arm
+    def arm_frame(idx, q):
+        q = np.reshape(q, -1)
+        p1 = [l[0]*np.cos(q[0]), l[0]*np.sin(q[0]), 0.]
+        p2 = [p1[0] + l[1]*np.cos(q[0]+q[1]), p1[1] + l[1]*np.sin(q[0]+q[1]), 0.]
+        return [["link", [0, 0, 0], p1], ["link", p1, p2], ["joint", [0, 0, 0]], ["joint", p1], ["node", p2], ["time", idx, idx*dt]]
+
+    vis = RobotVisualization_vpython(scale=0.07, radius={"link":0.003, "joint":0.004, "node":0.004, "axe":0.003, "trajectory_trail": 0.0009})
+    t = time()
+    samples = (q for q, dq, ddq in EulerLagrange().direct_iter(q0, dq0, ut, dt=dt))
+    num_frames = animate(vis, samples, arm_frame, dt, fps=30, trail=True, trail_period=0.05)
+    print(f"{simulation_times_steps} steps -> {num_frames} frames in {time()-t:.2f}s")
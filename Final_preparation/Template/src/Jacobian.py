@@ -3,7 +3,6 @@
 import numpy as np
 from robot import RRR_robot_configs as configs
 from utils import *
-import sympy as sp
 
 class Jacobian:
     def __init__(self, T_base=None, T_tool=None):
@@ -26,7 +25,7 @@ class Jacobian:
         T = self.T_base_robot @ rotation_z(q[0]) @ translation_z(self.l[0]) @ rotation_y(q[1]) @ translation_x(self.l[1]) @ rotation_y(q[2]) @ translation_x(self.l[2]) @ self.T_tool_robot
     
         To_inv = np.eye(4)
-        To_inv[:3,:3] = np.linalg.inv(T[:3,:3])
+        To_inv[:3,:3] = T[:3,:3].T
 
         dT = self.T_base_robot @ drotation_z(q[0]) @ translation_z(self.l[0]) @ rotation_y(q[1]) @ translation_x(self.l[1]) @ rotation_y(q[2]) @ translation_x(self.l[2]) @ self.T_tool_robot @ To_inv
         J[:,0] = self._get_jacobian_column(dT)
@@ -39,29 +38,37 @@ class Jacobian:
 
         return J
 
+    # Skew theory, computed on the kinematic chain of the robot (configs.chain): [u_i x (O_end - O_i); u_i]
     def calc_skew(self, q):
-        A =  [  self.T_base_robot,
-                rotation_z(q[0]) @ translation_z(self.l[0]),
-                rotation_y(q[1]) @ translation_x(self.l[1]),
-                rotation_y(q[2]) @ translation_x(self.l[2]) @ self.T_tool_robot]
-    
-        # calculate O, U vectors
-        O = []
-        U = []
-        # z y y x y x
-        u_rotation_joints_cols = [2, 1, 1]
-        T0i = np.eye(4)
-        for i in range(3):
-            T0i = T0i @ A[i]
-            O.append(T0i[:3,3])
-            U.append(T0i[:3, u_rotation_joints_cols[i]])
-        T0i = T0i @ A[3]
-        O.append(T0i[:3,3])
-        J = np.zeros((6,3))
-        for i in range(3):
-            J[:3,i] = np.cross((U[i]).reshape((1,3)), (O[3] - O[i]).reshape((1,3))).T.squeeze()
-            J[3:,i] = U[i]
-        return J
+        return configs.chain.jacobian(q, self.T_base_robot, self.T_tool_robot)[0]
+
+    # Joints origins O (N,3,3), axes U (N,3,3) and the end-effector position (N,3) of the configurations q (N,3)
+    def _skew_vectors_batch(self, q):
+        T, joints_frames = configs.chain.forward(q, self.T_base_robot, self.T_tool_robot, return_frames=False, return_joints_frames=True)
+        U = np.stack([joints_frames[:,j,:3,axis] for j, axis in enumerate(configs.chain.joint_axes)], axis=1)
+        return joints_frames[:,:,:3,3], U, T[:,:3,3]
+
+    # Batched version of calc_skew: q (N,3) -> J (N,6,3), all the configurations at once
+    def calc_skew_batch(self, q):
+        return configs.chain.jacobian(q, self.T_base_robot, self.T_tool_robot)
+
+    # Time derivative of the jacobian times the joints velocities dJ(q, dq) dq: q, dq (N,3) -> (N,6)
+    # From the derivatives of the skew theory columns [u_i x (O_end - O_i); u_i]:
+    #   du_i = w_(i-1) x u_i, w_(i-1) = sum_(k<i) u_k dq_k (the axis i moves with the previous links)
+    #   dO_i = sum_(k<i) u_k dq_k x (O_i - O_k), dO_end = sum_k u_k dq_k x (O_end - O_k)
+    # Cartesian acceleration: ddx = J ddq + dJ dq
+    def calc_dJdq_batch(self, q, dq):
+        O, U, O_end = self._skew_vectors_batch(q)
+        dq = np.asarray(dq, dtype='float').reshape(-1, 3)
+        w = U*dq[...,None]                                  # (N,3,3) u_k dq_k
+        w_previous = np.cumsum(w, axis=1) - w               # sum_(k<i) u_k dq_k
+        dU = np.cross(w_previous, U)
+        dO_end = np.sum(np.cross(w, O_end[:,None] - O), axis=1)
+        dO = np.zeros_like(O)
+        for i in range(1, 3):
+            dO[:,i] = np.sum(np.cross(w[:,:i], O[:,i,None] - O[:,:i]), axis=1)
+        dJ_linear = np.cross(dU, O_end[:,None] - O) + np.cross(U, dO_end[:,None] - dO)
+        return np.concatenate([np.sum(dJ_linear*dq[...,None], axis=1), np.sum(dU*dq[...,None], axis=1)], axis=-1)
         
 if __name__ == "__main__":
     jacobian = Jacobian()
@@ -0,0 +1,151 @@
+# Headless recording of robot animations (no vpython/browser session needed to produce them)
+# The geometry of all the frames (links endpoints, joints, end-effector and its trail) is precomputed from the batched FK
+# and stored as arrays in a compact .npz file, then it can be:
+#   played: in vpython with the same frames as plot_robot_multi_frames
+#   exported: offline to a .gif/.mp4 or a directory of .png images with matplotlib (Agg canvas, no display)
+#   compared: with a reference recording (visual regression of planned motions)
+import os
+import numpy as np
+
+class TrajectoryRecording:
+    # links (T,L,2,3), joints (T,J,3), node (T,3), trail (T,3) or None, dt: time between the frames
+    def __init__(self, links, joints, node, trail=None, dt=1):
+        self.links = np.asarray(links)
+        self.joints = np.asarray(joints)
+        self.node = np.asarray(node)
+        self.trail = None if trail is None else np.asarray(trail)
+        self.dt = dt
+
+    # From the FK frames of the trajectory (T,F,4,4) (frame 0 is the base)
+    # The first link is split at the shoulder shift as in plot_robot
+    @staticmethod
+    def from_frames(frames, dt=1, trail=False):
+        p = np.asarray(frames)[...,:3,3]
+        shoulder = p[:,1].copy()
+        shoulder[:,0] = 0.0
+        starts = np.stack([p[:,0], shoulder] + [p[:,i-1] for i in range(2, p.shape[1])], axis=1)
+        ends = np.stack([shoulder, p[:,1]] + [p[:,i] for i in range(2, p.shape[1])], axis=1)
+        links = np.stack([starts, ends], axis=2)
+        return TrajectoryRecording(links, p[:,1:], p[:,-1], trail=p[:,-1] if trail else None, dt=dt)
+
+    def __len__(self):
+        return len(self.node)
+
+    # Frame idx in the format of RobotVisualization_vpython.render_frame
+    def frame(self, idx):
+        frame = [["link", l[0], l[1]] for l in self.links[idx]]
+        frame += [["joint", j] for j in self.joints[idx]]
+        frame.append(["node", self.node[idx]])
+        frame.append(["time", idx, idx*self.dt])
+        if(self.trail is not None):
+            frame.append(["trajectory_trail", self.trail[idx]])
+        return frame
+
+    # Min and max corners of everything that is drawn
+    def bounds(self):
+        points = np.concatenate([self.links.reshape(-1, 3), self.joints.reshape(-1, 3), self.node])
+        return np.min(points, axis=0), np.max(points, axis=0)
+
+    # Max distance between the corresponding points of two recordings of the same robot and number of frames
+    def max_difference(self, other):
+        return max(np.max(np.linalg.norm(self.links - other.links, axis=-1)),
+                   np.max(np.linalg.norm(self.node - other.node, axis=-1)))
+
+    def save(self, path="recording.npz"):
+        data = {"links": self.links.astype(np.float32), "joints": self.joints.astype(np.float32),
+                "node": self.node.astype(np.float32), "dt": self.dt}
+        if(self.trail is not None):
+            data["trail"] = self.trail.astype(np.float32)
+        np.savez_compressed(path, **data)
+
+    @staticmethod
+    def load(path="recording.npz"):
+        data = np.load(path)
+        trail = data["trail"] if "trail" in data.files else None
+        return TrajectoryRecording(data["links"], data["joints"], data["node"], trail=trail, dt=float(data["dt"]))
+
+    # Interactive playback in vpython (vis: RobotVisualization_vpython, e.g. with the robot scale and radius)
+    def play(self, vis=None, loop=True, step=1):
+        import visualization as visual
+        vis = visual.RobotVisualization_vpython(rate=10) if vis is None else vis
+        while True:
+            vis.clear_trail()
+            for idx in range(0, len(self), step):
+                vis.render_frame(self.frame(idx), axis=False)
+            if(not loop):
+                break
+
+    # Offline export without any display: path .gif (pillow), .mp4 (ffmpeg), otherwise a directory of .png images
+    # step: export every step-th frame, fps: frames per second of the animation
+    def export(self, path, fps=30, step=1, elev=25, azim=-60, dpi=100, size=(6,6)):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib import animation
+
+        fig = Figure(figsize=size)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(projection="3d")
+        ax.view_init(elev=elev, azim=azim)
+        low, high = self.bounds()
+        center, half = (low + high)/2, np.max(high - low)/2 + 1e-9
+        ax.set_xlim(center[0]-half, center[0]+half)
+        ax.set_ylim(center[1]-half, center[1]+half)
+        ax.set_zlim(center[2]-half, center[2]+half)
+        ax.set_box_aspect((1,1,1))
+        # The artists are created once and updated for each frame
+        links = [ax.plot([], [], [], color=(242/255, 92/255, 25/255), linewidth=3)[0] for _ in range(self.links.shape[1])]
+        joints = ax.plot([], [], [], "o", color="black", markersize=4)[0]
+        node = ax.plot([], [], [], "o", color="green", markersize=6)[0]
+        trail = ax.plot([], [], [], color="red", linewidth=1)[0] if self.trail is not None else None
+        title = ax.set_title("")
+
+        def draw(idx):
+            for line, l in zip(links, self.links[idx]):
+                line.set_data_3d(l[:,0], l[:,1], l[:,2])
+            joints.set_data_3d(self.joints[idx,:,0], self.joints[idx,:,1], self.joints[idx,:,2])
+            node.set_data_3d(self.node[idx,0:1], self.node[idx,1:2], self.node[idx,2:3])
+            if(trail is not None):
+                trail.set_data_3d(self.trail[:idx+1,0], self.trail[:idx+1,1], self.trail[:idx+1,2])
+            title.set_text("Steps: {:}, Seconds: {:.3f}".format(idx, idx*self.dt))
+
+        indices = range(0, len(self), step)
+        extension = os.path.splitext(path)[1].lower()
+        if(extension in [".gif", ".mp4"]):
+            writer = animation.PillowWriter(fps=fps) if extension == ".gif" else animation.FFMpegWriter(fps=fps)
+            with writer.saving(fig, path, dpi):
+                for idx in indices:
+                    draw(idx)
+                    writer.grab_frame()
+        else:
+            os.makedirs(path, exist_ok=True)
+            for i, idx in enumerate(indices):
+                draw(idx)
+                fig.savefig(os.path.join(path, f"frame_{i:05d}.png"), dpi=dpi)
+        return len(indices)
+
+
+if __name__ == "__main__":
+    import sys, tempfile
+    # python Recording.py <recording.npz> <output .gif/.mp4/directory> [step]
+    if(len(sys.argv) > 2):
+        recording = TrajectoryRecording.load(sys.argv[1])
+        step = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        print(f"Exported {recording.export(sys.argv[2], step=step)} frames to {sys.argv[2]}")
+        sys.exit()
+
+    from robot import RRR_robot
+    from time import time
+    # python Recording.py [output directory] (default: the temporary directory, not the source tree)
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else tempfile.gettempdir()
+    recording_path = os.path.join(output_dir, "recording.npz")
+    animation_path = os.path.join(output_dir, "recording.gif")
+    robot = RRR_robot()
+    t = np.linspace(0, 1, 500)[:,None]
+    q = np.array([0, 0, 0])*(1-t) + np.array([np.pi, -np.pi/3, np.pi/2])*t
+    start = time()
+    recording = robot.record_multi_frames(q, path=recording_path, dt=t[1,0], trail=True)
+    print(f"Recorded {len(recording)} frames in {time()-start:.3f}s")
+    recording = TrajectoryRecording.load(recording_path)
+    print(f"Max difference after save/load: {recording.max_difference(robot.record_multi_frames(q, dt=t[1,0], trail=True)):.2e}")
+    start = time()
+    print(f"Exported {recording.export(animation_path, step=10)} frames to {animation_path} in {time()-start:.3f}s")
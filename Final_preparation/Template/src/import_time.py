@@ -0,0 +1,22 @@
+# Import time benchmark: each module is imported in a fresh interpreter (the heavy dependencies are loaded only on use)
+# python import_time.py [modules ...]
+import sys
+import subprocess
+
+HEAVY = ["sympy", "matplotlib", "vpython", "scipy"]
+
+def import_time(module, repeat=5):
+    code = ("import time; t = time.perf_counter(); import {0}; t = time.perf_counter() - t; import sys; "
+            "print(t, ' '.join(m for m in {1} if m in sys.modules))").format(module, HEAVY)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split("\n")[-2]
+        t, *loaded = out.split(" ")
+        times.append(float(t))
+    return min(times), loaded
+
+if __name__ == "__main__":
+    modules = sys.argv[1:] if len(sys.argv) > 1 else ["utils", "FK", "IK", "Jacobian", "robot", "TrajectoryPlanning", "EulerLagrangeDynamics"]
+    for module in modules:
+        t, loaded = import_time(module)
+        print(f"{module:25s} {t*1e3:8.1f} ms   heavy modules loaded: {', '.join(loaded) if len(loaded) else '-'}")
@@ -3,6 +3,7 @@ from NewtonEulerDynamics import NewtonEuler
 import numpy as np
 from utils import *
 from visualization import RobotVisualization_vpython
+from Animation import animate
 from math import cos, sin,exp
 
 
@@ -49,18 +50,13 @@ qt2, dqt2, ddqt2 = EL_dyn.direct(q0, dq0, ut_ne_inverse, dt=dt, debug=False)
 
 plot_u(ut_ne_inverse, dt=dt)
 vis = RobotVisualization_vpython(rate=1000, scale=0.07, radius={"link":0.003, "joint":0.004, "node":0.004, "axe":0.003, "trajectory_trail": 0.0009})
+def arm_frame(i, q):
+    return [
+            ['link', [0, 0, 0], [0.8*cos(q[0]), 0.8*sin(q[0]), 0.]], 
+            # ['link', [0., 0., 0.], [ 25.,   0., 400.]],
+            ['link', [0.8*cos(q[0]), 0.8*sin(q[0]), 0.], [0.8*cos(q[0]) + 0.8*cos(q[0]+q[1]), 0.8*sin(q[0]) + 0.8*sin(q[0]+q[1]), 0.]],
+            ['joint', [0, 0, 0]], 
+            ['joint', [0.8*cos(q[0]), 0.8*sin(q[0]), 0.]]]
+# Only the samples displayed at 30 fps are rendered (real time)
 while True:
-    for i in range(len(qt2)):
-        q = qt2[i].copy()
-        frame = [
-                ['link', [0, 0, 0], [0.8*cos(q[0]), 0.8*sin(q[0]), 0.]], 
-                # ['link', [0., 0., 0.], [ 25.,   0., 400.]],
-                ['link', [0.8*cos(q[0]), 0.8*sin(q[0]), 0.], [0.8*cos(q[0]) + 0.8*cos(q[0]+q[1]), 0.8*sin(q[0]) + 0.8*sin(q[0]+q[1]), 0.]],
-                ['joint', [0, 0, 0]], 
-                ['joint', [0.8*cos(q[0]), 0.8*sin(q[0]), 0.]]]
-        vis.render_frame(frame, axis=False)
-
-        # while True:
-            # vis.render_frame(frame, axis=False)
-
-
+    animate(vis, qt2, arm_frame, dt, fps=30)
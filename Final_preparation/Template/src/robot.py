@@ -1,6 +1,6 @@
 from utils import *
-import visualization as visual
-from TrajectoryPlanning import TrajectoryPlanning
+from manipulators.description import load_description
+from manipulators.chain import KinematicChain
 
 
 class RRR_robot:
@@ -11,7 +11,12 @@ class RRR_robot:
         self.T_tool = T_tool
         self.visualization_radius = {"link":0.003, "joint":0.004, "node":0.004, "axe":0.003, "trajectory_trail": 0.0009}
         self.visualization_scale = 0.05
-        self.trajectory_planning = TrajectoryPlanning
+
+    # Imported on the first use, the FK/IK only scripts do not load the planners
+    @property
+    def trajectory_planning(self):
+        from TrajectoryPlanning import TrajectoryPlanning
+        return TrajectoryPlanning
     
     def print_frames(self, frames):
         print(f"Note: Frame #{len(frames)-1} -> Tool")
@@ -30,7 +35,15 @@ class RRR_robot:
             print(f"Joint #{i}: {angle} rad ---> {angle*180/np.pi} degrees")
 
     def plot_robot(self, T):
+        import visualization as visual
         vis = visual.RobotVisualization_vpython(rate=10, scale=self.visualization_scale, radius=self.visualization_radius)
+        frame = self._robot_frame(T)
+        # print(frame)
+        while True:
+            vis.render_frame(frame, axis=False)
+
+    # Frame of the FK frames T in the format of render_frame
+    def _robot_frame(self, T, idx=0):
         frame = []
         links = []
         joints = []
@@ -56,47 +69,48 @@ class RRR_robot:
         for j in joints:
             frame.append(["joint", j])
         frame.append(["node", node])
-        frame.append(["time", 0, 0])
-        # print(frame)
-        while True:
-            vis.render_frame(frame, axis=False)
+        frame.append(["time", idx, 0])
+        return frame
 
     def plot_robot_multi_frames(self, Ts, trail=None, rate_factor=1):
+        import visualization as visual
         vis = visual.RobotVisualization_vpython(rate=1*rate_factor, scale=self.visualization_scale, radius=self.visualization_radius)
         while True:
+            vis.clear_trail()
             for idx, T in enumerate(Ts):
                 # print(T)
-                frame = []
-                links = []
-                joints = []
-                node = get_position(T[-1])
-                for i in range(1,len(T)):
-                    links.append((get_position(T[i-1]), get_position(T[i])))
-                    joints.append(get_position(T[i]))
-                for i, l in enumerate(links):
-                    # i == (shift_link-1)
-                    if(i == 0): # because of the physical shift without link (if I was using DH it would be much easier)
-                        p1 = l[0]
-                        p2 = l[1]
-                        # print(p2)
-                        p1_1 = p1.copy()
-                        p2_1 = p2.copy()
-                        p2_2 = p2.copy()
-                        p2_1[0] = 0.0
-                        p1_2 = p2_1.copy()
-                        frame.append(["link", p1_1, p2_1])
-                        frame.append(["link", p1_2, p2_2])
-                        continue
-                    frame.append(["link", l[0], l[1]])
-                for j in joints:
-                    frame.append(["joint", j])
-                frame.append(["node", node])
-                frame.append(["time", idx, 0])
+                frame = self._robot_frame(T, idx)
                 if(trail is not None):
                     frame.append(["trajectory_trail", trail[idx]])
                 # print(frame)
                 vis.render_frame(frame, axis=False)
 
+    # Animation of a long joints trajectory: q is any iterable of configurations (e.g. a generator), it is consumed lazily
+    # and only the samples displayed at fps are computed (FK) and rendered, see Animation.animate
+    def animate(self, q, dt, fps=30, speed=1, trail=False, trail_period=None, max_trail_points=500):
+        import visualization as visual
+        from FK import FK
+        from Animation import animate
+        vis = visual.RobotVisualization_vpython(rate=fps, scale=self.visualization_scale, radius=self.visualization_radius)
+        def frame(idx, qi):
+            return self._robot_frame(FK(np.reshape(qi, -1), T_base=self.T_base, T_tool=self.T_tool), idx)
+        return animate(vis, q, frame, dt, fps=fps, speed=speed, trail=trail, trail_period=trail_period, max_trail_points=max_trail_points)
+
+    # Headless alternative to plot_robot_multi_frames: the geometry of all the frames of the joints trajectory q (T,3)
+    # is computed with the batched FK and saved to path (.npz), it is rendered later with Recording (vpython player or images/video export)
+    # trail: draw the end-effector path
+    def record_multi_frames(self, q, path=None, dt=1, trail=False):
+        from Recording import TrajectoryRecording
+        frames = self.forward_kinematics_batch(q, return_frames=True)
+        recording = TrajectoryRecording.from_frames(frames, dt=dt, trail=trail)
+        if(path is not None):
+            recording.save(path)
+        return recording
+
+    def forward_kinematics_batch(self, q, return_frames=False):
+        from FK import FK_batch
+        return FK_batch(q, T_base=self.T_base, T_tool=self.T_tool, return_frames=return_frames)
+
     def forward_kinematics(self, q, plot=True, debug=True, return_all=False):
         from FK import FK
         T = FK(q, T_base=self.T_base, T_tool=self.T_tool, return_frames=(plot or debug or return_all))
@@ -113,7 +127,7 @@ class RRR_robot:
             return T
         return T[-1]    # end_effector
 
-    def inverse_kinematics(self, T, m=-1, plot=True, debug=True, debug_status=False):
+    def inverse_kinematics(self, T, m=1, plot=True, debug=True, debug_status=False):
         from IK import IK
 
         q, status = IK(T, T_base=self.T_base, T_tool=self.T_tool, m=m, debug=True)
@@ -130,6 +144,20 @@ class RRR_robot:
         
         return q
 
+    # Many targets at once: T (N,4,4) -> q (N,dof), status (N,) of IK.IKStatus codes
+    def inverse_kinematics_batch(self, T, m=1):
+        from IK import IK_batch
+        return IK_batch(T, T_base=self.T_base, T_tool=self.T_tool, m=m)
+
+    # All the IK branches T (N,4,4) -> q (N,branches,dof), status, valid
+    # With q_current: only the valid branch that is the closest to q_current -> q (N,dof), branch index (N,), found (N,)
+    def inverse_kinematics_all(self, T, q_current=None):
+        from IK import IK_all, closest_branch
+        q, status, valid = IK_all(T, T_base=self.T_base, T_tool=self.T_tool)
+        if(q_current is None):
+            return q, status, valid
+        return closest_branch(q, valid, q_current)
+
 
     def jacobian(self, q, method="skew"):
         from Jacobian import Jacobian
@@ -142,6 +170,56 @@ class RRR_robot:
     def hello(self):
         print("elfds")
         return 0
+
+    # Jacobians of many configurations q (N,dof) -> (N,6,dof)
+    def jacobian_batch(self, q):
+        from Jacobian import Jacobian
+        jacobian = Jacobian(T_base=self.T_base, T_tool=self.T_tool)
+        return jacobian.calc_skew_batch(q)
+
+    # dJ dq of many configurations and velocities q, dq (N,dof) -> (N,6)
+    def jacobian_derivative_batch(self, q, dq):
+        from Jacobian import Jacobian
+        jacobian = Jacobian(T_base=self.T_base, T_tool=self.T_tool)
+        return jacobian.calc_dJdq_batch(q, dq)
+
+    # Cartesian velocities/accelerations to joints ones for q (N,dof):
+    # dq = pinv(J) dx, ddq = pinv(J) (ddx - dJ dq)
+    # position_only: dx, ddx (N,3) are only the linear part (otherwise (N,6))
+    def cartesian_to_joint_batch(self, q, dx, ddx=None, position_only=False):
+        rows = slice(0, 3) if position_only else slice(0, 6)
+        J_pinv = np.linalg.pinv(self.jacobian_batch(q)[:,rows,:])
+        dq = (J_pinv @ np.asarray(dx, dtype='float')[...,None])[...,0]
+        if(ddx is None):
+            return dq
+        dJdq = self.jacobian_derivative_batch(q, dq)[:,rows]
+        ddq = (J_pinv @ (np.asarray(ddx, dtype='float') - dJdq)[...,None])[...,0]
+        return dq, ddq
+
+    # Singular values of the jacobians of q (N,dof), one batched SVD (position_only: only the linear velocity part)
+    def _singular_values(self, q, position_only=False):
+        J = self.jacobian_batch(q)
+        if(position_only == True):
+            J = J[:,:3,:]
+        return np.linalg.svd(J, compute_uv=False), J.shape[-2:]
+
+    # Singularity measures of q (N,dof) from the same SVD:
+    # manipulability sqrt(det(J J^T)) = prod(s), condition number s_max/s_min, minimum singular value
+    def singularity_measures(self, q, position_only=False):
+        s, _ = self._singular_values(q, position_only)
+        s_min = s[:,-1]
+        with np.errstate(divide="ignore"):
+            condition_number = s[:,0]/s_min
+        return np.prod(s, axis=-1), condition_number, s_min
+
+    # Singular configurations of q (N,dof) -> (N,) bool
+    # eps=None: rank deficient with the same tolerance as np.linalg.matrix_rank, otherwise minimum singular value <= eps
+    # (e.g. to find the near-singular segments of a trajectory)
+    def check_singularity_batch(self, q, eps=None, position_only=False):
+        s, shape = self._singular_values(q, position_only)
+        tol = s[:,0]*max(shape)*np.finfo(s.dtype).eps if eps is None else eps
+        return s[:,-1] <= tol
+
     def check_singularity(self, q, jacobian_method="numerical", singularity_method="rank", debug=True):
         J = self.jacobian(q, method=jacobian_method)
         singularity_flag = False
@@ -174,17 +252,18 @@ class RRR_robot:
         return singularity_flag
 
 class RRR_robot_configs:
+    # Loaded once from manipulators/descriptions/rrr_robot.json (read-only arrays, limits in rad)
+    description = load_description("rrr_robot")
+    # Kinematic chain of the description, the FK and the jacobian are computed on it
+    chain = KinematicChain(description.chain_links())
+
     @staticmethod
     def get_links_dimensions():
-        return [1,1,1]
+        return RRR_robot_configs.description.links_dimensions
 
     @staticmethod
     def get_joints_limits():
-        deg = [(-350, 350), (-180, 180), (-180, 180)]
-        rad = []
-        for (i,j) in deg:
-            rad.append(((i*np.pi/180), (j*np.pi/180)))
-        return rad
+        return RRR_robot_configs.description.joints_limits
 
 if __name__ == "__main__":
     robot = RRR_robot()
@@ -214,4 +293,4 @@ if __name__ == "__main__":
     dp_max = [1, 1, 1]
     ddp_max = [10, 10, 10]
     print(f"Setpoints: Starting {p1}, Final {p2}")
-    traj_lin = robot.trajectory_planning.LIN(p1.copy(), p2.copy(), f, dp_max, ddp_max)
\ No newline at end of file
+    traj_lin, time, joint_traj, success = robot.trajectory_planning.LIN(robot, p1.copy(), p2.copy(), f, dp_max, ddp_max)
\ No newline at end of file
@@ -2,7 +2,7 @@ import numpy as np
 import vpython as vp
 
 class RobotVisualization_vpython:
-    def __init__(self, rate=100, scale=1,radius={"link":0.005, "joint":0.006, "node":0.008, "axe":0.003, "trajectory_trail":0.004}, origin=[0.0, 0.0, 0.0], axe_length=0.2):
+    def __init__(self, rate=100, scale=1,radius={"link":0.005, "joint":0.006, "node":0.008, "axe":0.003, "trajectory_trail":0.004}, origin=[0.0, 0.0, 0.0], axe_length=0.2, max_trail_points=10000):
         self.rate = rate
         self.radius = radius
         self.axe_color = vp.vector(1, 1, 1)
@@ -17,6 +17,36 @@ class RobotVisualization_vpython:
         self.time_color = vp.vector(0,1,0)
         self.time_text_pos = vp.vector(-axe_length, axe_length,0)
         self.scale = scale
+        # Scene objects reused across the frames (see render_frame)
+        self.objects = {"axe": [], "joint": [], "node": [], "link": [], "text_joint": [], "time": []}
+        self.trail = None
+        self.max_trail_points = max_trail_points
+
+    # Retained mode: the objects of each type are created on the first frames that need them and then only updated
+    # (the i-th "link" of the frame updates the i-th link object, ...), the objects that are not used in a frame are hidden
+    # The trajectory trail is one points object that keeps only the last max_trail_points points
+    def _get_object(self, shape_type, idx, create):
+        objects = self.objects[shape_type]
+        if(idx >= len(objects)):
+            objects.append(create())
+        obj = objects[idx]
+        obj.visible = True
+        return obj
+
+    def _add_trail_point(self, v, color):
+        if(self.trail is None):
+            self.trail = vp.points(radius=self.radius["trajectory_trail"], color=self.trail_color, retain=self.max_trail_points)
+        self.trail.append(pos=v, color=color)
+
+    def clear_trail(self):
+        if(self.trail is not None):
+            self.trail.clear()
+
+    # Replace the whole trail (e.g. after its history was downsampled)
+    def set_trail(self, points):
+        self.clear_trail()
+        for p in points:
+            self._add_trail_point(vp.vector(*p)*self.scale, self.trail_color)
 
     def render_frame(self, frame_sub, axis=True):
         if(axis):
@@ -25,54 +55,54 @@ class RobotVisualization_vpython:
                      ["axe", self.origin, [0,0,1], self.axe_length]] + frame_sub
         else:
             frame = frame_sub
-        c = []
-        visible_idx = []
+        used = {shape_type: 0 for shape_type in self.objects.keys()}
         for obj in frame:
             shape_type = obj[0]
-            if(shape_type == "joint"):
-                v = vp.vector(*obj[1])*self.scale
-                color = self.joint_color if len(obj) <= 2 else vp.vector(*obj[2])
-                c.append(vp.sphere(pos=v, radius=self.radius["joint"], color=color))
-                # c.append(vp.box(pos=v, length=self.radius["joint"]*2, height=self.radius["joint"]*2, width=self.radius["joint"]*2, color=color))
-
-            elif(shape_type == "node"):
-                v = vp.vector(*obj[1])*self.scale
-                color = self.node_color if len(obj) <= 2 else vp.vector(*obj[2])
-                c.append(vp.sphere(pos=v, radius=self.radius["node"], color=color))
-                # c.append(vp.box(pos=v, length=self.radius["node"]*2, height=self.radius["node"]*2, width=self.radius["node"]*2, color=color))
-            elif(shape_type == "trajectory_trail"):
-                visible_idx.append(len(c))
+            if(shape_type == "trajectory_trail"):
                 v = vp.vector(*obj[1])*self.scale
                 color = self.trail_color if len(obj) <= 2 else vp.vector(*obj[2])
-                c.append(vp.sphere(pos=v, radius=self.radius["trajectory_trail"], color=color))
+                self._add_trail_point(v, color)
+                continue
+            idx = used[shape_type]
+            used[shape_type] += 1
+            if(shape_type == "joint" or shape_type == "node"):
+                v = vp.vector(*obj[1])*self.scale
+                default_color = self.joint_color if shape_type == "joint" else self.node_color
+                color = default_color if len(obj) <= 2 else vp.vector(*obj[2])
+                o = self._get_object(shape_type, idx, lambda: vp.sphere(pos=v, radius=self.radius[shape_type], color=color))
+                o.pos = v
+                o.color = color
             elif(shape_type == "text_joint"):
                 text = str(obj[1])
                 v = vp.vector(*obj[2])*self.scale
-                c.append(vp.text(text=text, pos=v,color=self.text_color, height=0.03))
+                # The text of a 3D text object can not be changed, it is created again only if the text changed
+                if(idx < len(self.objects["text_joint"]) and self.objects["text_joint"][idx].text != text):
+                    self.objects["text_joint"][idx].visible = False
+                    self.objects["text_joint"][idx] = vp.text(text=text, pos=v, color=self.text_color, height=0.03)
+                o = self._get_object(shape_type, idx, lambda: vp.text(text=text, pos=v, color=self.text_color, height=0.03))
+                o.pos = v
             elif(shape_type == "time"):
                 # text= "Steps: {:}, Seconds: {:.3f}".format(obj[1], obj[2])
                 text= "Steps: {:}".format(obj[1], obj[2])
-                c.append(vp.label(text=text, pos=self.time_text_pos, align="right", color=self.time_color))
-                # c.append(vp.text(text=text, pos=self.time_text_pos, align="right", height=self.time_text_height, billboard=True, emissive=True, color=self.time_color))
-            else:   # link, axe
+                o = self._get_object(shape_type, idx, lambda: vp.label(text=text, pos=self.time_text_pos, align="right", color=self.time_color))
+                o.text = text
+            elif(shape_type == "axe"):
                 v1 = vp.vector(*obj[1])*self.scale
                 v2 = vp.vector(*obj[2])*self.scale
-
-                if shape_type == "link":
-                    r = self.radius["link"]   #0.011
-                    _color = self.link_color
-
-                elif shape_type == "axe":
-                    r = self.radius["axe"]
-                    _color = self.axe_color
-                    c.append(vp.arrow(pos=v1,axis=v2, length=obj[3], color=_color, shaftwidth=self.axe_radius))
-                    continue
-                c.append(vp.curve(pos=[v1, v2], color=_color, radius=r))
+                o = self._get_object(shape_type, idx, lambda: vp.arrow(pos=v1, axis=v2, length=obj[3], color=self.axe_color, shaftwidth=self.axe_radius))
+                o.pos = v1
+                o.axis = v2
+                o.length = obj[3]
+            else:   # link
+                v1 = vp.vector(*obj[1])*self.scale
+                v2 = vp.vector(*obj[2])*self.scale
+                o = self._get_object(shape_type, idx, lambda: vp.curve(pos=[v1, v2], color=self.link_color, radius=self.radius["link"]))
+                o.modify(0, pos=v1)
+                o.modify(1, pos=v2)
+        for shape_type, objects in self.objects.items():
+            for o in objects[used[shape_type]:]:
+                o.visible = False
         vp.rate(self.rate)
-        for i in range(len(frame)):
-            if(i in visible_idx):
-                continue
-            c[i].visible = False
 
 if __name__ == "__main__":
     vis = RobotVisualization_vpython(rate=10, scale=0.0005)
@@ -7,40 +7,14 @@ from utils import *
 
 # q -- generalized coordinates (thetas)
 # Input theta vector, get end effector position
+# The frames are the ones of the kinematic chain of the robot (configs.chain, manipulators package):
+# frame 0 is T_base, then one frame per link, the last one includes T_tool
 def FK(q, T_base=None, T_tool=None, return_frames=True):
-    l = configs.get_links_dimensions()
-    T_base_robot = translation_x(0) if T_base is None else T_base
-    T_tool_robot = translation_x(0) if T_tool is None else T_tool
-    
-    # Not zero configuration
-    # frames_transitions = [translation_x(0),
-    #                       rotation_z(q[0]),
-    #                       translation_z(l[0]) @ translation_x(l[1]) @ rotation_y(q[1]),
-    #                       translation_z(l[2]) @ rotation_y(q[2]),
-    #                       translation_z(l[3]) @ translation_x(l[4]) @ rotation_x(q[3]),
-    #                       rotation_y(q[4]),
-    #                       rotation_x(q[5])]
-
-    # Zero configuration TODO: Change
-    frames_transitions =  [ T_base_robot,
-                            rotation_z(q[0]) @ translation_z(l[0]) @ translation_x(-l[1]),
-                            rotation_x(q[1]) @ translation_z(l[2]),
-                            translation_z(q[2]),
-                            rotation_z(q[3]),
-                            rotation_x(q[4]),
-                            rotation_x(q[5]) @ translation_z(l[3]) @ T_tool_robot]
-    
-    T0i = np.eye(4,4)
-    frames = []
-    for i in range(7):
-        T0i = T0i @ frames_transitions[i]
-
-        frames.append(T0i)
-
-    # print(len(frames))
+    frames = configs.chain.forward(q, T_base, T_tool, return_frames=return_frames)[0]
     if(return_frames == True):
-        return frames
-    return frames[-1]
+        return list(frames)
+    return frames
+
 
 if __name__ == "__main__":
     # print(configs.get_links_dimensions())
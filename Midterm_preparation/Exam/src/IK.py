@@ -14,7 +14,8 @@ def q0_solver(x, y, l1, q0_init):
 
 def IK(T, T_base=None, T_tool=None, m=-1, debug=True):
     status = "q1, q2, q3 (Manipulator part):"
-    inv = np.linalg.inv
+    # Closed-form inverse of the poses ([R^T, -R^T p])
+    inv = inverse_homogeneous
     l = configs.get_links_dimensions()
     joint_limits = configs.get_joints_limits()
     q = [0 for i in range(6)]   # generalized coordinates
@@ -80,4 +81,35 @@ def IK(T, T_base=None, T_tool=None, m=-1, debug=True):
 
     
 
-    return q, status
\ No newline at end of file
+    return q, status
+
+# Numerical IK (damped least squares) on the FK and the jacobian of the robot
+# q0: warm start (e.g. the previous configuration), if None it starts from the zero configuration
+# (the analytic solution above is not a reliable initial guess), the targets that do not converge are retried
+# from random configurations inside the joints limits (seed: the restarts are reproducible)
+# return q, success, status
+def IK_numerical(T, q0=None, T_base=None, T_tool=None, max_iterations=100, tol=1e-6, restarts=5, seed=0, debug=False):
+    from FK import FK
+    from Jacobian import Jacobian
+    from NumericalIK import NumericalIK
+    solver = NumericalIK(lambda q: FK(q, T_base=T_base, T_tool=T_tool, return_frames=False),
+                         Jacobian(T_base=T_base, T_tool=T_tool).calc_skew,
+                         joints_limits=configs.get_joints_limits(), max_iterations=max_iterations, tol=tol, restarts=restarts, seed=seed)
+    if(q0 is None):
+        q0 = np.zeros(6)
+    q, success, error, iterations = solver.solve(T, q0)
+    status = f"Numerical IK: {'converged' if success else 'not converged'} after {iterations} iterations (error: {error})"
+    if(debug):
+        print(status)
+    return q, success, status
+
+# Numerical IK for many targets Ts (N,4,4)
+# warm_start: each target starts from the solution of the previous one (for a path)
+def IK_numerical_batch(Ts, q0, T_base=None, T_tool=None, warm_start=True, max_iterations=100, tol=1e-6, restarts=0):
+    from FK import FK
+    from Jacobian import Jacobian
+    from NumericalIK import NumericalIK
+    solver = NumericalIK(lambda q: FK(q, T_base=T_base, T_tool=T_tool, return_frames=False),
+                         Jacobian(T_base=T_base, T_tool=T_tool).calc_skew,
+                         joints_limits=configs.get_joints_limits(), max_iterations=max_iterations, tol=tol, restarts=restarts)
+    return solver.solve_batch(Ts, q0, warm_start=warm_start)
@@ -0,0 +1,36 @@
+# The numerical IK is shared by all the robots: it lives in the manipulators package (pip install -e . from the root of the repository)
+from manipulators.ik import NumericalIK
+import numpy as np
+
+__all__ = ["NumericalIK"]
+
+
+if __name__ == "__main__":
+    from FK import FK
+    from Jacobian import Jacobian
+    from robot import KUKA_KR10_R1100_2_configs as configs
+    from time import time
+    np.set_printoptions(precision=4, suppress=True)
+    limits = np.array(configs.get_joints_limits())
+    solver = NumericalIK(lambda q: FK(q, return_frames=False), Jacobian().calc_skew, joints_limits=limits, restarts=5, seed=0)
+
+    rng = np.random.default_rng(0)
+    N = 200
+    q_true = rng.uniform(limits[:,0], limits[:,1], (N, 6))
+    q_true[:,[0,1,3,4,5]] = rng.uniform(-np.pi, np.pi, (N, 5))
+    Ts = np.array([FK(q, return_frames=False) for q in q_true])
+
+    q, success, error, iterations = solver.solve(Ts[0], np.zeros(6))
+    print(f"Single target: success: {success}, error: {error}, iterations: {iterations}")
+
+    t = time()
+    q, success, error, iterations = solver.solve_batch(Ts, np.zeros(6))
+    print(f"Batch of {N} random targets from zero: {np.mean(success)*100}% converged, mean iterations: {np.mean(iterations)}, time: {time()-t:.3f}s")
+
+    # Path: warm start from the previous solution
+    s = np.linspace(0, 1, N)[:,None]
+    q_path = (1-s)*q_true[0] + s*q_true[1]
+    Ts_path = np.array([FK(qi, return_frames=False) for qi in q_path])
+    t = time()
+    q, success, error, iterations = solver.solve_batch(Ts_path, q_path[0], warm_start=True)
+    print(f"Path with warm start: {np.mean(success)*100}% converged, mean iterations: {np.mean(iterations)}, max joint jump: {np.max(np.abs(np.diff(q, axis=0)))}, time: {time()-t:.3f}s")
@@ -1,4 +1,5 @@
 from utils import *
+from manipulators.chain import KinematicChain
 
 class KUKA_KR10_R1100_2:
     def __init__(self, T_base=None, T_tool=None):
@@ -39,10 +40,14 @@ class KUKA_KR10_R1100_2:
             return T
         return T[-1]    # end_effector
 
-    def inverse_kinematics(self, T, m=-1, plot=True, debug=True):
-        from IK import IK
+    # method: "analytic" or "numerical" (damped least squares, q0: warm start)
+    def inverse_kinematics(self, T, m=-1, plot=True, debug=True, method="analytic", q0=None):
+        from IK import IK, IK_numerical
 
-        q, status = IK(T, T_base=self.T_base, T_tool=self.T_tool, m=m, debug=True)
+        if(method == "numerical"):
+            q, success, status = IK_numerical(T, q0=q0, T_base=self.T_base, T_tool=self.T_tool)
+        else:
+            q, status = IK(T, T_base=self.T_base, T_tool=self.T_tool, m=m, debug=True)
 
         if(plot == True):
             self.plot_robot(T)    # plot the result
@@ -94,9 +99,18 @@ class KUKA_KR10_R1100_2:
             print(f"Result: This configuration is {'a Singular' if singularity_flag == True else 'Not a Singular'}")
         return singularity_flag
 class KUKA_KR10_R1100_2_configs:
+    links_dimensions = [10,5,15,1]
+    # Kinematic chain of the exam robot (z x z z x x, the third joint is prismatic), the FK and the jacobian are computed on it
+    chain = KinematicChain([[("rz", None), ("tz", links_dimensions[0]), ("tx", -links_dimensions[1])],
+                            [("rx", None), ("tz", links_dimensions[2])],
+                            [("tz", None)],
+                            [("rz", None)],
+                            [("rx", None)],
+                            [("rx", None), ("tz", links_dimensions[3])]])
+
     @staticmethod
     def get_links_dimensions():
-        return [10,5,15,1]
+        return KUKA_KR10_R1100_2_configs.links_dimensions
 
     @staticmethod
     def get_joints_limits():
@@ -0,0 +1,108 @@
+# Collision checking (ground and self collisions) with the links modeled as capsules (segment + radius)
+# The segments are the same as the links drawn in plot_robot (positions of the FK frames, the first link is split at the shoulder shift)
+# Everything is vectorized over the configurations (e.g. a whole PTP/LIN trajectory (T,6)):
+#   ground: the lowest point of each capsule (except the base link) has to be above the ground plane
+#   self: the pairs of non-neighbour links, first culled with their bounding spheres (broad-phase),
+#         then the exact segment-segment distance only for the remaining pairs
+import numpy as np
+from FK import FK_batch
+
+# Closest distance between the segments [p1,q1] and [p2,q2] (...,3) -> (...)
+def segments_distance(p1, q1, p2, q2, eps=1e-12):
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.sum(d1*d1, axis=-1)
+    e = np.sum(d2*d2, axis=-1)
+    f = np.sum(d2*r, axis=-1)
+    c = np.sum(d1*r, axis=-1)
+    b = np.sum(d1*d2, axis=-1)
+    a_safe, e_safe = np.maximum(a, eps), np.maximum(e, eps)
+    denom = a*e - b*b
+    # Parallel segments: any s, 0 is taken
+    s = np.where(denom > eps, np.clip((b*f - c*e)/np.maximum(denom, eps), 0, 1), 0)
+    t = (b*s + f)/e_safe
+    s = np.where(t < 0, np.clip(-c/a_safe, 0, 1), np.where(t > 1, np.clip((b - c)/a_safe, 0, 1), s))
+    t = np.clip(t, 0, 1)
+    return np.linalg.norm((p1 + d1*s[...,None]) - (p2 + d2*t[...,None]), axis=-1)
+
+
+class CollisionChecker:
+    # radius: capsules radius (scalar or one for each link), the default is the radius of the links in plot_robot
+    # ground_height: z of the ground plane in the world frame, margin: safety distance added to the radii
+    # skip_neighbours: the links closer than this in the chain are not checked with each other (they always touch at the joints)
+    def __init__(self, robot, radius=35, ground_height=0, margin=0, skip_neighbours=2):
+        self.robot = robot
+        self.ground_height = ground_height
+        self.margin = margin
+        self.num_links = 6
+        self.radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (self.num_links,))
+        self.pairs = np.array([(i, j) for i in range(self.num_links) for j in range(i+skip_neighbours+1, self.num_links)])
+
+    # Capsules segments for the configurations q (N,6) -> (N,6,2,3)
+    # base -> shoulder shift -> shoulder -> elbow -> elbow shift -> wrist -> tool (the frame between the wrist joints has zero length)
+    def capsules(self, q):
+        frames = FK_batch(q, T_base=self.robot.T_base, T_tool=self.robot.T_tool, return_frames=True)
+        p = frames[...,:3,3]
+        # The point of the shoulder before its shift along x
+        shift = frames[:,1] @ np.array([-self.robot.links_dimensions[1], 0, 0, 1])
+        points = np.stack([p[:,0], shift[:,:3], p[:,1], p[:,2], p[:,3], p[:,4], p[:,6]], axis=1)
+        return np.stack([points[:,:-1], points[:,1:]], axis=2)
+
+    # (N,6) bool: the capsules that go below the ground (the base link is fixed on it)
+    def check_ground(self, q, capsules=None):
+        capsules = self.capsules(q) if capsules is None else capsules
+        lowest = np.min(capsules[...,2], axis=-1) - self.radius - self.margin
+        collision = lowest < self.ground_height
+        collision[:,0] = False
+        return collision
+
+    # (N,pairs) bool: self collisions of the pairs self.pairs
+    def check_self(self, q, capsules=None):
+        capsules = self.capsules(q) if capsules is None else capsules
+        i, j = self.pairs[:,0], self.pairs[:,1]
+        limit = self.radius[i] + self.radius[j] + 2*self.margin
+        # Broad-phase: bounding spheres of the capsules
+        center = np.mean(capsules, axis=2)
+        half_length = np.linalg.norm(capsules[:,:,1] - capsules[:,:,0], axis=-1)/2
+        center_distance = np.linalg.norm(center[:,i] - center[:,j], axis=-1)
+        candidates = center_distance < half_length[:,i] + half_length[:,j] + limit
+        collision = np.zeros(candidates.shape, dtype=bool)
+        n, k = np.nonzero(candidates)
+        if(len(n) > 0):
+            distance = segments_distance(capsules[n,i[k],0], capsules[n,i[k],1], capsules[n,j[k],0], capsules[n,j[k],1])
+            collision[n,k] = distance < limit[k]
+        return collision
+
+    # (N,) bool: any collision for each configuration
+    def check(self, q):
+        q = np.asarray(q, dtype=np.float64).reshape(-1, 6)
+        capsules = self.capsules(q)
+        return np.any(self.check_ground(q, capsules), axis=-1) | np.any(self.check_self(q, capsules), axis=-1)
+
+    # Validate a planned trajectory: joints positions (T,6) or a trajectory (T,6,k) with [q, dq, ...] as the planners output
+    # return valid, index of the first colliding sample (-1 if valid)
+    def validate_trajectory(self, traj):
+        traj = np.asarray(traj, dtype=np.float64)
+        q = traj[...,0] if traj.ndim == 3 else traj
+        collision = self.check(q)
+        if(np.any(collision)):
+            return False, int(np.argmax(collision))
+        return True, -1
+
+
+if __name__ == "__main__":
+    from robot import KUKA_KR10_R1100_2
+    from time import time
+    robot = KUKA_KR10_R1100_2()
+    checker = CollisionChecker(robot)
+    deg = np.pi/180
+    q = np.array([[0, 0, 0, 0, 0, 0],               # zero configuration
+                  [0, 90*deg, 0, 0, 0, 0],          # arm down to the ground
+                  [0, 14*deg, 149*deg, 0, -105*deg, 0], # forearm folded to the base column
+                  ])
+    print(f"Collisions: {checker.check(q)}")
+
+    limits = np.array(robot.joint_limits)
+    q = np.random.uniform(limits[:,0], limits[:,1], (100000, 6))
+    t = time()
+    collision = checker.check(q)
+    print(f"{len(q)} random configurations: {np.mean(collision)*100:.1f}% in collision, time: {time()-t:.3f}s")
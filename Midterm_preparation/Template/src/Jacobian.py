@@ -3,7 +3,78 @@
 import numpy as np
 from robot import KUKA_KR10_R1100_2_configs as configs
 from utils import *
-import sympy as sp
+
+# Symbolic jacobian of the FK position w.r.t. q (3x6) for any links dimensions l and tool position t (in the last frame),
+# simplified with common subexpressions elimination and compiled to a numpy function of (q0..q5, l0..l5, t0..t2)
+# T_base only rotates it: J = R_base J_robot
+# The generated code is cached in the process and in __pycache__ (the derivation is done only once),
+# the cache file is keyed on the sympy version and a hash of the derivation source (editing the chain regenerates it)
+_sympolic_jacobian = None
+
+def _derive_sympolic_jacobian():
+    import sympy as sp
+    q = sp.symbols("q0:6", real=True)
+    l = sp.symbols("l0:6", real=True)
+    t = sp.symbols("t0:3", real=True)
+    def sp_translation(x, y, z):
+        return sp.Matrix([[1,0,0,x], [0,1,0,y], [0,0,1,z], [0,0,0,1]])
+    def sp_rotation_x(theta):
+        return sp.Matrix([[1,0,0,0], [0,sp.cos(theta),-sp.sin(theta),0], [0,sp.sin(theta),sp.cos(theta),0], [0,0,0,1]])
+    def sp_rotation_y(theta):
+        return sp.Matrix([[sp.cos(theta),0,sp.sin(theta),0], [0,1,0,0], [-sp.sin(theta),0,sp.cos(theta),0], [0,0,0,1]])
+    def sp_rotation_z(theta):
+        return sp.Matrix([[sp.cos(theta),-sp.sin(theta),0,0], [sp.sin(theta),sp.cos(theta),0,0], [0,0,1,0], [0,0,0,1]])
+    T = sp_rotation_z(q[0]) @ sp_translation(l[1], 0, l[0]) @ sp_rotation_y(q[1]) @ sp_translation(l[2], 0, 0) @ sp_rotation_y(q[2]) @ sp_translation(l[3], 0, 0) @ sp_rotation_x(q[3]) @ sp_translation(l[4], 0, 0) @ sp_rotation_y(q[4]) @ sp_rotation_x(q[5]) @ sp_translation(l[5], 0, 0) @ sp_translation(*t)
+    J = T[:3,3].jacobian(sp.Matrix(q))
+    return sp.lambdify([*q, *l, *t], list(J), modules="numpy", cse=True)
+
+def _get_sympolic_jacobian():
+    global _sympolic_jacobian
+    if(_sympolic_jacobian is not None):
+        return _sympolic_jacobian
+    import os, glob, inspect, hashlib, tempfile
+    from importlib.metadata import version
+    # sympy itself is only imported when the cache has to be generated
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+    derivation_hash = hashlib.sha1(inspect.getsource(_derive_sympolic_jacobian).encode()).hexdigest()[:16]
+    cache_file = os.path.join(cache_dir, f"sympolic_jacobian_{version('sympy')}_{derivation_hash}.py")
+    def load(source):
+        namespace = {"numpy": np}
+        namespace.update(vars(np))
+        exec(source, namespace)
+        return namespace["_lambdifygenerated"]
+    # A cache file that can not be read or executed (e.g. removed or corrupted meanwhile) is a cache miss
+    try:
+        with open(cache_file) as file:
+            _sympolic_jacobian = load(file.read())
+        return _sympolic_jacobian
+    except Exception:
+        pass
+    source = inspect.getsource(_derive_sympolic_jacobian())
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # the files generated from other versions of the derivation are stale (other processes can remove them too)
+        for stale_file in glob.glob(os.path.join(cache_dir, "sympolic_jacobian_*.py")):
+            if(not stale_file.endswith(f"_{derivation_hash}.py")):
+                try:
+                    os.remove(stale_file)
+                except FileNotFoundError:
+                    pass
+        # Written to a temporary file then renamed: the other processes only see a missing or a complete cache file
+        fd, tmp_file = tempfile.mkstemp(prefix="sympolic_jacobian_", suffix=".tmp", dir=cache_dir)
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(source)
+            os.replace(tmp_file, cache_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+    except OSError:
+        # read-only directory: the derivation is only cached in the process
+        pass
+    _sympolic_jacobian = load(source)
+    return _sympolic_jacobian
+
 
 class Jacobian:
     def __init__(self, T_base=None, T_tool=None):
@@ -26,7 +97,7 @@ class Jacobian:
         T = self.T_base_robot @ rotation_z(q[0]) @ translation_z(self.l[0]) @ translation_x(self.l[1]) @ rotation_y(q[1]) @ translation_x(self.l[2]) @ rotation_y(q[2]) @ translation_x(self.l[3]) @ rotation_x(q[3]) @ translation_x(self.l[4]) @ rotation_y(q[4]) @ rotation_x(q[5]) @ translation_x(self.l[5]) @ self.T_tool_robot
 
         To_inv = np.eye(4)
-        To_inv[:3,:3] = np.linalg.inv(T[:3,:3])
+        To_inv[:3,:3] = T[:3,:3].T
 
         dT = self.T_base_robot @ drotation_z(q[0]) @ translation_z(self.l[0]) @ translation_x(self.l[1]) @ rotation_y(q[1]) @ translation_x(self.l[2]) @ rotation_y(q[2]) @ translation_x(self.l[3]) @ rotation_x(q[3]) @ translation_x(self.l[4]) @ rotation_y(q[4]) @ rotation_x(q[5]) @ translation_x(self.l[5]) @ self.T_tool_robot @ To_inv
         J[:,0] = self._get_jacobian_column(dT)
@@ -48,94 +119,27 @@ class Jacobian:
 
         return J
 
+    # Skew theory, computed on the kinematic chain of the robot (configs.chain): [u_i x (O_end - O_i); u_i]
     def calc_skew(self, q):
-        A =  [  self.T_base_robot,
-                rotation_z(q[0]) @ translation_z(self.l[0]) @ translation_x(self.l[1]),
-                rotation_y(q[1]) @ translation_x(self.l[2]),
-                rotation_y(q[2]) @ translation_x(self.l[3]),
-                rotation_x(q[3]) @ translation_x(self.l[4]),
-                rotation_y(q[4]),
-                rotation_x(q[5]) @ translation_x(self.l[5]) @ self.T_tool_robot]
-        # calculate O, U vectors
-        O = []
-        U = []
-        # z y y x y x
-        u_rotation_joints_cols = [2, 1, 1, 0, 1, 0]
-        T0i = np.eye(4)
-        for i in range(6):
-            T0i = T0i @ A[i]
-            O.append(T0i[:3,3])
-            U.append(T0i[:3, u_rotation_joints_cols[i]])
-        T0i = T0i @ A[6]
-        O.append(T0i[:3,3])
-        J = np.zeros((6,6))
-        for i in range(6):
-            J[:3,i] = np.cross((U[i]).reshape((1,3)), (O[6] - O[i]).reshape((1,3))).T.squeeze()
-            J[3:,i] = U[i]
-        return J
+        return configs.chain.jacobian(q, self.T_base_robot, self.T_tool_robot)[0]
 
-    def calc_sympolic(self, q):
-        # Just to know which method works fine from the first three elements of each jacobian -> it appeared that the numerical derivatives has a problem (fixed)
-        q = q.squeeze()
-        # use sympy to calculate symbolically
-        def sp_translation_x(l):
-            return np.array([[1,0,0, l],
-                            [0,1,0, 0],
-                            [0,0,1, 0],
-                            [0,0,0, 1]])
-
-        def sp_translation_y(l):
-            return np.array([[1,0,0, 0],
-                            [0,1,0, l],
-                            [0,0,1, 0],
-                            [0,0,0, 1]])
-
-        def sp_translation_z(l):
-            return np.array([[1,0,0, 0],
-                            [0,1,0, 0],
-                            [0,0,1, l],
-                            [0,0,0, 1]])
-
-        def sp_rotation_x(theta):
-            return np.array([[1,         0,          0, 0],
-                            [0,sp.cos(theta),-sp.sin(theta), 0],
-                            [0,sp.sin(theta), sp.cos(theta), 0],
-                            [0,         0,          0, 1]])
-
-
-        def sp_rotation_y(theta):
-            return np.array([[sp.cos(theta) ,0,sp.sin(theta), 0],
-                            [0          ,1,         0, 0],
-                            [-sp.sin(theta),0,sp.cos(theta), 0],
-                            [0          ,0,         0, 1]])
-
-        def sp_rotation_z(theta):
-            return np.array([[sp.cos(theta),-sp.sin(theta),0, 0],
-                            [sp.sin(theta), sp.cos(theta),0, 0],
-                            [0         ,0          ,1, 0],
-                            [0         ,0          ,0, 1]])
-
-        q0, q1, q2, q3, q4, q5 = sp.symbols("q0 q1 q2 q3 q4 q5", real=True)
-        l0, l1, l2, l3, l4, l5 = sp.symbols("l0 l1 l2 l3 l4 l5", real=True)
-        mat = sp.Matrix
-
-        T = mat(self.T_base_robot) @ mat(sp_rotation_z(q0)) @ mat(sp_translation_z(l0)) @ mat(sp_translation_x(l1)) @ mat(sp_rotation_y(q1)) @ mat(sp_translation_x(l2)) @ mat(sp_rotation_y(q2)) @ mat(sp_translation_x(l3)) @ mat(sp_rotation_x(q3)) @ mat(sp_translation_x(l4)) @ mat(sp_rotation_y(q4)) @ mat(sp_rotation_x(q5)) @ mat(sp_translation_x(l5)) @ mat(self.T_tool_robot)
+    # Batched version of calc_skew: q (N,6) -> J (N,6,6), all the configurations at once
+    def calc_skew_batch(self, q):
+        return configs.chain.jacobian(q, self.T_base_robot, self.T_tool_robot)
 
-        J = np.zeros((6,6))
-        for i in range(3):
-            J[i,0] = T[i,3].diff(q0).subs({q0:q[0], q1:q[1], q2:q[2], q3:q[3], q4:q[4], q5:q[5],
-                                    l0:self.l[0], l1:self.l[1], l2:self.l[2], l3:self.l[3], l4:self.l[4], l5:self.l[5]})
-            J[i,1] = T[i,3].diff(q1).subs({q0:q[0], q1:q[1], q2:q[2], q3:q[3], q4:q[4], q5:q[5],
-                                    l0:self.l[0], l1:self.l[1], l2:self.l[2], l3:self.l[3], l4:self.l[4], l5:self.l[5]})        
-            J[i,2] = T[i,3].diff(q2).subs({q0:q[0], q1:q[1], q2:q[2], q3:q[3], q4:q[4], q5:q[5],
-                                    l0:self.l[0], l1:self.l[1], l2:self.l[2], l3:self.l[3], l4:self.l[4], l5:self.l[5]})
-            J[i,3] = T[i,3].diff(q3).subs({q0:q[0], q1:q[1], q2:q[2], q3:q[3], q4:q[4], q5:q[5],
-                                    l0:self.l[0], l1:self.l[1], l2:self.l[2], l3:self.l[3], l4:self.l[4], l5:self.l[5]})
-            J[i,4] = T[i,3].diff(q4).subs({q0:q[0], q1:q[1], q2:q[2], q3:q[3], q4:q[4], q5:q[5],
-                                    l0:self.l[0], l1:self.l[1], l2:self.l[2], l3:self.l[3], l4:self.l[4], l5:self.l[5]})
-            J[i,5] = T[i,3].diff(q5).subs({q0:q[0], q1:q[1], q2:q[2], q3:q[3], q4:q[4], q5:q[5],
-                                    l0:self.l[0], l1:self.l[1], l2:self.l[2], l3:self.l[3], l4:self.l[4], l5:self.l[5]})
-        # print(J)
+    # Reference implementation: derivatives of the symbolic FK position (only the linear part, the angular rows are zeros)
+    # The symbolic jacobian is derived once and compiled (see _get_sympolic_jacobian), then it is only evaluated
+    def calc_sympolic(self, q):
+        return self.calc_sympolic_batch(np.asarray(q, dtype='float').reshape(1, 6))[0]
+
+    # Batched calc_sympolic: q (N,6) -> (N,6,6)
+    def calc_sympolic_batch(self, q):
+        q = np.asarray(q, dtype='float').reshape(-1, 6)
+        f = _get_sympolic_jacobian()
+        J_robot = f(*q.T, *self.l, *self.T_tool_robot[:3,3])
+        J_robot = np.stack([np.broadcast_to(np.asarray(j, dtype='float'), (len(q),)) for j in J_robot], axis=-1).reshape(len(q), 3, 6)
+        J = np.zeros((len(q), 6, 6))
+        J[:,:3,:] = self.T_base_robot[:3,:3] @ J_robot
         return J
 
         
@@ -156,6 +160,6 @@ if __name__ == "__main__":
 
     print(calc_error(numerical, skew))
 
-    # symbolic = jacobian.calc_sympolic(q)
-    # print("Symbolic")
-    # print(symbolic)
\ No newline at end of file
+    symbolic = jacobian.calc_sympolic(q)
+    print("Symbolic")
+    print(symbolic)
\ No newline at end of file
@@ -0,0 +1,112 @@
+# Precomputed workspace map: the joints space is sampled densely (inside the joints limits) with the batched FK,
+# the reachable end-effector positions are stored in a voxel grid annotated with the manipulability and the singular flag
+# Then a target can be checked before solving the IK with an O(1) lookup:
+#   reachable: at least one sampled configuration reaches the voxel
+#   manipulability: the best (max) manipulability of the configurations reaching the voxel
+#   singular: even the best configuration of the voxel has its minimum singular value below the threshold
+# (It is an approximation of the workspace: the resolution is the voxel size and the voxels near the boundary need enough samples)
+import numpy as np
+from tqdm import tqdm
+
+class WorkspaceMap:
+    def __init__(self, robot=None, voxel_size=50, singular_threshold=1e-2):
+        self.robot = robot
+        self.voxel_size = voxel_size
+        self.singular_threshold = singular_threshold
+
+    # Grid around the base: the reach is the sum of the links lengths
+    def _init_grid(self):
+        reach = np.sum(np.abs(self.robot.links_dimensions))
+        center = self.robot.T_base[:3,3]
+        self.origin = center - reach - self.voxel_size
+        self.shape = tuple(np.ceil((2*reach + 2*self.voxel_size)/self.voxel_size).astype(int).repeat(3))
+        size = int(np.prod(self.shape))
+        self.count = np.zeros(size, dtype=np.int64)
+        self.manipulability = np.zeros(size)
+        self.min_singular_value = np.zeros(size)
+
+    # Flat voxel index of the positions p (N,3), -1 if outside the grid
+    def _index(self, p):
+        idx = np.floor((np.asarray(p, dtype=np.float64).reshape(-1, 3) - self.origin)/self.voxel_size).astype(np.int64)
+        inside = np.all((idx >= 0) & (idx < self.shape), axis=-1)
+        flat = np.ravel_multi_index(tuple(np.clip(idx, 0, np.array(self.shape) - 1).T), self.shape)
+        return np.where(inside, flat, -1)
+
+    # Sample num_samples configurations uniformly inside the joints limits, processed in chunks
+    def build(self, num_samples=500000, chunk_size=50000, seed=0, debug=False):
+        self._init_grid()
+        rng = np.random.default_rng(seed)
+        limits = np.array(self.robot.joint_limits)
+        for i in tqdm(range(0, num_samples, chunk_size), disable=not debug):
+            q = rng.uniform(limits[:,0], limits[:,1], (min(chunk_size, num_samples-i), len(limits)))
+            p = self.robot.forward_kinematics_batch(q)[:,:3,3]
+            manipulability, _, min_singular_value = self.robot.singularity_measures(q)
+            idx = self._index(p)
+            inside = idx >= 0
+            idx = idx[inside]
+            self.count += np.bincount(idx, minlength=len(self.count))
+            np.maximum.at(self.manipulability, idx, manipulability[inside])
+            np.maximum.at(self.min_singular_value, idx, min_singular_value[inside])
+        if(debug):
+            reachable = self.count > 0
+            print(f"Reachable voxels: {np.sum(reachable)}/{len(self.count)} ({np.sum(reachable)*self.voxel_size**3*1e-9:.3f} m^3), singular voxels: {np.sum(reachable & (self.min_singular_value < self.singular_threshold))}")
+        return self
+
+    # Lookup of the targets positions p (N,3) (or frames (N,4,4)) -> reachable (N,), manipulability (N,), singular (N,)
+    def query(self, p):
+        p = np.asarray(p, dtype=np.float64)
+        if(p.shape[-2:] == (4,4)):
+            p = p[...,:3,3]
+        idx = self._index(p)
+        inside = idx >= 0
+        idx = np.where(inside, idx, 0)
+        reachable = inside & (self.count[idx] > 0)
+        manipulability = np.where(reachable, self.manipulability[idx], 0)
+        singular = reachable & (self.min_singular_value[idx] < self.singular_threshold)
+        return reachable, manipulability, singular
+
+    # Targets that can be given to the IK: reachable and not only reached near a singularity
+    def is_feasible(self, p, min_manipulability=0):
+        reachable, manipulability, singular = self.query(p)
+        return reachable & ~singular & (manipulability >= min_manipulability)
+
+    def save(self, path="workspace_map.npz"):
+        np.savez_compressed(path, voxel_size=self.voxel_size, singular_threshold=self.singular_threshold,
+                            origin=self.origin, shape=self.shape, count=self.count,
+                            manipulability=self.manipulability, min_singular_value=self.min_singular_value)
+
+    @staticmethod
+    def load(path="workspace_map.npz", robot=None):
+        data = np.load(path)
+        workspace = WorkspaceMap(robot=robot, voxel_size=float(data["voxel_size"]), singular_threshold=float(data["singular_threshold"]))
+        workspace.origin = data["origin"]
+        workspace.shape = tuple(data["shape"])
+        workspace.count = data["count"]
+        workspace.manipulability = data["manipulability"]
+        workspace.min_singular_value = data["min_singular_value"]
+        return workspace
+
+
+if __name__ == "__main__":
+    import os, sys, tempfile
+    from robot import KUKA_KR10_R1100_2
+    from time import time
+    # python Workspace.py [path of the map] (default: the temporary directory, not the source tree)
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), "workspace_map.npz")
+    robot = KUKA_KR10_R1100_2()
+    t = time()
+    workspace = WorkspaceMap(robot, voxel_size=50).build(num_samples=500000, debug=True)
+    print(f"Build time: {time()-t:.2f}s")
+    workspace.save(path)
+    print(f"Saved to {path}")
+    workspace = WorkspaceMap.load(path, robot=robot)
+
+    # Check random targets: the ones generated from the joints space are reachable, the far ones are not
+    limits = np.array(robot.joint_limits)
+    q = np.random.uniform(limits[:,0], limits[:,1], (1000, 6))
+    p = robot.forward_kinematics_batch(q)[:,:3,3]
+    t = time()
+    reachable, manipulability, singular = workspace.query(p)
+    print(f"Query time for {len(p)} targets: {(time()-t)*1e3:.3f}ms")
+    print(f"Reachable (FK targets): {np.mean(reachable)*100}%, near singular: {np.mean(singular)*100}%")
+    print(f"Reachable (far targets): {np.mean(workspace.query(p*10)[0])*100}%")
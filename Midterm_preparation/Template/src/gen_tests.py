@@ -17,6 +17,17 @@ def generate_random_angles(num):
     random_q  = qss
     return random_q
 
+# Same as generate_random_angles but only the configurations without ground/self collisions (Collision.CollisionChecker)
+def generate_feasible_angles(num):
+    from robot import KUKA_KR10_R1100_2
+    from Collision import CollisionChecker
+    checker = CollisionChecker(KUKA_KR10_R1100_2())
+    qss = np.zeros((0, 6))
+    while(len(qss) < num):
+        qs = np.array(generate_random_angles(num))
+        qss = np.concatenate([qss, qs[~checker.check(qs)]])
+    return qss[:num].tolist()
+
 # special dataset (Hard-coded)
 def generate_angels():
     qss_deg = [ [0 , 0, 0,    0, 0, 0],
@@ -1,5 +1,6 @@
 from utils import *
-import visualization as visual
+from manipulators.description import load_description
+from manipulators.chain import KinematicChain
 
 class KUKA_KR10_R1100_2:
     def __init__(self, T_base=None, T_tool=None):
@@ -25,6 +26,7 @@ class KUKA_KR10_R1100_2:
             print(f"Joint #{i}: {angle} rad ---> {angle*180/np.pi} degrees")
 
     def plot_robot(self, T):
+        import visualization as visual
         vis = visual.RobotVisualization_vpython(rate=10, scale=0.0002, radius={"link":0.007, "joint":0.008, "node":0.01, "axe":0.003})
         frame = []
         links = []
@@ -57,10 +59,12 @@ class KUKA_KR10_R1100_2:
             vis.render_frame(frame, axis=False)
 
     def plot_robot_multi_frames(self, Ts):
+        import visualization as visual
+        # One visualization for all the frames: its scene objects are updated instead of created for each frame
+        vis = visual.RobotVisualization_vpython(rate=1, scale=0.0002, radius={"link":0.007, "joint":0.008, "node":0.01, "axe":0.003})
         while True:
             for idx, T in enumerate(Ts):
                 # print(T)
-                vis = visual.RobotVisualization_vpython(rate=1, scale=0.0002, radius={"link":0.007, "joint":0.008, "node":0.01, "axe":0.003})
                 frame = []
                 links = []
                 joints = []
@@ -106,7 +110,12 @@ class KUKA_KR10_R1100_2:
             return T
         return T[-1]    # end_effector
 
-    def inverse_kinematics(self, T, m=-1, plot=True, debug=True):
+    # Many configurations at once: q (N,6) -> end-effector frames (N,4,4)
+    def forward_kinematics_batch(self, q):
+        from FK import FK_batch
+        return FK_batch(q, T_base=self.T_base, T_tool=self.T_tool)
+
+    def inverse_kinematics(self, T, m=1, plot=True, debug=True):
         from IK import IK
 
         q, status = IK(T, T_base=self.T_base, T_tool=self.T_tool, m=m, debug=True)
@@ -124,6 +133,20 @@ class KUKA_KR10_R1100_2:
 
         return q
 
+    # Many targets at once: T (N,4,4) -> q (N,dof), status (N,) of IK.IKStatus codes
+    def inverse_kinematics_batch(self, T, m=1):
+        from IK import IK_batch
+        return IK_batch(T, T_base=self.T_base, T_tool=self.T_tool, m=m)
+
+    # All the IK branches T (N,4,4) -> q (N,branches,dof), status, valid
+    # With q_current: only the valid branch that is the closest to q_current -> q (N,dof), branch index (N,), found (N,)
+    def inverse_kinematics_all(self, T, q_current=None):
+        from IK import IK_all, closest_branch
+        q, status, valid = IK_all(T, T_base=self.T_base, T_tool=self.T_tool)
+        if(q_current is None):
+            return q, status, valid
+        return closest_branch(q, valid, q_current)
+
 
     def jacobian(self, q, method="skew"):
         from Jacobian import Jacobian
@@ -133,6 +156,36 @@ class KUKA_KR10_R1100_2:
         elif(method == "numerical"):
             return jacobian.calc_numerical(q)
     
+    # Jacobians of many configurations q (N,dof) -> (N,6,dof)
+    def jacobian_batch(self, q):
+        from Jacobian import Jacobian
+        jacobian = Jacobian(T_base=self.T_base, T_tool=self.T_tool)
+        return jacobian.calc_skew_batch(q)
+
+    # Singular values of the jacobians of q (N,dof), one batched SVD (position_only: only the linear velocity part)
+    def _singular_values(self, q, position_only=False):
+        J = self.jacobian_batch(q)
+        if(position_only == True):
+            J = J[:,:3,:]
+        return np.linalg.svd(J, compute_uv=False), J.shape[-2:]
+
+    # Singularity measures of q (N,dof) from the same SVD:
+    # manipulability sqrt(det(J J^T)) = prod(s), condition number s_max/s_min, minimum singular value
+    def singularity_measures(self, q, position_only=False):
+        s, _ = self._singular_values(q, position_only)
+        s_min = s[:,-1]
+        with np.errstate(divide="ignore"):
+            condition_number = s[:,0]/s_min
+        return np.prod(s, axis=-1), condition_number, s_min
+
+    # Singular configurations of q (N,dof) -> (N,) bool
+    # eps=None: rank deficient with the same tolerance as np.linalg.matrix_rank, otherwise minimum singular value <= eps
+    # (e.g. to find the near-singular segments of a trajectory)
+    def check_singularity_batch(self, q, eps=None, position_only=False):
+        s, shape = self._singular_values(q, position_only)
+        tol = s[:,0]*max(shape)*np.finfo(s.dtype).eps if eps is None else eps
+        return s[:,-1] <= tol
+
     def check_singularity(self, q, jacobian_method="numerical", singularity_method="rank", debug=True):
         J = self.jacobian(q, method=jacobian_method)
         singularity_flag = False
@@ -161,17 +214,18 @@ class KUKA_KR10_R1100_2:
             print(f"Result: This configuration is {'a Singular' if singularity_flag == True else 'Not a Singular'}")
         return singularity_flag
 class KUKA_KR10_R1100_2_configs:
+    # Loaded once from manipulators/descriptions/kuka_kr10_r1100_2.json (read-only arrays, limits in rad)
+    description = load_description("kuka_kr10_r1100_2")
+    # Kinematic chain of the description, the FK and the jacobian are computed on it
+    chain = KinematicChain(description.chain_links())
+
     @staticmethod
     def get_links_dimensions():
-        return [400,25,560,25,515,90]
+        return KUKA_KR10_R1100_2_configs.description.links_dimensions
 
     @staticmethod
     def get_joints_limits():
-        deg = [(-170, 170), (-190, 45), (-120, 156), (-185, 185), (-120, 120), (-350, 350)]
-        rad = []
-        for (i,j) in deg:
-            rad.append(((i*np.pi/180), (j*np.pi/180)))
-        return rad
+        return KUKA_KR10_R1100_2_configs.description.joints_limits
 
 if __name__ == "__main__":
     robot = KUKA_KR10_R1100_2()
@@ -1,87 +1,7 @@
 import numpy as np
-from sympy import simplify
-
-def translation_x(l):
-    return np.array([[1,0,0, l],
-                     [0,1,0, 0],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def translation_y(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, l],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def translation_z(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 0],
-                     [0,0,1, l],
-                     [0,0,0, 1]], dtype='float')
-
-def rotation_x(theta):
-    return np.array([[1,         0,          0, 0],
-                     [0,np.cos(theta),-np.sin(theta), 0],
-                     [0,np.sin(theta), np.cos(theta), 0],
-                     [0,         0,          0, 1]], dtype='float')
-
-
-def rotation_y(theta):
-    return np.array([[np.cos(theta) ,0,np.sin(theta), 0],
-                     [0          ,1,         0, 0],
-                     [-np.sin(theta),0,np.cos(theta), 0],
-                     [0          ,0,         0, 1]], dtype='float')
-
-def rotation_z(theta):
-    return np.array([[np.cos(theta),-np.sin(theta),0, 0],
-                     [np.sin(theta), np.cos(theta),0, 0],
-                     [0         ,0          ,1, 0],
-                     [0         ,0          ,0, 1]], dtype='float')
-
-
-def dtranslation_x(l):
-    return np.array([[1,0,0, 1],
-                     [0,1,0, 0],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def dtranslation_y(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 1],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def dtranslation_z(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 0],
-                     [0,0,1, 1],
-                     [0,0,0, 1]], dtype='float')
-
-def drotation_x(theta):
-    return np.array([[0,         0,          0, 0],
-                     [0,-np.sin(theta), -np.cos(theta), 0],
-                     [0, np.cos(theta), -np.sin(theta), 0],
-                     [0,         0,          0, 0]], dtype='float')
-
-
-def drotation_y(theta):
-    return np.array([[-np.sin(theta), 0,  np.cos(theta), 0],
-                     [0          ,0,         0, 0],
-                     [-np.cos(theta), 0, -np.sin(theta), 0],
-                     [0          ,0,         0, 0]], dtype='float')
-
-def drotation_z(theta):
-    return np.array([[-np.sin(theta),-np.cos(theta),0, 0],
-                     [ np.cos(theta), -np.sin(theta),0, 0],
-                     [0         ,0          ,0, 0],
-                     [0         ,0          ,0, 0]], dtype='float')
-
-
-def get_rotation(H):
-    return H[:3,:3]
-
-def get_position(H):
-    return H[:3,3]
+# The numeric homogeneous transformations are shared by all the robots: they live in the manipulators package
+# (pip install -e . from the root of the repository), only the symbolic and the plotting helpers are specific to this template
+from manipulators.transforms import *
 
 def calc_error(H1, H2):
     shape = np.array(H1).shape
@@ -92,6 +12,7 @@ def calc_error(H1, H2):
     return error
 
 def check_diff(eq1, eq2):
+    from sympy import simplify
     return simplify(eq1 - eq2) == 0
 
 def print_matrix(f):
@@ -16,6 +16,18 @@ class RobotVisualization_vpython:
         self.time_color = vp.vector(0,1,0)
         self.time_text_pos = vp.vector(-axe_length, axe_length,0)
         self.scale = scale
+        # Scene objects reused across the frames (see render_frame)
+        self.objects = {"axe": [], "joint": [], "node": [], "link": [], "text_joint": [], "time": []}
+
+    # Retained mode: the objects of each type are created on the first frames that need them and then only updated
+    # (the i-th "link" of the frame updates the i-th link object, ...), the objects that are not used in a frame are hidden
+    def _get_object(self, shape_type, idx, create):
+        objects = self.objects[shape_type]
+        if(idx >= len(objects)):
+            objects.append(create())
+        obj = objects[idx]
+        obj.visible = True
+        return obj
 
     def render_frame(self, frame_sub, axis=True):
         if(axis):
@@ -24,45 +36,48 @@ class RobotVisualization_vpython:
                      ["axe", self.origin, [0,0,1], self.axe_length]] + frame_sub
         else:
             frame = frame_sub
-        c = []
+        used = {shape_type: 0 for shape_type in self.objects.keys()}
         for obj in frame:
             shape_type = obj[0]
-            if(shape_type == "joint"):
-                v = vp.vector(*obj[1])*self.scale
-                color = self.joint_color if len(obj) <= 2 else vp.vector(*obj[2])
-                c.append(vp.sphere(pos=v, radius=self.radius["joint"], color=color))
-                # c.append(vp.box(pos=v, length=self.radius["joint"]*2, height=self.radius["joint"]*2, width=self.radius["joint"]*2, color=color))
-
-            elif(shape_type == "node"):
+            idx = used[shape_type]
+            used[shape_type] += 1
+            if(shape_type == "joint" or shape_type == "node"):
                 v = vp.vector(*obj[1])*self.scale
-                color = self.node_color if len(obj) <= 2 else vp.vector(*obj[2])
-                c.append(vp.sphere(pos=v, radius=self.radius["node"], color=color))
-                # c.append(vp.box(pos=v, length=self.radius["node"]*2, height=self.radius["node"]*2, width=self.radius["node"]*2, color=color))
+                default_color = self.joint_color if shape_type == "joint" else self.node_color
+                color = default_color if len(obj) <= 2 else vp.vector(*obj[2])
+                o = self._get_object(shape_type, idx, lambda: vp.sphere(pos=v, radius=self.radius[shape_type], color=color))
+                o.pos = v
+                o.color = color
             elif(shape_type == "text_joint"):
                 text = str(obj[1])
                 v = vp.vector(*obj[2])*self.scale
-                c.append(vp.text(text=text, pos=v,color=self.text_color, height=0.03))
+                # The text of a 3D text object can not be changed, it is created again only if the text changed
+                if(idx < len(self.objects["text_joint"]) and self.objects["text_joint"][idx].text != text):
+                    self.objects["text_joint"][idx].visible = False
+                    self.objects["text_joint"][idx] = vp.text(text=text, pos=v, color=self.text_color, height=0.03)
+                o = self._get_object(shape_type, idx, lambda: vp.text(text=text, pos=v, color=self.text_color, height=0.03))
+                o.pos = v
             elif(shape_type == "time"):
                 text= "Steps: {:}, Seconds: {:.3f}".format(obj[1], obj[2])
-                c.append(vp.label(text=text, pos=self.time_text_pos, align="right", color=self.time_color))
-                # c.append(vp.text(text=text, pos=self.time_text_pos, align="right", height=self.time_text_height, billboard=True, emissive=True, color=self.time_color))
-            else:   # link, axe
+                o = self._get_object(shape_type, idx, lambda: vp.label(text=text, pos=self.time_text_pos, align="right", color=self.time_color))
+                o.text = text
+            elif(shape_type == "axe"):
                 v1 = vp.vector(*obj[1])*self.scale
                 v2 = vp.vector(*obj[2])*self.scale
-
-                if shape_type == "link":
-                    r = self.radius["link"]   #0.011
-                    _color = self.link_color
-
-                elif shape_type == "axe":
-                    r = self.radius["axe"]
-                    _color = self.axe_color
-                    c.append(vp.arrow(pos=v1,axis=v2, length=obj[3], color=_color, shaftwidth=self.axe_radius))
-                    continue
-                c.append(vp.curve(pos=[v1, v2], color=_color, radius=r))
+                o = self._get_object(shape_type, idx, lambda: vp.arrow(pos=v1, axis=v2, length=obj[3], color=self.axe_color, shaftwidth=self.axe_radius))
+                o.pos = v1
+                o.axis = v2
+                o.length = obj[3]
+            else:   # link
+                v1 = vp.vector(*obj[1])*self.scale
+                v2 = vp.vector(*obj[2])*self.scale
+                o = self._get_object(shape_type, idx, lambda: vp.curve(pos=[v1, v2], color=self.link_color, radius=self.radius["link"]))
+                o.modify(0, pos=v1)
+                o.modify(1, pos=v2)
+        for shape_type, objects in self.objects.items():
+            for o in objects[used[shape_type]:]:
+                o.visible = False
         vp.rate(self.rate)
-        for i in range(len(frame)):
-            c[i].visible = False
 
 if __name__ == "__main__":
     vis = RobotVisualization_vpython(rate=10, scale=0.0005)
@@ -4,47 +4,27 @@
 import numpy as np
 from robot import KUKA_KR10_R1100_2_configs as configs
 from utils import *
+from manipulators.chain import KinematicChain
+
+# The frames of this assignment: the frame of each joint, then the end-effector and the tool frames
+# (the transformations of configs.chain with the constant ones after the joints, the last link only has T_tool)
+_l = configs.get_links_dimensions()
+_frames_chain = KinematicChain([[("rz", None)],
+                                [("tz", _l[0]), ("tx", _l[1]), ("ry", None)],
+                                [("tx", _l[2]), ("ry", None)],
+                                [("tx", _l[3]), ("rx", None)],
+                                [("tx", _l[4]), ("ry", None)],
+                                [("rx", None)],
+                                [("tx", _l[5])],
+                                []])
 
 # q -- generalized coordinates (thetas)
 # Input theta vector, get end effector position
 def FK(q, T_base=None, T_tool=None, return_frames=True):
-    l = configs.get_links_dimensions()
-    T_base_robot = translation_x(0) if T_base is None else T_base
-    T_tool_robot = translation_x(0) if T_tool is None else T_tool
-    
-    # Not zero configuration
-    # frames_transitions = [translation_x(0),
-    #                       rotation_z(q[0]),
-    #                       translation_z(l[0]) @ translation_x(l[1]) @ rotation_y(q[1]),
-    #                       translation_z(l[2]) @ rotation_y(q[2]),
-    #                       translation_z(l[3]) @ translation_x(l[4]) @ rotation_x(q[3]),
-    #                       rotation_y(q[4]),
-    #                       rotation_x(q[5])]
-
-    # Zero configuration
-    frames_transitions = [T_base_robot,
-                          rotation_z(q[0]),
-                          translation_z(l[0]) @ translation_x(l[1]) @ rotation_y(q[1]),
-                          translation_x(l[2]) @ rotation_y(q[2]),
-                          translation_x(l[3]) @ rotation_x(q[3]),
-                          translation_x(l[4]) @ rotation_y(q[4]),
-                          rotation_x(q[5])]
-    
-    frames = [T_base_robot]    # the world frame
-    for i in range(1,7):
-        old_frame = frames[i-1]
-        new_frame = old_frame @ frames_transitions[i]
-        frames.append(new_frame)
-
-    end_effoctor = frames[-1] @ translation_x(l[5])
-    frames.append(end_effoctor)
-    tool = frames[-1] @ T_tool_robot
-    frames.append(tool)
-
-    # print(len(frames))
+    frames = _frames_chain.forward(q, T_base, T_tool, return_frames=return_frames)[0]
     if(return_frames == True):
-        return frames
-    return tool
+        return list(frames)
+    return frames
 
 
 if __name__ == "__main__":
@@ -3,7 +3,6 @@
 import numpy as np
 from robot import KUKA_KR10_R1100_2_configs as configs
 from utils import *
-import sympy as sp
 
 class Jacobian:
     def __init__(self, T_base=None, T_tool=None):
@@ -26,7 +25,7 @@ class Jacobian:
         T = self.T_base_robot @ rotation_z(q[0]) @ translation_z(self.l[0]) @ translation_x(self.l[1]) @ rotation_y(q[1]) @ translation_x(self.l[2]) @ rotation_y(q[2]) @ translation_x(self.l[3]) @ rotation_x(q[3]) @ translation_x(self.l[4]) @ rotation_y(q[4]) @ rotation_x(q[5]) @ translation_x(self.l[5]) @ self.T_tool_robot
 
         To_inv = np.eye(4)
-        To_inv[:3,:3] = np.linalg.inv(T[:3,:3])
+        To_inv[:3,:3] = T[:3,:3].T
 
         dT = self.T_base_robot @ drotation_z(q[0]) @ translation_z(self.l[0]) @ translation_x(self.l[1]) @ rotation_y(q[1]) @ translation_x(self.l[2]) @ rotation_y(q[2]) @ translation_x(self.l[3]) @ rotation_x(q[3]) @ translation_x(self.l[4]) @ rotation_y(q[4]) @ rotation_x(q[5]) @ translation_x(self.l[5]) @ self.T_tool_robot @ To_inv
         J[:,0] = self._get_jacobian_column(dT)
@@ -48,33 +47,12 @@ class Jacobian:
 
         return J
 
+    # Skew theory, computed on the kinematic chain of the robot (configs.chain): [u_i x (O_end - O_i); u_i]
     def calc_skew(self, q):
-        A =  [  self.T_base_robot,
-                rotation_z(q[0]) @ translation_z(self.l[0]) @ translation_x(self.l[1]),
-                rotation_y(q[1]) @ translation_x(self.l[2]),
-                rotation_y(q[2]) @ translation_x(self.l[3]),
-                rotation_x(q[3]) @ translation_x(self.l[4]),
-                rotation_y(q[4]),
-                rotation_x(q[5]) @ translation_x(self.l[5]) @ self.T_tool_robot]
-        # calculate O, U vectors
-        O = []
-        U = []
-        # z y y x y x
-        u_rotation_joints_cols = [2, 1, 1, 0, 1, 0]
-        T0i = np.eye(4)
-        for i in range(6):
-            T0i = T0i @ A[i]
-            O.append(T0i[:3,3])
-            U.append(T0i[:3, u_rotation_joints_cols[i]])
-        T0i = T0i @ A[6]
-        O.append(T0i[:3,3])
-        J = np.zeros((6,6))
-        for i in range(6):
-            J[:3,i] = np.cross((U[i]).reshape((1,3)), (O[6] - O[i]).reshape((1,3))).T.squeeze()
-            J[3:,i] = U[i]
-        return J
+        return configs.chain.jacobian(q, self.T_base_robot, self.T_tool_robot)[0]
 
     def calc_sympolic(self, q):
+        import sympy as sp
         # Just to know which method works fine from the first three elements of each jacobian -> it appeared that the numerical derivatives has a problem (fixed)
         q = q.squeeze()
         # use sympy to calculate symbolically
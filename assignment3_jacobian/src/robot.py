@@ -1,5 +1,6 @@
 from utils import *
-import visualization as visual
+from manipulators.description import load_description
+from manipulators.chain import KinematicChain
 
 class KUKA_KR10_R1100_2:
     def __init__(self, T_base=None, T_tool=None):
@@ -28,6 +29,7 @@ class KUKA_KR10_R1100_2:
             print(f"Joint #{i+1}: {angle} rad ---> {angle*180/np.pi} degrees")
 
     def plot_robot(self, T):
+        import visualization as visual
         vis = visual.RobotVisualization_vpython(rate=10, scale=0.0002, radius={"link":0.007, "joint":0.008, "node":0.01, "axe":0.003})
         frame = []
         links = []
@@ -59,6 +61,7 @@ class KUKA_KR10_R1100_2:
             vis.render_frame(frame, axis=False)
 
     def plot_robot_multi_frames(self, Ts):
+        import visualization as visual
         while True:
             for idx, T in enumerate(Ts):
                 # print(T)
@@ -143,17 +146,18 @@ class KUKA_KR10_R1100_2:
             print(f"Result: This configuration is {'a Singular' if singularity_flag == True else 'Not a Singular'}")
         return singularity_flag
 class KUKA_KR10_R1100_2_configs:
+    # Loaded once from manipulators/descriptions/kuka_kr10_r1100_2.json (read-only arrays, limits in rad)
+    description = load_description("kuka_kr10_r1100_2")
+    # Kinematic chain of the description, the FK and the jacobian are computed on it
+    chain = KinematicChain(description.chain_links())
+
     @staticmethod
     def get_links_dimensions():
-        return [400,25,560,25,515,90]
+        return KUKA_KR10_R1100_2_configs.description.links_dimensions
 
     @staticmethod
     def get_joints_limits():
-        deg = [(-170, 170), (-190, 45), (-120, 156), (-185, 185), (-120, 120), (-350, 350)]
-        rad = []
-        for (i,j) in deg:
-            rad.append(((i*np.pi/180), (j*np.pi/180)))
-        return rad
+        return KUKA_KR10_R1100_2_configs.description.joints_limits
 
 if __name__ == "__main__":
     robot = KUKA_KR10_R1100_2()
@@ -1,6 +1,6 @@
 from utils import *
-import visualization as visual
-from TrajectoryPlanning import TrajectoryPlanning
+from manipulators.description import load_description
+from manipulators.chain import KinematicChain
 
 
 class RRR_robot:
@@ -11,7 +11,12 @@ class RRR_robot:
         self.T_tool = T_tool
         self.visualization_radius = {"link":0.003, "joint":0.004, "node":0.004, "axe":0.003, "trajectory_trail": 0.0009}
         self.visualization_scale = 0.05
-        self.trajectory_planning = TrajectoryPlanning
+
+    # Imported on the first use, the FK/IK only scripts do not load the planners
+    @property
+    def trajectory_planning(self):
+        from TrajectoryPlanning import TrajectoryPlanning
+        return TrajectoryPlanning
     
     def print_frames(self, frames):
         print(f"Note: Frame #{len(frames)-1} -> Tool")
@@ -30,6 +35,7 @@ class RRR_robot:
             print(f"Joint #{i}: {angle} rad ---> {angle*180/np.pi} degrees")
 
     def plot_robot(self, T):
+        import visualization as visual
         vis = visual.RobotVisualization_vpython(rate=10, scale=self.visualization_scale, radius=self.visualization_radius)
         frame = []
         links = []
@@ -62,6 +68,7 @@ class RRR_robot:
             vis.render_frame(frame, axis=False)
 
     def plot_robot_multi_frames(self, Ts, trail=None, rate_factor=1):
+        import visualization as visual
         vis = visual.RobotVisualization_vpython(rate=1*rate_factor, scale=self.visualization_scale, radius=self.visualization_radius)
         while True:
             for idx, T in enumerate(Ts):
@@ -113,7 +120,7 @@ class RRR_robot:
             return T
         return T[-1]    # end_effector
 
-    def inverse_kinematics(self, T, m=-1, plot=True, debug=True, debug_status=False):
+    def inverse_kinematics(self, T, m=1, plot=True, debug=True, debug_status=False):
         from IK import IK
 
         q, status = IK(T, T_base=self.T_base, T_tool=self.T_tool, m=m, debug=True)
@@ -174,17 +181,18 @@ class RRR_robot:
         return singularity_flag
 
 class RRR_robot_configs:
+    # Loaded once from manipulators/descriptions/rrr_robot.json (read-only arrays, limits in rad)
+    description = load_description("rrr_robot")
+    # Kinematic chain of the description, the FK and the jacobian are computed on it
+    chain = KinematicChain(description.chain_links())
+
     @staticmethod
     def get_links_dimensions():
-        return [1,1,1]
+        return RRR_robot_configs.description.links_dimensions
 
     @staticmethod
     def get_joints_limits():
-        deg = [(-350, 350), (-180, 180), (-180, 180)]
-        rad = []
-        for (i,j) in deg:
-            rad.append(((i*np.pi/180), (j*np.pi/180)))
-        return rad
+        return RRR_robot_configs.description.joints_limits
 
 if __name__ == "__main__":
     robot = RRR_robot()
@@ -1,5 +1,7 @@
 import numpy as np
 from utils import *
+# The closed-form model of the 2-link planar arm is shared with the manipulators package
+from manipulators.dynamics import PlanarRRDynamics
 
 
 class EulerLagrange:
@@ -10,82 +12,30 @@ class EulerLagrange:
         self.gravity = 9.81
         self.inertia = [1, 2]
         self.mass = [3, 4]
-        
-    def direct(self, q0, dq0, ut, dt=0.0004, debug=False):
-        a1 = self.inertia[0] + self.mass[0]*(self.d[0]**2) + self.inertia[1] + self.mass[1]*(self.d[1]**2) + self.mass[1]*(self.l[0]**2)
-        a2 = self.mass[1]*self.l[0]*self.d[1]
-        a3 = self.inertia[1] + self.mass[1]*(self.d[1]**2)
-        a4 = self.gravity * (self.mass[0]*self.d[0] + self.mass[1]*self.l[0])
-        a5 = self.gravity * (self.mass[1]*self.d[1])
 
-        qt = [q0]
-        dqt = [dq0]
-        ddqt = [np.array([0,0]).reshape(2,1)]
+    # The package model with the current parameters (M, C, G and the semi-implicit Euler integration)
+    def _model(self):
+        return PlanarRRDynamics(self.l, self.d, self.inertia, self.mass, self.gravity)
         
-        for i in range(1,len(ut)+1):
-            q = qt[i-1].copy()
-            dq = dqt[i-1].copy()
-            ddq = ddqt[i-1].copy()
-            u = ut[i-1].copy()
-            if(debug):
-                print(q[1])
-            M = np.array([[a1+2*a2*np.cos(q[1]), a3+a2*np.cos(q[1])], [a3+a2*np.cos(q[1]), a3]]).astype(np.float64)
-            
-            c = np.array([-a2*np.sin(q[1]*(dq[1]**2+2*dq[0]*dq[1])), a2*np.sin(q[1])*(dq[1]**2)]).reshape(2,1)
-            
-            C = np.array([[-2*a2*np.sin(q[1])*dq[1], -a2*np.sin(q[1])*dq[1]], [a2*np.sin(q[1])*dq[0], 0]]).reshape(2,2)
-            
-            G = np.array([a4*np.cos(q[0]) + a5*np.cos(q[0]+q[1]), a5*np.cos(q[0]+q[1])]).reshape(2,1)
-            # q = q + dq*dt
-            # dq = dq + ddq*dt
-            # ddq = np.linalg.inv(M) @ (u-G-(C@dq).astype(np.float64))    
-
-            # Semi-implicit Euler integration -> https://en.wikipedia.org/wiki/Semi-implicit_Euler_method#:~:text=The%20semi%2Dimplicit%20Euler%20is,integrator%2C%20unlike%20the%20standard%20method.&text=This%20is%20clear%20advantage%20over,standard)%20Euler%20and%20backward%20Euler.
-            # print("C", (C@dq).astype(np.float64))
-            # print("c", c)
-            ddq = np.linalg.inv(M) @ (u-G-(C@dq).astype(np.float64))   
-            dq = dq + ddq*dt
-            q = q + dq*dt
-            if(debug):
-                print(q)
-                print(dq)
-                print(ddq)
-                print("UUUU")
-                print(u)
+    # return qt, dqt, ddqt: lists of (2,1) arrays starting with the initial state
+    def direct(self, q0, dq0, ut, dt=0.0004, debug=False):
+        qt = []
+        dqt = []
+        ddqt = []
+        for q, dq, ddq in self._model().direct_iter(q0, dq0, ut, dt=dt):
+            qt.append(q.reshape(2,1))
+            dqt.append(dq.reshape(2,1))
+            ddqt.append(ddq.reshape(2,1))
             if(debug):
+                print(qt[-1])
+                print(dqt[-1])
+                print(ddqt[-1])
                 print("--------------")
-            # ddqt.append([ddq[1], ddq[0]])
-            # dqt.append([dq[1], dq[0]])
-            # qt.append([q[1], q[0]])
-            ddqt.append(ddq)
-            dqt.append(dq)
-            qt.append(q)
-            
-        
         return qt, dqt, ddqt
     
+    # return ut: list of (2,1) arrays
     def inverse(self, qt, dqt, ddqt):
-        a1 = self.inertia[0] + self.mass[0]*(self.d[0]**2) + self.inertia[1] + self.mass[1]*(self.d[1]**2) + self.mass[1]*(self.l[0]**2)
-        a2 = self.mass[1]*self.l[0]*self.d[1]
-        a3 = self.inertia[1] + self.mass[1]*(self.d[1]**2)
-        a4 = self.gravity * (self.mass[0]*self.d[0] + self.mass[1]*self.l[0])
-        a5 = self.gravity * (self.mass[1]*self.d[1])
-        
-        ut = []
-        for i in range(0,len(qt)):
-            q = qt[i].copy()
-            dq = dqt[i].copy()
-            ddq = ddqt[i].copy()
-            
-            M = np.array([[a1+2*a2*np.cos(q[1]), a3+a2*np.cos(q[1])], [a3+a2*np.cos(q[1]), a3]]).squeeze()
-            
-            c = np.array([-a2*np.sin(q[1]*(dq[1]**2+2*dq[0]*dq[1])), a2*np.sin(q[1])*(dq[1]**2)]).reshape(2,1)
-            C = np.array([[-2*a2*np.sin(q[1])*dq[1], -a2*np.sin(q[1])*dq[1]], [a2*np.sin(q[1])*dq[0], 0]]).reshape(2,2)
-            G = np.array([a4*np.cos(q[0]) + a5*np.cos(q[0]+q[1]), a5*np.cos(q[0]+q[1])]).reshape(2,1)
-            
-            ut.append(M@ddq + (C@dq).astype(np.float64) + G)
-            
-        return ut
+        return list(self._model().inverse(qt, dqt, ddqt).reshape(-1,2,1))
     
     
 if __name__ == "__main__":
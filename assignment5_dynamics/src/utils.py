@@ -1,106 +1,6 @@
 import numpy as np
-from sympy import simplify
-from matplotlib import pyplot as plt
-
-def translation_x(l):
-    return np.array([[1,0,0, l],
-                     [0,1,0, 0],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def translation_y(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, l],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def translation_z(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 0],
-                     [0,0,1, l],
-                     [0,0,0, 1]], dtype='float')
-
-def rotation_x(theta):
-    return np.array([[1,         0,          0, 0],
-                     [0,np.cos(theta),-np.sin(theta), 0],
-                     [0,np.sin(theta), np.cos(theta), 0],
-                     [0,         0,          0, 1]], dtype='float')
-
-
-def rotation_y(theta):
-    return np.array([[np.cos(theta) ,0,np.sin(theta), 0],
-                     [0          ,1,         0, 0],
-                     [-np.sin(theta),0,np.cos(theta), 0],
-                     [0          ,0,         0, 1]], dtype='float')
-
-def rotation_z(theta):
-    return np.array([[np.cos(theta),-np.sin(theta),0, 0],
-                     [np.sin(theta), np.cos(theta),0, 0],
-                     [0         ,0          ,1, 0],
-                     [0         ,0          ,0, 1]], dtype='float')
-
-
-def rotation_x3(theta):
-    return np.array([[1,         0,          0],
-                     [0,np.cos(theta),-np.sin(theta)],
-                     [0,np.sin(theta), np.cos(theta)]], dtype='float')
-
-
-def rotation_y3(theta):
-    return np.array([[np.cos(theta) ,0,np.sin(theta)],
-                     [0          ,1,         0],
-                     [-np.sin(theta),0,np.cos(theta)]], dtype='float')
-
-def rotation_z3(theta):
-    return np.array([[np.cos(theta),-np.sin(theta),0],
-                     [np.sin(theta), np.cos(theta),0],
-                     [0         ,0          ,1]], dtype='float')
-
-
-
-def dtranslation_x(l):
-    return np.array([[1,0,0, 1],
-                     [0,1,0, 0],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def dtranslation_y(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 1],
-                     [0,0,1, 0],
-                     [0,0,0, 1]], dtype='float')
-
-def dtranslation_z(l):
-    return np.array([[1,0,0, 0],
-                     [0,1,0, 0],
-                     [0,0,1, 1],
-                     [0,0,0, 1]], dtype='float')
-
-def drotation_x(theta):
-    return np.array([[0,         0,          0, 0],
-                     [0,-np.sin(theta), -np.cos(theta), 0],
-                     [0, np.cos(theta), -np.sin(theta), 0],
-                     [0,         0,          0, 0]], dtype='float')
-
-
-def drotation_y(theta):
-    return np.array([[-np.sin(theta), 0,  np.cos(theta), 0],
-                     [0          ,0,         0, 0],
-                     [-np.cos(theta), 0, -np.sin(theta), 0],
-                     [0          ,0,         0, 0]], dtype='float')
-
-def drotation_z(theta):
-    return np.array([[-np.sin(theta),-np.cos(theta),0, 0],
-                     [ np.cos(theta), -np.sin(theta),0, 0],
-                     [0         ,0          ,0, 0],
-                     [0         ,0          ,0, 0]], dtype='float')
-
-
-def get_rotation(H):
-    return H[:3,:3]
-
-def get_position(H):
-    return H[:3,3]
+# The homogeneous transformations come from the manipulators package, the helpers below are specific to this assignment
+from manipulators.transforms import *
 
 def calc_error(H1, H2):
     shape = np.array(H1).shape
@@ -111,6 +11,7 @@ def calc_error(H1, H2):
     return error
 
 def check_diff(eq1, eq2):
+    from sympy import simplify
     return simplify(eq1 - eq2) == 0
 
 def print_matrix(f):
@@ -118,13 +19,9 @@ def print_matrix(f):
         print("Rotation:\n", get_rotation(f))
         print("Position:\n", get_position(f)) 
 
-def pos2hom(pos):
-    hom = np.zeros((4,4))
-    hom[:3,3] = pos.T
-    hom[3,3] = 1
-    return hom
 
 def plot_u(u, dt=1/100, title="Control Input", time=None):
+    from matplotlib import pyplot as plt
     
     u = np.array(u).reshape(len(u), 2)
     time = np.linspace(0, dt*len(u), len(u)) if time is None else time
@@ -141,6 +38,7 @@ def plot_u(u, dt=1/100, title="Control Input", time=None):
     plt.show()
 
 def plot_trajectory(traj, dt=1/100, title="Trajectory", time=None):
+    from matplotlib import pyplot as plt
     q, dq, ddq = traj[:]
     
     q = np.array(q).squeeze()
@@ -0,0 +1,166 @@
+# IK for the reducible (calibrated) model of the FANUC R-2000i
+# The calibrated model has no closed form solution, so:
+# 1. Analytic IK of the ideal part of the model (joints offsets and links lengths from pi, the other small parameters are neglected):
+#    rz(q1) tx(a1) ry(q2+o2) tx(a2) ry(q3+o3) tx(a3) tz(d4) rx(q4+o4) ry(q5+o5) rx(q6) -> spherical wrist, all the branches
+# 2. Newton iterations (damped least squares) on the full model get_T_robot_reducible(q, pi) starting from the analytic branches
+# Everything is batched over the targets T (N,4,4)
+import numpy as np
+from robot import FANUC_R_2000i_configs as configs
+from NumericalIK import NumericalIK
+from manipulators import SE3, FANUC_R_2000i as FANUC_R_2000i_model
+
+def _rotation_y(theta):
+    c, s = np.cos(theta), np.sin(theta)
+    z, o = np.zeros_like(theta), np.ones_like(theta)
+    return np.stack([np.stack([c, z, s], -1), np.stack([z, o, z], -1), np.stack([-s, z, c], -1)], -2)
+
+def _rotation_z(theta):
+    c, s = np.cos(theta), np.sin(theta)
+    z, o = np.zeros_like(theta), np.ones_like(theta)
+    return np.stack([np.stack([c, -s, z], -1), np.stack([s, c, z], -1), np.stack([z, z, o], -1)], -2)
+
+# Shift the angles by 2pi to be inside the joints limits if possible (otherwise closest to (-pi, pi])
+def _fit_joints_limits(q):
+    limits = np.array(configs.get_joints_limits())
+    q = np.arctan2(np.sin(q), np.cos(q))
+    for shift in [2*np.pi, -2*np.pi]:
+        q_shifted = q + shift
+        fit = (q < limits[:,0]) | (q > limits[:,1])
+        fit &= (q_shifted >= limits[:,0]) & (q_shifted <= limits[:,1])
+        q = np.where(fit, q_shifted, q)
+    return q
+
+# Links lengths and joints offsets of the ideal part of the model
+def ideal_parameters(pi):
+    d = configs.get_links_dimensions()
+    pi = np.array(pi, dtype=np.float64).reshape(-1)
+    return {"a1": d[1]+pi[0], "a2": pi[4], "a3": d[5]+pi[8], "d4": d[4]+pi[9],
+            "o2": pi[3], "o3": pi[7], "o4": pi[11], "o5": pi[15]}
+
+# Analytic IK of the ideal model for the targets T (N,4,4) (T_base @ T_robot @ T_tool)
+# shoulder, elbow, wrist: +-1 for the branches
+# return q (N,6), reachable (N,)
+def IK_nominal_batch(T, pi=None, T_base=None, T_tool=None, shoulder=1, elbow=1, wrist=1, eps=1e-9):
+    pi = configs.get_nominal_parameters() if pi is None else pi
+    p = ideal_parameters(pi)
+    T = np.asarray(T, dtype=np.float64).reshape(-1, 4, 4)
+    T_base = np.eye(4) if T_base is None else T_base
+    T_tool = np.eye(4) if T_tool is None else T_tool
+    T_robot = SE3.from_matrix(T_base).inverse_compose(SE3.from_matrix(T)) @ SE3.from_matrix(T_tool).inverse()
+    # The wrist center is the origin of the last frame (spherical wrist)
+    x, y, z = T_robot.p[:,0], T_robot.p[:,1], T_robot.p[:,2]
+    q1 = np.arctan2(shoulder*y, shoulder*x)
+    # Arm plane: r = Ry(theta2) [(a2,0) + Ry(theta3) (a3,d4)] where Ry rotates the angle in the (x,z) plane by -theta
+    r_x = np.cos(q1)*x + np.sin(q1)*y - p["a1"]
+    r_z = z
+    L = np.hypot(p["a3"], p["d4"])
+    phi = np.arctan2(p["d4"], p["a3"])
+    cos3 = (r_x**2 + r_z**2 - p["a2"]**2 - L**2)/(2*p["a2"]*L + eps)
+    reachable = np.abs(cos3) <= 1
+    theta3 = phi + elbow*np.arccos(np.clip(cos3, -1, 1))
+    v_x = p["a2"] + np.cos(theta3)*p["a3"] + np.sin(theta3)*p["d4"]
+    v_z = -np.sin(theta3)*p["a3"] + np.cos(theta3)*p["d4"]
+    theta2 = np.arctan2(v_z, v_x) - np.arctan2(r_z, r_x)
+    # Wrist: Rx(theta4) Ry(theta5) Rx(q6) = (Rz(q1) Ry(theta2+theta3))^T R
+    R_w = np.swapaxes(_rotation_z(q1) @ _rotation_y(theta2+theta3), -1, -2) @ T_robot.R
+    sin5 = np.hypot(R_w[:,0,1], R_w[:,0,2])
+    theta5 = wrist*np.arctan2(sin5, R_w[:,0,0])
+    theta4 = np.arctan2(wrist*R_w[:,1,0], -wrist*R_w[:,2,0])
+    q6 = np.arctan2(wrist*R_w[:,0,1], wrist*R_w[:,0,2])
+    # Wrist singularity (theta5 = 0 or pi): only theta4 +- q6 is defined, theta4 = 0 is chosen
+    singular = sin5 < eps
+    R_x = np.swapaxes(_rotation_y(theta5), -1, -2) @ R_w
+    theta4 = np.where(singular, 0, theta4)
+    q6 = np.where(singular, np.arctan2(R_x[:,2,1], R_x[:,1,1]), q6)
+    q = np.stack([q1, theta2-p["o2"], theta3-p["o3"], theta4-p["o4"], theta5-p["o5"], q6], axis=-1)
+    return _fit_joints_limits(q), reachable
+
+# All the 8 branches of the analytic IK: q (N,8,6), reachable (N,8)
+def IK_nominal_all(T, pi=None, T_base=None, T_tool=None):
+    q_all, reachable_all = [], []
+    for shoulder in [1, -1]:
+        for elbow in [1, -1]:
+            for wrist in [1, -1]:
+                q, reachable = IK_nominal_batch(T, pi, T_base, T_tool, shoulder=shoulder, elbow=elbow, wrist=wrist)
+                q_all.append(q)
+                reachable_all.append(reachable)
+    return np.stack(q_all, axis=1), np.stack(reachable_all, axis=1)
+
+# IK of the calibrated model for the targets T (N,4,4)
+# All the analytic branches are refined with Newton iterations on the full model at once (lockstep),
+# the converged solution inside the joints limits that is closest to q_current (or with the smallest error) is selected
+# return q (N,6), success (N,), error (N,) (norm of the pose error [mm, rad])
+# seed_index: SeedIndex of FK samples of the same model, its k nearest configurations are added as initial guesses
+# (analytic_seeds=False: only them, e.g. when the calibrated model is far from the ideal one)
+# Limitation: the analytic seeds come from the ideal model, for a real identified pi (e.g. gen/pi (5).npy) only about half
+# of the targets converge from them. The targets where no seed converged are retried from random configurations
+# (restarts, seed: reproducible), which gives about 65%, a seed_index of the same model (SeedIndex.py) gives about 90%
+def IK_calibrated_batch(robot, T, pi, T_base=None, T_tool=None, q_current=None, max_iterations=20, tol=1e-6, seed_index=None, k=4, analytic_seeds=True, restarts=5, seed=0):
+    T = np.asarray(T, dtype=np.float64).reshape(-1, 4, 4)
+    N = len(T)
+    T_base = np.eye(4) if T_base is None else T_base
+    T_tool = np.eye(4) if T_tool is None else T_tool
+    pi = np.array(pi, dtype=np.float64).reshape(-1)
+    # Same reducible model as robot.get_T_robot_reducible and Jacobian.calc_joint_jacobian, evaluated as a batched chain
+    model = FANUC_R_2000i_model(T_base=T_base, T_tool=T_tool, pi=pi)
+    solver = NumericalIK(lambda q: model.chain.forward(q, model.T_base, model.T_tool, return_frames=False),
+                         lambda q: model.chain.jacobian(q, model.T_base, model.T_tool),
+                         joints_limits=configs.get_joints_limits(), damping=1e-6, max_iterations=max_iterations, tol=tol, batch=True,
+                         restarts=restarts, seed=seed)
+    q_seed = []
+    if(analytic_seeds):
+        q_seed.append(IK_nominal_all(T, pi, T_base, T_tool)[0])
+    if(seed_index is not None):
+        q_seed.append(seed_index.query(T, k=k)[0])
+    q_seed = np.concatenate(q_seed, axis=1)
+    num_branches = q_seed.shape[1]
+    # The restarts are only used below for the targets where all the seeds failed
+    solver.restarts = 0
+    q, success, error, _ = solver.solve_batch(np.repeat(T, num_branches, axis=0), q_seed.reshape(-1, 6))
+    q = q.reshape(N, num_branches, 6)
+    success = success.reshape(N, num_branches)
+    error = error.reshape(N, num_branches)
+    if(q_current is None):
+        cost = error
+    else:
+        cost = np.linalg.norm(q - np.reshape(q_current, (-1, 1, 6)), axis=-1)
+    # Not converged branches are only selected if none converged
+    cost = np.where(success, cost, np.inf)
+    best = np.where(np.any(success, axis=1), np.argmin(cost, axis=1), np.argmin(error, axis=1))
+    idx = np.arange(N)
+    q, success, error = q[idx,best], success[idx,best], error[idx,best]
+    failed = np.flatnonzero(~success)
+    if(restarts > 0 and len(failed) > 0):
+        solver.restarts = restarts
+        q[failed], success[failed], error[failed], _ = solver.solve_batch(T[failed], q[failed])
+    return q, success, error
+
+
+if __name__ == "__main__":
+    from robot import FANUC_R_2000i
+    from time import time
+    np.set_printoptions(precision=4, suppress=True)
+    robot = FANUC_R_2000i()
+    limits = np.array(configs.get_joints_limits())
+    rng = np.random.default_rng(0)
+
+    # Calibrated-like model: nominal with the upper arm and small errors in all the parameters
+    pi = configs.get_nominal_parameters().copy()
+    pi[4] = 560
+    pi += np.where(np.isin(np.arange(18), [0,1,4,8,9,12,13,16]), rng.normal(0, 1, 18), rng.normal(0, 0.01, 18))
+    T_base = np.eye(4)
+    T_base[:3,3] = [100, -50, 400]
+    T_tool = np.eye(4)
+    T_tool[:3,3] = [10, 20, 150]
+
+    N = 100
+    q_true = rng.uniform(limits[:,0], limits[:,1], (N, 6))
+    T = np.array([robot.forward_kinematics(q, pi, T_base, T_tool) for q in q_true])
+
+    q_nominal, _ = IK_nominal_batch(T, pi, T_base, T_tool)
+    error_nominal = [np.linalg.norm(robot.forward_kinematics(q, pi, T_base, T_tool)[:3,3] - Ti[:3,3]) for q, Ti in zip(q_nominal, T)]
+    t = time()
+    q, success, error = robot.inverse_kinematics(T, pi, T_base, T_tool, q_current=q_true)
+    print(f"{N} targets, time: {time()-t:.3f}s")
+    print(f"Position error of the analytic (ideal model) solution: max {np.max(error_nominal):.4f} mm")
+    print(f"Calibrated IK: {np.mean(success)*100}% converged, max pose error: {np.max(error)}, max joints error (mod 2pi): {np.max(np.abs(np.angle(np.exp(1j*(q - q_true)))))}")
@@ -34,13 +34,42 @@ class Jacobian:
         J[5,0] = dT[1,0]
         return J.squeeze()
 
+    # Geometric jacobian w.r.t. the joints (6x6, [linear; angular] in the world frame) of the reducible model with the parameters pi
+    # Same chain as get_T_robot_reducible split at the joints, the columns are calculated from the joints axes (skew theory)
+    def calc_joint_jacobian(self, q, pi, T_base=None, T_tool=None):
+        T_base = self.T_base if T_base is None else T_base
+        T_tool = self.T_tool if T_tool is None else T_tool
+        pi = np.array(pi, dtype=np.float64).reshape(-1)
+        A = [rz(q[0]), tx(self.d[1]+pi[0]) @ ty(pi[1]) @ rx(pi[2]),
+             ry(q[1]+pi[3]), tx(pi[4]) @ rx(pi[5]) @ rz(pi[6]),
+             ry(q[2]+pi[7]), tx(self.d[5]+pi[8]) @ tz(self.d[4]+pi[9]) @ rz(pi[10]),
+             rx(q[3]+pi[11]), ty(pi[12]) @ tz(pi[13]) @ rz(pi[14]),
+             ry(q[4]+pi[15]), tz(pi[16]) @ rz(pi[17]),
+             rx(q[5])]
+        # z y y x y x
+        u_rotation_joints_cols = [2, 1, 1, 0, 1, 0]
+        O = []
+        U = []
+        T0i = T_base
+        for i in range(len(A)):
+            if(i % 2 == 0):
+                O.append(T0i[:3,3])
+                U.append(T0i[:3,u_rotation_joints_cols[i//2]])
+            T0i = T0i @ A[i]
+        O_end = (T0i @ T_tool)[:3,3]
+        J = np.zeros((6,6))
+        for i in range(6):
+            J[:3,i] = np.cross(U[i], O_end - O[i])
+            J[3:,i] = U[i]
+        return J
+
     def calc_identification_jacobian(self, T_base, T_tool, q, pi, pi_0, num_unknown_parameters=18):
         J = np.zeros((6,num_unknown_parameters))
         # Reducible Kinmatic Model: pi_0 is the nomial pi for the unknown parameters
         T = T_base @ self.robot.get_T_robot_reducible(q, pi) @ T_tool
         
         To_inv = np.eye(4)
-        To_inv[:3,:3] = np.linalg.inv(T[:3,:3])
+        To_inv[:3,:3] = T[:3,:3].T
         
         dT = T_base @ rz(q[0]) @ dtx(pi_0[0]) @ ty(pi_0[1]) @ rx(pi_0[2]) @ ry(q[1]) @ ry(pi_0[3]) @ tx(pi_0[4]) @ rx(pi_0[5]) @ rz(pi_0[6]) @ ry(q[2]) @ ry(pi_0[7]) @ tx(pi_0[8]) @ tz(pi_0[9]) @ rz(pi_0[10]) @ rx(q[3]+pi_0[11]) @ ty(pi_0[12]) @ tz(pi_0[13]) @ rz(pi_0[14]) @ ry(q[4]) @ ry(pi_0[15]) @ tz(pi_0[16]) @ rz(pi_0[17]) @ rx(q[5]) @ T_tool @ To_inv
         J[:,0] = self._get_jacobian_column(dT)
@@ -0,0 +1,4 @@
+# The numerical IK is shared by all the robots: it lives in the manipulators package (pip install -e . from the root of the repository)
+from manipulators.ik import NumericalIK
+
+__all__ = ["NumericalIK"]
@@ -0,0 +1,78 @@
+# Spatial index of FK samples to get initial guesses (warm starts) for the numerical IK
+# The joints space is sampled inside the limits, the poses are computed with a batched FK and stored in a KD-tree
+# A pose is represented by [p, s*n, s*o] (position and the first two columns of the rotation scaled by a length s),
+# so the euclidean distance mixes the position and orientation errors
+# Only the samples (q, features) are saved, the tree is rebuilt when loading (fast compared to the FK sampling)
+import numpy as np
+from scipy.spatial import cKDTree
+
+class SeedIndex:
+    # fk_batch(q) -> (N,4,4), orientation_scale: length (same units as the positions) of 1 unit of the rotation columns
+    def __init__(self, fk_batch=None, joints_limits=None, orientation_scale=100):
+        self.fk_batch = fk_batch
+        self.joints_limits = None if joints_limits is None else np.array(joints_limits, dtype=np.float64)
+        self.orientation_scale = orientation_scale
+
+    def _features(self, T):
+        T = np.asarray(T, dtype=np.float64).reshape(-1, 4, 4)
+        return np.concatenate([T[:,:3,3], self.orientation_scale*T[:,:3,0], self.orientation_scale*T[:,:3,1]], axis=-1)
+
+    def build(self, num_samples=100000, chunk_size=20000, seed=0):
+        rng = np.random.default_rng(seed)
+        dof = len(self.joints_limits)
+        self.q = rng.uniform(self.joints_limits[:,0], self.joints_limits[:,1], (num_samples, dof))
+        self.features = np.concatenate([self._features(self.fk_batch(self.q[i:i+chunk_size])) for i in range(0, num_samples, chunk_size)])
+        self.tree = cKDTree(self.features)
+        return self
+
+    # The k nearest stored configurations to the targets T (N,4,4) -> q (N,k,dof), distance (N,k)
+    def query(self, T, k=1):
+        distance, idx = self.tree.query(self._features(T), k=k)
+        distance, idx = distance.reshape(len(idx), k), idx.reshape(len(idx), k)
+        return self.q[idx], distance
+
+    def save(self, path="seed_index.npz"):
+        np.savez_compressed(path, q=self.q.astype(np.float32), features=self.features.astype(np.float32),
+                            orientation_scale=self.orientation_scale)
+
+    @staticmethod
+    def load(path="seed_index.npz", fk_batch=None, joints_limits=None):
+        data = np.load(path)
+        index = SeedIndex(fk_batch=fk_batch, joints_limits=joints_limits, orientation_scale=float(data["orientation_scale"]))
+        index.q = data["q"].astype(np.float64)
+        index.features = data["features"].astype(np.float64)
+        index.tree = cKDTree(index.features)
+        return index
+
+
+if __name__ == "__main__":
+    import os, sys, tempfile
+    from robot import FANUC_R_2000i, FANUC_R_2000i_configs as configs
+    from IK import IK_calibrated_batch
+    from time import time
+    # python SeedIndex.py [path of the index] (default: the temporary directory, not the source tree)
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), "seed_index.npz")
+    robot = FANUC_R_2000i()
+    pi = np.load("gen/pi (5).npy")
+    T_base = np.load("gen/T_base (5).npy")
+    T_tool = np.load("gen/T_tool (5).npy")[0]
+    limits = configs.get_joints_limits()
+    fk_batch = lambda q: T_base @ robot.get_T_robot_reducible_batch(q, pi) @ T_tool
+
+    t = time()
+    index = SeedIndex(fk_batch, limits).build(num_samples=200000)
+    print(f"Build time: {time()-t:.2f}s")
+    index.save(path)
+    print(f"Saved to {path}")
+    index = SeedIndex.load(path, fk_batch, limits)
+
+    N = 50
+    q_true = np.random.default_rng(1).uniform(np.array(limits)[:,0], np.array(limits)[:,1], (N, 6))
+    T = fk_batch(q_true)
+    for seed_index in [None, index]:
+        t = time()
+        q, success, error = IK_calibrated_batch(robot, T, pi, T_base, T_tool, seed_index=seed_index)
+        print(f"{'Analytic seeds' if seed_index is None else 'Analytic + index seeds'}: {np.mean(success)*100}% converged, time: {time()-t:.2f}s")
+    t = time()
+    q, success, error = IK_calibrated_batch(robot, T, pi, T_base, T_tool, seed_index=index, analytic_seeds=False)
+    print(f"Index seeds only: {np.mean(success)*100}% converged, time: {time()-t:.2f}s")
@@ -1,5 +1,4 @@
 from utils import *
-import visualization as visual
 from utils import translation_x as tx
 from utils import translation_y as ty
 from utils import translation_z as tz
@@ -16,19 +15,25 @@ from utils import drotation_x as drx
 from utils import drotation_y as dry
 from utils import drotation_z as drz
 
+# The robot description is shared with the manipulators package (pip install -e . from the root of the repository)
+from manipulators.description import load_description
+
 class FANUC_R_2000i_configs:
-    # TODO: change static methods to class variables
+    # Loaded once from manipulators/descriptions/fanuc_r_2000i.json (read-only arrays, limits in rad)
+    description = load_description("fanuc_r_2000i")
+
     @staticmethod
     def get_links_dimensions():
-        return [400,25,560,25,515,90]
+        return FANUC_R_2000i_configs.description.links_dimensions
 
     @staticmethod
     def get_joints_limits():
-        deg = [(-170, 170), (-190, 45), (-120, 156), (-185, 185), (-120, 120), (-350, 350)]
-        rad = []
-        for (i,j) in deg:
-            rad.append(((i*np.pi/180), (j*np.pi/180)))
-        return rad
+        return FANUC_R_2000i_configs.description.joints_limits
+
+    # Nominal parameters (pi_0) of the reducible model
+    @staticmethod
+    def get_nominal_parameters():
+        return FANUC_R_2000i_configs.description.nominal_parameters
 
 class FANUC_R_2000i:
     def __init__(self, T_base=None, T_tool=None):
@@ -59,6 +64,7 @@ class FANUC_R_2000i:
             print(f"Joint #{i+1}: {angle} rad ---> {angle*180/np.pi} degrees")
 
     def plot_robot(self, T):
+        import visualization as visual
         vis = visual.RobotVisualization_vpython(rate=10, scale=0.0002, radius={"link":0.007, "joint":0.008, "node":0.01, "axe":0.003})
         frame = []
         links = []
@@ -90,6 +96,7 @@ class FANUC_R_2000i:
             vis.render_frame(frame, axis=False)
 
     def plot_robot_multi_frames(self, Ts):
+        import visualization as visual
         while True:
             for idx, T in enumerate(Ts):
                 # print(T)
@@ -125,3 +132,31 @@ class FANUC_R_2000i:
     def get_T_robot_reducible(self, q, pi):
         T_robot = rz(q[0]) @ tx(self.d[1]+pi[0]) @ ty(pi[1]) @ rx(pi[2]) @ ry(q[1]+pi[3]) @ tx(pi[4]) @ rx(pi[5]) @ rz(pi[6]) @ ry(q[2]+pi[7]) @ tx(self.d[5]+pi[8]) @ tz(self.d[4]+pi[9]) @ rz(pi[10]) @ rx(q[3]+pi[11]) @ ty(pi[12]) @ tz(pi[13]) @ rz(pi[14]) @ ry(q[4] + pi[15]) @ tz(pi[16]) @ rz(pi[17]) @ rx(q[5])
         return T_robot
+
+    # Batched get_T_robot_reducible: q (N,6) -> (N,4,4)
+    def get_T_robot_reducible_batch(self, q, pi):
+        q = np.asarray(q, dtype=np.float64).reshape(-1, 6)
+        pi = np.array(pi, dtype=np.float64).reshape(-1)
+        T_robot = rotation_z_batch(q[:,0]) @ tx(self.d[1]+pi[0]) @ ty(pi[1]) @ rx(pi[2]) @ rotation_y_batch(q[:,1]+pi[3]) @ tx(pi[4]) @ rx(pi[5]) @ rz(pi[6]) @ rotation_y_batch(q[:,2]+pi[7]) @ tx(self.d[5]+pi[8]) @ tz(self.d[4]+pi[9]) @ rz(pi[10]) @ rotation_x_batch(q[:,3]+pi[11]) @ ty(pi[12]) @ tz(pi[13]) @ rz(pi[14]) @ rotation_y_batch(q[:,4] + pi[15]) @ tz(pi[16]) @ rz(pi[17]) @ rotation_x_batch(q[:,5])
+        return T_robot
+
+    # Forward kinematics of the reducible model (calibrated if pi, T_base and T_tool are the identified ones)
+    def forward_kinematics(self, q, pi=None, T_base=None, T_tool=None):
+        pi = self.robot_configs.get_nominal_parameters() if pi is None else np.array(pi, dtype=np.float64).reshape(-1)
+        T_base = self.T_base if T_base is None else T_base
+        T_tool = self.T_tool if T_tool is None else T_tool
+        return T_base @ self.get_T_robot_reducible(q, pi) @ T_tool
+
+    # IK of the reducible model for T (4x4) or a batch (N,4,4): nominal analytic solution refined by Newton iterations on the model with pi
+    # q_current: the branch of the analytic solution closest to it is used (e.g. the previous configuration)
+    # seed_index: SeedIndex for more initial guesses
+    def inverse_kinematics(self, T, pi=None, T_base=None, T_tool=None, q_current=None, max_iterations=20, tol=1e-6, seed_index=None):
+        from IK import IK_calibrated_batch
+        pi = self.robot_configs.get_nominal_parameters() if pi is None else pi
+        T_base = self.T_base if T_base is None else T_base
+        T_tool = self.T_tool if T_tool is None else T_tool
+        q, success, error = IK_calibrated_batch(self, np.reshape(T, (-1,4,4)), pi, T_base=T_base, T_tool=T_tool,
+                                                q_current=q_current, max_iterations=max_iterations, tol=tol, seed_index=seed_index)
+        if(np.ndim(T) == 2):
+            return q[0], success[0], error[0]
+        return q, success, error
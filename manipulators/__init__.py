@@ -0,0 +1,13 @@
+# Shared kinematics/dynamics core of the course robots
+# pip install -e .   (from the root of the repository), then e.g.
+#   from manipulators import KUKA_KR10_R1100_2
+#   T = KUKA_KR10_R1100_2().forward_kinematics(q)   # q (6,) or (N,6)
+from manipulators.transforms import *
+from manipulators.se3 import SE3
+from manipulators.description import RobotDescription, load_description
+from manipulators.chain import KinematicChain, elementary_transform
+from manipulators.ik import NumericalIK
+from manipulators.analytic_ik import IKStatus, AnalyticIK, IKStreamer, RRR_robot_IK, KUKA_KR10_R1100_2_IK
+from manipulators.dynamics import PlanarRRDynamics
+from manipulators.robots import Robot, RRR_robot, KUKA_KR10_R1100_2, FANUC_R_2000i, PlanarRR, RPP_robot
+from manipulators.trajectory import TrajectoryPlanning
@@ -0,0 +1,219 @@
+# Analytic (closed-form) IK of the robots with a spherical wrist or a planar arm, vectorized over a batch of targets T (N,4,4)
+# Each robot solves one branch of its solutions (elbow, shoulder, wrist flip), solve_all stacks all of them
+# and closest_branch picks for each target the valid one that is the closest to the current configuration
+# (the numerical IK in manipulators/ik.py is for the robots without a closed form, e.g. the calibrated FANUC)
+import numpy as np
+from enum import IntFlag
+from manipulators.transforms import inverse_homogeneous, translation_x, translation_z
+
+# Status codes of the branches, they can be combined (e.g. UNREACHABLE | WRIST_SINGULARITY)
+class IKStatus(IntFlag):
+    OK = 0
+    SHOULDER_SINGULARITY = 1    # the wrist center on z-axis: q1 = any, q1 = 0 (or the previous q1) is returned
+    WRIST_SINGULARITY = 2       # gimbal-lock: q4+q6 = angle, q6 takes as much as its limits allow (or the split closest to the previous one)
+    UNREACHABLE = 4             # out of the workspace: the closest configuration is returned
+    JOINT_LIMITS = 8            # the solution is outside the joints limits
+
+def wrap_angle(q):
+    return (q + np.pi) % (2*np.pi) - np.pi
+
+# Angles outside the joints limits are replaced by their equivalent +-2pi if it is inside them
+def fit_joints_limits(q, joints_limits):
+    for shift in [2*np.pi, -2*np.pi]:
+        outside = (q < joints_limits[:,0]) | (q > joints_limits[:,1])
+        inside = (q+shift >= joints_limits[:,0]) & (q+shift <= joints_limits[:,1])
+        q = np.where(outside & inside, q+shift, q)
+    return q
+
+
+class AnalyticIK:
+    # Keyword arguments of _branch for each branch of solve_all
+    branches = [{}]
+
+    def __init__(self, links_dimensions, joints_limits):
+        self.links_dimensions = np.array(links_dimensions, dtype=np.float64)
+        self.joints_limits = np.array(joints_limits, dtype=np.float64)
+        self.dof = len(self.joints_limits)
+
+    # Target of the branches (the transformations that do not depend on the joints removed) for a batch T (N,4,4)
+    def _target(self, T, T_base=None, T_tool=None):
+        raise NotImplementedError
+
+    # One branch q (N,dof), status (N,) for all the targets T_o (N,4,4)
+    def _branch(self, T_o, m=1, eps=1e-9, q_previous=None, **branch):
+        raise NotImplementedError
+
+    def _limits_status(self, q, status):
+        q = fit_joints_limits(q, self.joints_limits)
+        status[np.any((q < self.joints_limits[:,0]) | (q > self.joints_limits[:,1]), axis=1)] |= IKStatus.JOINT_LIMITS
+        return q, status
+
+    # IK for a batch of targets T (N,4,4) -> q (N,dof), status (N,) of IKStatus codes
+    # m: 1 or -1 selects the sign of q3 (elbow), the other choices are the ones of the first branch
+    def solve(self, T, T_base=None, T_tool=None, m=1, eps=1e-9):
+        return self._branch(self._target(T, T_base, T_tool), m=m, eps=eps)
+
+    # All the branches for a batch of targets: q (N,branches,dof), status (N,branches) and valid (N,branches):
+    # reachable and inside the joints limits (the branches can be the same at the singularities)
+    # q_previous: (N,dof) or (dof,) previous configuration, the free angles at the singularities are chosen the closest to it
+    def solve_all(self, T, T_base=None, T_tool=None, eps=1e-9, q_previous=None):
+        T_o = self._target(T, T_base, T_tool)
+        branches = [self._branch(T_o, eps=eps, q_previous=q_previous, **branch) for branch in self.branches]
+        q = np.stack([b[0] for b in branches], axis=1)
+        status = np.stack([b[1] for b in branches], axis=1)
+        valid = (status & (IKStatus.UNREACHABLE | IKStatus.JOINT_LIMITS)) == 0
+        return q, status, valid
+
+    # Choose for each target the valid branch that is the closest to the current configuration q_current (dof,) or (N,dof)
+    # Returns q (N,dof), the index of the branch (N,) and found (N,): False if there is no valid branch (q is NaN)
+    # Each angle is taken as its equivalent (+-2k pi) that is the closest to the current one as long as it is inside the joints limits
+    def closest_branch(self, q_all, valid, q_current):
+        q_current = np.asarray(q_current, dtype=np.float64).reshape(-1, 1, q_all.shape[-1])
+        q_shifted = q_all + 2*np.pi*np.round((q_current - q_all)/(2*np.pi))
+        q_all = np.where((q_shifted >= self.joints_limits[:,0]) & (q_shifted <= self.joints_limits[:,1]), q_shifted, q_all)
+        distance = np.linalg.norm(q_all - q_current, axis=-1)
+        distance[~valid] = np.inf
+        index = np.argmin(distance, axis=1)
+        found = np.any(valid, axis=1)
+        q = q_all[np.arange(len(q_all)), index]
+        q[~found] = np.nan
+        return q, index, found
+
+
+# RRR robot (z y y): shoulder (front/back) x elbow (up/down)
+class RRR_robot_IK(AnalyticIK):
+    branches = [{"m": m, "shoulder": shoulder} for shoulder in [1, -1] for m in [1, -1]]
+
+    # inv(translation_z(l[0])) @ inv(T_base) @ T @ inv(T_tool)
+    def _target(self, T, T_base=None, T_tool=None):
+        l = self.links_dimensions
+        T = np.asarray(T, dtype=np.float64).reshape(-1,4,4)
+        T_base = translation_x(0) if T_base is None else T_base
+        T_tool = translation_x(0) if T_tool is None else T_tool
+        return (inverse_homogeneous(translation_z(l[0])) @ inverse_homogeneous(T_base)) @ T @ inverse_homogeneous(T_tool)
+
+    # shoulder: 1 (front) or -1 (back, q1+pi), q1 keeps its previous value at the singularity instead of 0
+    def _branch(self, T_o, m=1, eps=1e-9, q_previous=None, shoulder=1):
+        l = self.links_dimensions
+        x, y, z = T_o[:,0,3], T_o[:,1,3], T_o[:,2,3]
+        x_dash = shoulder*np.sqrt(x**2+y**2)
+        y_dash = -z
+        l1_dash = l[1]
+        l2_dash = l[2]
+        q = np.empty((len(T_o), 3))
+        status = np.zeros(len(T_o), dtype=int)
+
+        # q2, q3: planar 2R arm in the plane of q1
+        cos_q3 = (x_dash**2+y_dash**2-l1_dash**2-l2_dash**2)/(2*l1_dash*l2_dash)
+        status[np.abs(cos_q3) > 1+eps] |= IKStatus.UNREACHABLE
+        q[:,2] = m*np.arccos(np.clip(cos_q3, -1, 1))
+        q[:,1] = np.arctan2(y_dash, x_dash) - np.arctan2(l2_dash*np.sin(q[:,2]), l1_dash+l2_dash*np.cos(q[:,2]))
+        # q1: any on z-axis
+        singularity_condition1 = l[1]*np.cos(q[:,1]) + l[2]*np.cos(q[:,1]+q[:,2])
+        singular = np.abs(singularity_condition1) < eps
+        q1_singular = 0 if q_previous is None else q_previous[...,0]
+        q[:,0] = np.where(singular, q1_singular, np.arctan2(shoulder*y, shoulder*x))
+        status[singular] |= IKStatus.SHOULDER_SINGULARITY
+        return self._limits_status(q, status)
+
+
+# KUKA KR10 R1100-2 (z y y x y x, spherical wrist): shoulder (front/back) x elbow (up/down) x wrist (flip)
+class KUKA_KR10_R1100_2_IK(AnalyticIK):
+    branches = [{"m": m, "shoulder": shoulder, "wrist": wrist} for shoulder in [1, -1] for m in [1, -1] for wrist in [1, -1]]
+
+    # Target of the wrist center: inv(translation_z(l[0])) @ inv(T_base) @ T @ inv(T_tool) @ inv(translation_x(l[5]))
+    def _target(self, T, T_base=None, T_tool=None):
+        l = self.links_dimensions
+        T = np.asarray(T, dtype=np.float64).reshape(-1,4,4)
+        T_base = translation_x(0) if T_base is None else T_base
+        T_tool = translation_x(0) if T_tool is None else T_tool
+        return (inverse_homogeneous(translation_z(l[0])) @ inverse_homogeneous(T_base)) @ T @ (inverse_homogeneous(T_tool) @ translation_x(-l[5]))
+
+    # shoulder: 1 (front) or -1 (back, q1+pi), wrist: 1 or -1 (flip: q4+pi, -q5, q6+pi)
+    def _branch(self, T_o, m=1, eps=1e-9, q_previous=None, shoulder=1, wrist=1):
+        l = self.links_dimensions
+        x, y, z = T_o[:,0,3], T_o[:,1,3], T_o[:,2,3]
+        x_dash = shoulder*np.sqrt(x**2+y**2) - l[1]
+        y_dash = -z
+        l1_dash = l[2]
+        l2_dash = l[3]+l[4]
+        q = np.empty((len(T_o), 6))
+        status = np.zeros(len(T_o), dtype=int)
+
+        # Manipulator part: q1, q2, q3
+        cos_q3 = (x_dash**2+y_dash**2-l1_dash**2-l2_dash**2)/(2*l1_dash*l2_dash)
+        status[np.abs(cos_q3) > 1+eps] |= IKStatus.UNREACHABLE
+        q[:,2] = m*np.arccos(np.clip(cos_q3, -1, 1))
+        q[:,1] = np.arctan2(y_dash, x_dash) - np.arctan2(l2_dash*np.sin(q[:,2]), l1_dash+l2_dash*np.cos(q[:,2]))
+        singularity_condition1 = l[1] + l[2]*np.cos(q[:,1]) + (l[3]+l[4])*np.cos(q[:,1]+q[:,2])
+        singular = np.abs(singularity_condition1) < eps
+        q1_singular = 0 if q_previous is None else q_previous[...,0]
+        q[:,0] = np.where(singular, q1_singular, np.arctan2(shoulder*y, shoulder*x))
+        status[singular] |= IKStatus.SHOULDER_SINGULARITY
+
+        # Wrist part: q4, q5, q6 from R_123^T R_o with R_123 = Rz(q1) Ry(q2+q3)
+        c1, s1 = np.cos(q[:,0]), np.sin(q[:,0])
+        c23, s23 = np.cos(q[:,1]+q[:,2]), np.sin(q[:,1]+q[:,2])
+        R_123 = np.zeros((len(T_o), 3, 3))
+        R_123[:,0,0], R_123[:,0,1], R_123[:,0,2] = c1*c23, -s1, c1*s23
+        R_123[:,1,0], R_123[:,1,1], R_123[:,1,2] = s1*c23, c1, s1*s23
+        R_123[:,2,0], R_123[:,2,2] = -s23, c23
+        orientation = np.swapaxes(R_123, -1, -2) @ T_o[:,:3,:3]
+        n, s, a = orientation[:,:,0], orientation[:,:,1], orientation[:,:,2]
+
+        singular = 1 - np.abs(n[:,0]) < eps
+        # Singularity (q5 = 0 or pi): only q4+q6 (q4-q6 for q5 = pi) is known
+        angle = np.arctan2(s[:,2], s[:,1])
+        sign = np.where(n[:,0] >= 0, 1, -1)
+        if(q_previous is None):
+            # the last joint takes as much as its limits allow
+            q6_singular = np.clip(angle, self.joints_limits[5,0], self.joints_limits[5,1])
+            q4_singular = angle - sign*q6_singular
+        else:
+            # the closest split to the previous q4, q6
+            delta = wrap_angle(angle - (q_previous[...,3] + sign*q_previous[...,5]))
+            q4_singular = q_previous[...,3] + delta/2
+            q6_singular = q_previous[...,5] + sign*delta/2
+        q[:,3] = np.where(singular, q4_singular, np.arctan2(n[:,1], -n[:,2]))
+        q[:,4] = np.arctan2(np.hypot(s[:,0], a[:,0]), n[:,0])
+        q[:,5] = np.where(singular, q6_singular, np.arctan2(s[:,0], a[:,0]))
+        status[singular] |= IKStatus.WRIST_SINGULARITY
+        if(wrist == -1):
+            q[:,3] = wrap_angle(q[:,3] + np.pi)
+            q[:,4] = -q[:,4]
+            q[:,5] = wrap_angle(q[:,5] + np.pi)
+        return self._limits_status(q, status)
+
+
+# Stateful IK for a stream of poses (e.g. a LIN trajectory converted online) without joint jumps
+# For each pose: all the branches are computed with the singular cases parameterized from the previous configuration
+# (instead of the fixed choices of solve), then the valid branch that is the closest to the previous configuration is taken
+# It is O(1) per pose (one solve_all of a single target)
+class IKStreamer:
+    def __init__(self, ik, q0, T_base=None, T_tool=None, eps=1e-9):
+        self.ik = ik
+        self.q = np.array(q0, dtype=np.float64).reshape(-1)
+        self.T_base = T_base
+        self.T_tool = T_tool
+        self.eps = eps
+        self.status = IKStatus.OK
+
+    # Returns q (dof,), status and found: if there is no valid branch the previous configuration is kept
+    def update(self, T):
+        q_all, status, valid = self.ik.solve_all(T, T_base=self.T_base, T_tool=self.T_tool, eps=self.eps, q_previous=self.q)
+        q, index, found = self.ik.closest_branch(q_all, valid, self.q)
+        if(found[0]):
+            self.q = q[0]
+            self.status = IKStatus(int(status[0, index[0]]))
+        else:
+            self.status = IKStatus(int(status[0, 0]))
+        return self.q.copy(), self.status, bool(found[0])
+
+    def stream(self, Ts):
+        for T in Ts:
+            yield self.update(T)
+
+    # Convert a whole sequence of poses (N,4,4) -> q (N,dof), status (N,), found (N,)
+    def convert(self, Ts):
+        qs, statuses, founds = zip(*self.stream(Ts))
+        return np.array(qs), np.array(statuses, dtype=int), np.array(founds)
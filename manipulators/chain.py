@@ -0,0 +1,114 @@
+# Serial kinematic chain described as products of elementary transformations, the same way the FK files are written:
+#   links = [[("rz", None), ("tz", 400), ("tx", 25)],   <- frame 1 = rz(q0) tz(400) tx(25)
+#            [("ry", None), ("tx", 560)], ...]          <- frame 2 = frame 1 @ ry(q1) tx(560)
+# ("rx"|"ry"|"rz", value): rotation, ("tx"|"ty"|"tz", value): translation, value None marks a joint (revolute or prismatic)
+# The constant transformations between the joints are multiplied once when the chain is built,
+# then the FK of a batch of configurations q (N,dof) only applies the joints as in-place column updates of the frames:
+#   T @ rz(q): [c0, c1] <- [c*c0 + s*c1, -s*c0 + c*c1] (2 columns instead of a 4x4 product), T @ tz(q): c3 <- c3 + q*c2
+# and the constants are composed on the rotation and position blocks (as SE3): p <- p + R p_c, R <- R R_c (skipped for translations)
+import numpy as np
+
+_AXIS = {"x": 0, "y": 1, "z": 2}
+# Columns (a, b) of T changed by a rotation about each axis: a <- c*a + s*b, b <- -s*a + c*b
+_ROTATION_COLUMNS = {0: (1, 2), 1: (2, 0), 2: (0, 1)}
+
+# T (N,4,4) <- T @ C in place, C = [R_c, p_c] (R_c None: pure translation)
+def _compose_constant(T, R_c, p_c):
+    T[:,:3,3] += T[:,:3,:3] @ p_c
+    if(R_c is not None):
+        T[:,:3,:3] = T[:,:3,:3] @ R_c
+
+def _constant_step(C):
+    return ("constant", None if np.array_equal(C[:3,:3], np.eye(3)) else C[:3,:3].copy(), C[:3,3].copy())
+
+def elementary_transform(kind, value):
+    c, s = np.cos(value), np.sin(value)
+    T = np.eye(4)
+    axis = _AXIS[kind[1]]
+    if(kind[0] == "t"):
+        T[axis,3] = value
+    else:
+        a, b = _ROTATION_COLUMNS[axis]
+        T[a,a], T[b,a], T[a,b], T[b,b] = c, s, -s, c
+    return T
+
+
+class KinematicChain:
+    def __init__(self, links):
+        self.links = [[(kind, value) for kind, value in link] for link in links]
+        self.joint_types = []
+        self.joint_axes = []
+        # Compiled steps of each link: ("constant", R or None, p) or ("revolute"/"prismatic", axis, joint index)
+        self.steps = []
+        for link in self.links:
+            steps = []
+            constant = None
+            for kind, value in link:
+                if(kind[0] not in "rt" or kind[1] not in _AXIS):
+                    raise ValueError(f"Unknown transformation {kind}")
+                if(value is None):
+                    if(constant is not None):
+                        steps.append(_constant_step(constant))
+                        constant = None
+                    joint_type = "revolute" if kind[0] == "r" else "prismatic"
+                    steps.append((joint_type, _AXIS[kind[1]], len(self.joint_types)))
+                    self.joint_types.append(joint_type)
+                    self.joint_axes.append(_AXIS[kind[1]])
+                else:
+                    T = elementary_transform(kind, value)
+                    constant = T if constant is None else constant @ T
+            if(constant is not None):
+                steps.append(_constant_step(constant))
+            self.steps.append(steps)
+        self.dof = len(self.joint_types)
+        self.num_frames = len(self.links) + 1
+
+    # FK of q (N,dof): frames (N,num_frames,4,4) (frame 0 is T_base, the last one includes T_tool)
+    # joints_frames (N,dof,4,4): the frame at each joint (its axis column and origin are the ones of the joint)
+    def forward(self, q, T_base=None, T_tool=None, return_frames=True, return_joints_frames=False):
+        q = np.asarray(q, dtype=np.float64).reshape(-1, self.dof)
+        N = len(q)
+        T = np.empty((N, 4, 4))
+        T[:] = np.eye(4) if T_base is None else T_base
+        frames = np.empty((N, self.num_frames, 4, 4)) if return_frames else None
+        joints_frames = np.empty((N, self.dof, 4, 4)) if return_joints_frames else None
+        if(return_frames):
+            frames[:,0] = T
+        for i, steps in enumerate(self.steps):
+            for step in steps:
+                if(step[0] == "constant"):
+                    _compose_constant(T, step[1], step[2])
+                    continue
+                axis, j = step[1], step[2]
+                if(return_joints_frames):
+                    joints_frames[:,j] = T
+                if(step[0] == "revolute"):
+                    a, b = _ROTATION_COLUMNS[axis]
+                    c, s = np.cos(q[:,j,None]), np.sin(q[:,j,None])
+                    col_a, col_b = T[:,:,a].copy(), T[:,:,b]
+                    T[:,:,a] = c*col_a + s*col_b
+                    T[:,:,b] = c*col_b - s*col_a
+                else:
+                    T[:,:,3] += q[:,j,None]*T[:,:,axis]
+            if(i == len(self.steps) - 1 and T_tool is not None):
+                T_tool = np.asarray(T_tool, dtype=np.float64)
+                _compose_constant(T, T_tool[:3,:3], T_tool[:3,3])
+            if(return_frames):
+                frames[:,i+1] = T
+        if(return_frames and return_joints_frames):
+            return frames, joints_frames
+        if(return_joints_frames):
+            return T, joints_frames
+        return frames if return_frames else T
+
+    # Geometric jacobian (N,6,dof) [linear; angular] in the base frame, from the joints frames:
+    #   revolute: [z x (p_e - p_j); z], prismatic: [z; 0]
+    def jacobian(self, q, T_base=None, T_tool=None):
+        T, joints_frames = self.forward(q, T_base, T_tool, return_frames=False, return_joints_frames=True)
+        z = np.stack([joints_frames[:,j,:3,axis] for j, axis in enumerate(self.joint_axes)], axis=1)
+        p = joints_frames[:,:,:3,3]
+        revolute = np.array([joint_type == "revolute" for joint_type in self.joint_types])
+        J = np.zeros((len(T), 6, self.dof))
+        J[:,:3] = np.swapaxes(np.where(revolute[:,None], np.cross(z, T[:,None,:3,3] - p), z), -1, -2)
+        J[:,3:] = np.swapaxes(np.where(revolute[:,None], z, 0), -1, -2)
+        return J
@@ -0,0 +1,127 @@
+# Data-driven robot description: a robot is a JSON chain spec (manipulators/descriptions/<name>.json) instead of a configs class
+#   {
+#     "name": "RRR_robot",
+#     "links_dimensions": [1, 1, 1],
+#     "joints_limits_deg": [[-350, 350], [-180, 180], [-180, 180]],       (or "joints_limits" in rad, null: no limits)
+#     "links": [[["rz", null], ["tz", "l0"]],                              <- same format as KinematicChain,
+#               [["ry", null], ["tx", "l1"]], ...],                           "l<i>" ("-l<i>") refers to links_dimensions[i]
+#     "inertial": {"mass": [...], "inertia": [...], "com": [...]},          (optional)
+#     "T_base": 4x4, "T_tool": 4x4                                          (optional)
+#   }
+# An element can have a third entry "pi<k>": the identifiable parameter k of the reducible model is added to its value
+# (or to the joint angle/displacement for a joint), "nominal_parameters" gives pi_0 (it can also refer to "l<i>")
+# The description is loaded once (cached by name) into read-only arrays, FK, IK, jacobian and dynamics all consume it
+import os
+import json
+from types import MappingProxyType
+import numpy as np
+
+DESCRIPTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "descriptions")
+_AXES = {"x": 0, "y": 1, "z": 2}
+
+def _read_only(x, dtype=np.float64):
+    a = np.array(x, dtype=dtype)
+    a.setflags(write=False)
+    return a
+
+
+class RobotDescription:
+    __slots__ = ("name", "links_dimensions", "joints_limits", "links", "joint_types", "joint_axes", "dof",
+                 "nominal_parameters", "inertial", "T_base", "T_tool")
+
+    def __init__(self, spec):
+        init = object.__setattr__
+        init(self, "name", spec["name"])
+        l = _read_only(spec.get("links_dimensions", []))
+        init(self, "links_dimensions", l)
+
+        def value(v):
+            if(isinstance(v, str)):
+                sign = -1.0 if v.startswith("-") else 1.0
+                ref = v.lstrip("-")
+                if(ref[:1] != "l" or not ref[1:].isdigit()):
+                    raise ValueError(f"{self.name}: unknown reference {v}")
+                return sign*float(l[int(ref[1:])])
+            return float(v)
+
+        links = []
+        joint_types = []
+        joint_axes = []
+        for link in spec["links"]:
+            elements = []
+            for element in link:
+                kind, v = element[0], element[1]
+                if(len(kind) != 2 or kind[0] not in "rt" or kind[1] not in _AXES):
+                    raise ValueError(f"{self.name}: unknown transformation {kind}")
+                parameter = None
+                if(len(element) > 2):
+                    if(not str(element[2]).startswith("pi")):
+                        raise ValueError(f"{self.name}: unknown parameter {element[2]}")
+                    parameter = int(element[2][2:])
+                if(v is None):
+                    joint_types.append("revolute" if kind[0] == "r" else "prismatic")
+                    joint_axes.append(_AXES[kind[1]])
+                    elements.append((kind, None, parameter))
+                else:
+                    elements.append((kind, value(v), parameter))
+            links.append(tuple(elements))
+        init(self, "links", tuple(links))
+        init(self, "joint_types", tuple(joint_types))
+        init(self, "joint_axes", _read_only(joint_axes, dtype=int))
+        init(self, "dof", len(joint_types))
+
+        if("joints_limits_deg" in spec):
+            init(self, "joints_limits", _read_only(np.array(spec["joints_limits_deg"], dtype=np.float64)*np.pi/180))
+        elif(spec.get("joints_limits") is not None):
+            init(self, "joints_limits", _read_only(spec["joints_limits"]))
+        else:
+            init(self, "joints_limits", None)
+        if(self.joints_limits is not None and self.joints_limits.shape != (self.dof, 2)):
+            raise ValueError(f"{self.name}: joints limits {self.joints_limits.shape} for {self.dof} joints")
+
+        nominal = spec.get("nominal_parameters")
+        init(self, "nominal_parameters", None if nominal is None else _read_only([value(v) for v in nominal]))
+        inertial = {key: _read_only(v) for key, v in spec.get("inertial", {}).items()}
+        init(self, "inertial", MappingProxyType(inertial))
+        init(self, "T_base", _read_only(spec.get("T_base", np.eye(4))))
+        init(self, "T_tool", _read_only(spec.get("T_tool", np.eye(4))))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"RobotDescription is immutable ({name})")
+
+    def __repr__(self):
+        return f"RobotDescription({self.name}, dof={self.dof})"
+
+    # Links in the KinematicChain format, with the parameters pi (default: nominal) added to their elements
+    # (a joint with a parameter becomes a constant rotation/translation about the same axis followed by the joint)
+    def chain_links(self, pi=None):
+        if(pi is None):
+            pi = self.nominal_parameters
+        links = []
+        for link in self.links:
+            elements = []
+            for kind, v, parameter in link:
+                offset = 0.0 if (parameter is None or pi is None) else float(pi[parameter])
+                if(v is None):
+                    if(offset != 0):
+                        elements.append((kind, offset))
+                    elements.append((kind, None))
+                else:
+                    elements.append((kind, v + offset))
+            links.append(elements)
+        return links
+
+    @staticmethod
+    def from_json(path):
+        with open(path) as f:
+            return RobotDescription(json.load(f))
+
+
+_cache = {}
+
+# Description of a robot by name (file in manipulators/descriptions) or by path, loaded only once
+def load_description(name):
+    if(name not in _cache):
+        path = name if name.endswith(".json") else os.path.join(DESCRIPTIONS_DIR, f"{name}.json")
+        _cache[name] = RobotDescription.from_json(path)
+    return _cache[name]
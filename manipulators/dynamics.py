@@ -0,0 +1,85 @@
+# Closed-form dynamics of the 2-link planar arm (the same model as EulerLagrange in the dynamics files)
+#   M(q) ddq + C(q, dq) dq + G(q) = u
+# The terms are computed for a batch of states q, dq (N,2) at once
+import numpy as np
+
+class PlanarRRDynamics:
+    # l: links lengths, d: distances of the centers of mass from the joints
+    def __init__(self, l=(0.8, 0.8), d=(0, 0.4), inertia=(1, 2), mass=(3, 4), gravity=9.81):
+        self.l = list(l)
+        self.d = list(d)
+        self.inertia = list(inertia)
+        self.mass = list(mass)
+        self.gravity = gravity
+        self.a1 = self.inertia[0] + self.mass[0]*(self.d[0]**2) + self.inertia[1] + self.mass[1]*(self.d[1]**2) + self.mass[1]*(self.l[0]**2)
+        self.a2 = self.mass[1]*self.l[0]*self.d[1]
+        self.a3 = self.inertia[1] + self.mass[1]*(self.d[1]**2)
+        self.a4 = self.gravity * (self.mass[0]*self.d[0] + self.mass[1]*self.l[0])
+        self.a5 = self.gravity * (self.mass[1]*self.d[1])
+
+    # Inertial parameters from a RobotDescription (links_dimensions and inertial: mass, inertia, com, gravity)
+    @staticmethod
+    def from_description(description):
+        inertial = description.inertial
+        return PlanarRRDynamics(description.links_dimensions, inertial["com"], inertial["inertia"], inertial["mass"], float(inertial.get("gravity", 9.81)))
+
+    # q (N,2) -> (N,2,2)
+    def inertia_matrix(self, q):
+        q = np.asarray(q, dtype=np.float64).reshape(-1, 2)
+        c2 = np.cos(q[:,1])
+        M = np.empty((len(q), 2, 2))
+        M[:,0,0] = self.a1 + 2*self.a2*c2
+        M[:,0,1] = M[:,1,0] = self.a3 + self.a2*c2
+        M[:,1,1] = self.a3
+        return M
+
+    # q, dq (N,2) -> (N,2,2)
+    def coriolis_matrix(self, q, dq):
+        q = np.asarray(q, dtype=np.float64).reshape(-1, 2)
+        dq = np.asarray(dq, dtype=np.float64).reshape(-1, 2)
+        s2 = self.a2*np.sin(q[:,1])
+        C = np.zeros((len(q), 2, 2))
+        C[:,0,0] = -2*s2*dq[:,1]
+        C[:,0,1] = -s2*dq[:,1]
+        C[:,1,0] = s2*dq[:,0]
+        return C
+
+    # q (N,2) -> (N,2)
+    def gravity_vector(self, q):
+        q = np.asarray(q, dtype=np.float64).reshape(-1, 2)
+        c12 = np.cos(q[:,0] + q[:,1])
+        return np.stack([self.a4*np.cos(q[:,0]) + self.a5*c12, self.a5*c12], axis=-1)
+
+    # ddq = M^-1 (u - G - C dq) for a batch of states (the 2x2 inverse is written in closed form)
+    def acceleration(self, q, dq, u):
+        M = self.inertia_matrix(q)
+        dq = np.asarray(dq, dtype=np.float64).reshape(-1, 2)
+        b = np.asarray(u, dtype=np.float64).reshape(-1, 2) - self.gravity_vector(q) - np.einsum("nij,nj->ni", self.coriolis_matrix(q, dq), dq)
+        det = M[:,0,0]*M[:,1,1] - M[:,0,1]*M[:,1,0]
+        return np.stack([M[:,1,1]*b[:,0] - M[:,0,1]*b[:,1], M[:,0,0]*b[:,1] - M[:,1,0]*b[:,0]], axis=-1)/det[:,None]
+
+    # Semi-implicit Euler integration, yields the states (q, dq, ddq) (N,2) starting with the initial state
+    # q0, dq0 (2,) or (N,2) to simulate N arms at once, ut: iterable of controls (2,) or (N,2)
+    def direct_iter(self, q0, dq0, ut, dt=0.0004):
+        q = np.asarray(q0, dtype=np.float64).reshape(-1, 2)
+        dq = np.asarray(dq0, dtype=np.float64).reshape(-1, 2)
+        yield q, dq, np.zeros(q.shape)
+        for u in ut:
+            ddq = self.acceleration(q, dq, u)
+            dq = dq + ddq*dt
+            q = q + dq*dt
+            yield q, dq, ddq
+
+    # return qt, dqt, ddqt (T+1,N,2)
+    def direct(self, q0, dq0, ut, dt=0.0004):
+        states = list(self.direct_iter(q0, dq0, ut, dt=dt))
+        return tuple(np.array([state[i] for state in states]) for i in range(3))
+
+    # u = M ddq + C dq + G for the whole trajectory at once, qt, dqt, ddqt (T,2) -> (T,2)
+    def inverse(self, qt, dqt, ddqt):
+        qt = np.asarray(qt, dtype=np.float64).reshape(-1, 2)
+        dqt = np.asarray(dqt, dtype=np.float64).reshape(-1, 2)
+        ddqt = np.asarray(ddqt, dtype=np.float64).reshape(-1, 2)
+        return (np.einsum("nij,nj->ni", self.inertia_matrix(qt), ddqt)
+                + np.einsum("nij,nj->ni", self.coriolis_matrix(qt, dqt), dqt)
+                + self.gravity_vector(qt))
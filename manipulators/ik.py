@@ -0,0 +1,125 @@
+# Numerical IK: damped least squares (Levenberg-Marquardt) on the pose error
+# It only needs the forward kinematics and the geometric jacobian ([linear; angular] in the base frame),
+# so it can be used for any robot (non-analytic kinematics, calibrated/non-ideal parameters, ...)
+# dq = J^T (J J^T + lambda^2 I)^-1 e
+import numpy as np
+from manipulators.transforms import pose_error
+
+class NumericalIK:
+    # fk(q) -> 4x4, jacobian(q) -> 6xdof, or with batch=True: fk(q (N,dof)) -> (N,4,4), jacobian(q (N,dof)) -> (N,6,dof)
+    # joints_limits: list of (min, max), the iterations are clamped inside them
+    # damping: lambda, adaptive: Levenberg-Marquardt update of lambda (decreased when the error decreases, otherwise the step is rejected and lambda increased)
+    # weights: (6,) weights of the position and orientation errors (to scale between the length units and radians)
+    # min_damping: floor of lambda relative to the norm of J (J J^T is singular when joints axes are aligned, e.g. two parallel wrist axes,
+    # so lambda^2 must stay significant against the entries of J J^T, which are in length units^2)
+    # restarts: number of retries from random configurations (inside the joints limits) for the targets that did not converge (local minimum)
+    def __init__(self, fk, jacobian, joints_limits=None, damping=1e-2, adaptive=True, max_iterations=100, tol=1e-6, weights=None, restarts=0, seed=None, batch=False, min_damping=1e-6):
+        self.fk = fk
+        self.jacobian = jacobian
+        self.joints_limits = None if joints_limits is None else np.array(joints_limits, dtype=np.float64)
+        self.damping = damping
+        self.adaptive = adaptive
+        self.max_iterations = max_iterations
+        self.tol = tol
+        self.weights = np.ones(6) if weights is None else np.array(weights, dtype=np.float64)
+        self.max_damping = 1e6
+        self.min_damping = min_damping
+        self.restarts = restarts
+        self.rng = np.random.default_rng(seed)
+        self.batch = batch
+
+    def clamp(self, q):
+        if(self.joints_limits is None):
+            return q
+        return np.clip(q, self.joints_limits[:,0], self.joints_limits[:,1])
+
+    def _fk(self, q):
+        if(self.batch):
+            return np.asarray(self.fk(q), dtype=np.float64).reshape(len(q), 4, 4)
+        return np.array([self.fk(qi) for qi in q], dtype=np.float64).reshape(len(q), 4, 4)
+
+    def _jacobian(self, q):
+        if(self.batch):
+            return np.asarray(self.jacobian(q), dtype=np.float64).reshape(len(q), 6, -1)
+        return np.array([self.jacobian(qi) for qi in q], dtype=np.float64).reshape(len(q), 6, -1)
+
+    def _error(self, q, T_d):
+        e = self.weights*pose_error(self._fk(q), T_d)
+        return e, np.linalg.norm(e, axis=-1)
+
+    # Solve for one target T (4x4) starting from q0 (warm start)
+    # return q, success, error norm, number of iterations
+    def solve(self, T, q0, max_iterations=None, tol=None):
+        q, success, error, iterations = self.solve_batch(np.asarray(T)[None], np.asarray(q0)[None], max_iterations=max_iterations, tol=tol)
+        return q[0], bool(success[0]), error[0], int(iterations[0])
+
+    # Solve for many targets Ts (N,4,4) at once, q0 (dof,) or (N,dof)
+    # The iterations run in lockstep over the targets that did not converge yet (the damped systems are solved as a batch)
+    # warm_start: solve the targets one after the other, each one starting from the solution of the previous target
+    # (for a path, the solution stays on the same branch and needs only few iterations)
+    def solve_batch(self, Ts, q0, warm_start=False, max_iterations=None, tol=None):
+        max_iterations = self.max_iterations if max_iterations is None else max_iterations
+        tol = self.tol if tol is None else tol
+        Ts = np.asarray(Ts, dtype=np.float64).reshape(-1, 4, 4)
+        N = len(Ts)
+        q0 = np.asarray(q0, dtype=np.float64)
+        dof = q0.shape[-1]
+        if(warm_start):
+            q = np.zeros((N, dof))
+            success = np.zeros(N, dtype=bool)
+            error = np.zeros(N)
+            iterations = np.zeros(N, dtype=int)
+            q_previous = q0.reshape(-1, dof)[0]
+            for i in range(N):
+                q[i], success[i], error[i], iterations[i] = self.solve(Ts[i], q_previous, max_iterations=max_iterations, tol=tol)
+                q_previous = q[i]
+            return q, success, error, iterations
+
+        q = self.clamp(np.broadcast_to(q0, (N, dof)).copy())
+        q, cost, iterations = self._solve_lockstep(Ts, q, max_iterations, tol)
+        for r in range(self.restarts):
+            failed = np.flatnonzero(cost > tol)
+            if(len(failed) == 0):
+                break
+            limits = np.array([(-np.pi, np.pi)]*dof) if self.joints_limits is None else self.joints_limits
+            limits = np.where(np.isfinite(limits), limits, np.array([-np.pi, np.pi]))
+            q_random = self.rng.uniform(limits[:,0], limits[:,1], (len(failed), dof))
+            q_restart, cost_restart, iterations_restart = self._solve_lockstep(Ts[failed], q_random, max_iterations, tol)
+            iterations[failed] += iterations_restart
+            better = cost_restart < cost[failed]
+            q[failed[better]] = q_restart[better]
+            cost[failed[better]] = cost_restart[better]
+        return q, cost <= tol, cost, iterations
+
+    def _solve_lockstep(self, Ts, q, max_iterations, tol):
+        N, dof = q.shape
+        e, cost = self._error(q, Ts)
+        damping = np.full(N, self.damping, dtype=np.float64)
+        iterations = np.zeros(N, dtype=int)
+        I = np.eye(6)
+        for it in range(max_iterations):
+            active = np.flatnonzero((cost > tol) & (damping < self.max_damping))
+            if(len(active) == 0):
+                break
+            J = self.weights[:,None]*self._jacobian(q[active])
+            JT = np.swapaxes(J, -1, -2)
+            damping[active] = np.maximum(damping[active], self.min_damping*np.linalg.norm(J, axis=(-2,-1)))
+            A = J @ JT + (damping[active]**2)[:,None,None]*I
+            try:
+                x = np.linalg.solve(A, e[active][...,None])
+            except np.linalg.LinAlgError:
+                x = np.linalg.pinv(A) @ e[active][...,None]
+            dq = (JT @ x)[...,0]
+            q_new = self.clamp(q[active] + dq)
+            e_new, cost_new = self._error(q_new, Ts[active])
+            iterations[active] += 1
+            if(self.adaptive):
+                accept = cost_new < cost[active]
+                damping[active] = np.where(accept, damping[active]/2, damping[active]*4)
+            else:
+                accept = np.ones(len(active), dtype=bool)
+            accepted = active[accept]
+            q[accepted] = q_new[accept]
+            e[accepted] = e_new[accept]
+            cost[accepted] = cost_new[accept]
+        return q, cost, iterations
@@ -0,0 +1,36 @@
+# Plotting helpers of the trajectories and the control inputs (matplotlib is only imported when a figure is shown)
+import numpy as np
+
+# (T,n) view of a signal given as an array (T,n)/(T,n,1) or a list of (n,1) arrays (no copy for arrays)
+def as_series(x):
+    x = np.asarray(x)
+    return x.reshape(len(x), -1)
+
+# Min/max envelope decimation for plotting: y (T,n) -> time (2*max_points/2,n), y (2*max_points/2,n)
+# The samples are split in buckets and each bucket is drawn with its min and max (in their time order),
+# so the peaks are kept while matplotlib only gets max_points points per line whatever the trajectory length
+# (at least one bucket: max_points < 2 still draws the min and the max)
+def decimate_envelope(time, y, max_points=2000):
+    y = as_series(y)
+    time = np.asarray(time)
+    T, n = y.shape
+    if(max_points is None or T <= max_points):
+        return np.broadcast_to(time[:,None], (T, n)), y
+    buckets = max(1, max_points//2)
+    size = -(-T//buckets)
+    pad = buckets*size - T
+    y_b = np.concatenate([y, np.repeat(y[-1:], pad, axis=0)]).reshape(buckets, size, n) if pad > 0 else y.reshape(buckets, size, n)
+    start = (np.arange(buckets)*size)[:,None]
+    i_min = np.minimum(start + np.argmin(y_b, axis=1), T-1)
+    i_max = np.minimum(start + np.argmax(y_b, axis=1), T-1)
+    idx = np.stack([np.minimum(i_min, i_max), np.maximum(i_min, i_max)], axis=1).reshape(2*buckets, n)
+    return time[idx], np.take_along_axis(y, idx, axis=0)
+
+# Show the figure (block=False: return immediately) or save it to a file and close it (e.g. without display)
+def show_plot(fig, save=None, block=True):
+    from matplotlib import pyplot as plt
+    if(save is not None):
+        fig.savefig(save)
+        plt.close(fig)
+    else:
+        plt.show(block=block)
@@ -0,0 +1,101 @@
+# Robot models on top of the shared kinematic chain
+# Each robot is data: its description (manipulators/descriptions/*.json) is loaded once into read-only arrays,
+# the FK, jacobian and numerical IK work for a single configuration (dof,) or a batch (N,dof)
+import numpy as np
+from manipulators.description import RobotDescription, load_description
+from manipulators.chain import KinematicChain
+from manipulators.ik import NumericalIK
+from manipulators.analytic_ik import RRR_robot_IK, KUKA_KR10_R1100_2_IK
+from manipulators.dynamics import PlanarRRDynamics
+
+class Robot:
+    description_name = None
+    # Closed-form IK of the robot (manipulators/analytic_ik.py), None: only the numerical IK
+    analytic_ik_class = None
+
+    # pi: parameters of the reducible model (default: nominal)
+    # description: RobotDescription, or the name/path of its JSON file (default: description_name of the class)
+    def __init__(self, T_base=None, T_tool=None, pi=None, description=None):
+        description = self.description_name if description is None else description
+        self.description = description if isinstance(description, RobotDescription) else load_description(description)
+        self.name = self.description.name
+        self.links_dimensions = self.description.links_dimensions
+        self.joint_limits = self.description.joints_limits
+        self.chain = KinematicChain(self.description.chain_links(pi))
+        self.dof = self.chain.dof
+        self.T_base = self.description.T_base if T_base is None else np.asarray(T_base, dtype=np.float64)
+        self.T_tool = self.description.T_tool if T_tool is None else np.asarray(T_tool, dtype=np.float64)
+        self._ik = None
+        self.analytic_ik = None if self.analytic_ik_class is None else self.analytic_ik_class(self.links_dimensions, self.joint_limits)
+
+    # q (dof,) -> frames (num_frames,4,4) or the tool frame (4,4), q (N,dof) -> (N,num_frames,4,4) or (N,4,4)
+    def forward_kinematics(self, q, return_frames=False):
+        T = self.chain.forward(q, self.T_base, self.T_tool, return_frames=return_frames)
+        return T[0] if np.ndim(q) == 1 else T
+
+    # Geometric jacobian [linear; angular] in the base frame, q (dof,) -> (6,dof), q (N,dof) -> (N,6,dof)
+    def jacobian(self, q):
+        J = self.chain.jacobian(q, self.T_base, self.T_tool)
+        return J[0] if np.ndim(q) == 1 else J
+
+    def _batch_fk(self, q):
+        return self.chain.forward(q, self.T_base, self.T_tool, return_frames=False)
+
+    def _batch_jacobian(self, q):
+        return self.chain.jacobian(q, self.T_base, self.T_tool)
+
+    def numerical_ik(self, **kwargs):
+        return NumericalIK(self._batch_fk, self._batch_jacobian, joints_limits=self.joint_limits, batch=True, **kwargs)
+
+    # Numerical IK of T (4,4) or a batch (N,4,4) starting from q0 (default: zero configuration)
+    # return q, success, error
+    def inverse_kinematics(self, T, q0=None, warm_start=False, **kwargs):
+        ik = self.numerical_ik(**kwargs) if len(kwargs) else self._ik
+        if(ik is None):
+            ik = self._ik = self.numerical_ik()
+        q0 = np.zeros(self.dof) if q0 is None else q0
+        q, success, error, _ = ik.solve_batch(T, q0, warm_start=warm_start)
+        if(np.ndim(T) == 2):
+            return q[0], success[0], error[0]
+        return q, success, error
+
+    def check_joints_limits(self, q):
+        if(self.joint_limits is None):
+            return np.ones(np.shape(q)[:-1], dtype=bool)
+        return np.all((q >= self.joint_limits[:,0]) & (q <= self.joint_limits[:,1]), axis=-1)
+
+
+class RRR_robot(Robot):
+    description_name = "rrr_robot"
+    analytic_ik_class = RRR_robot_IK
+
+
+class KUKA_KR10_R1100_2(Robot):
+    description_name = "kuka_kr10_r1100_2"
+    analytic_ik_class = KUKA_KR10_R1100_2_IK
+
+
+# Reducible model of the calibration with the parameters pi (default: nominal, or the identified ones for the calibrated robot),
+# the base height is part of T_base
+class FANUC_R_2000i(Robot):
+    description_name = "fanuc_r_2000i"
+
+    @classmethod
+    def get_nominal_parameters(cls):
+        return load_description(cls.description_name).nominal_parameters
+
+    def __init__(self, T_base=None, T_tool=None, pi=None):
+        super().__init__(T_base=T_base, T_tool=T_tool, pi=pi)
+        self.pi = self.description.nominal_parameters if pi is None else np.array(pi, dtype=np.float64).reshape(-1)
+
+
+class PlanarRR(Robot):
+    description_name = "planar_rr"
+
+    def __init__(self, T_base=None, T_tool=None):
+        super().__init__(T_base=T_base, T_tool=T_tool)
+        self.dynamics = PlanarRRDynamics.from_description(self.description)
+
+
+class RPP_robot(Robot):
+    description_name = "rpp_robot"
@@ -0,0 +1,85 @@
+# Rigid transformation stored as the rotation R (...,3,3) and the position p (...,3) instead of a 4x4 homogeneous matrix
+# A single pose has R (3,3), p (3,), a batch has R (N,3,3), p (N,3): every operation works on both
+#   compose:  (R1, p1) @ (R2, p2) = (R1 R2, R1 p2 + p1)    36 multiplications instead of 64 for the 4x4 product
+#   inverse:  (R^T, -R^T p)                                closed form instead of np.linalg.inv
+#   point:    R x + p
+import numpy as np
+
+class SE3:
+    __slots__ = ("R", "p")
+
+    def __init__(self, R=None, p=None):
+        if(R is None and p is None):
+            R, p = np.eye(3), np.zeros(3)
+        elif(R is None):
+            p = np.asarray(p, dtype=np.float64)
+            R = np.broadcast_to(np.eye(3), p.shape[:-1] + (3,3)).copy()
+        elif(p is None):
+            R = np.asarray(R, dtype=np.float64)
+            p = np.zeros(R.shape[:-1])
+        self.R = np.asarray(R, dtype=np.float64)
+        self.p = np.asarray(p, dtype=np.float64)
+
+    @staticmethod
+    def identity(shape=()):
+        shape = (shape,) if np.isscalar(shape) else tuple(shape)
+        return SE3(np.broadcast_to(np.eye(3), shape + (3,3)).copy(), np.zeros(shape + (3,)))
+
+    # From a homogeneous matrix (4,4) or a batch (...,4,4), the blocks are views of H (no copy)
+    @staticmethod
+    def from_matrix(H):
+        H = np.asarray(H, dtype=np.float64)
+        return SE3(H[...,:3,:3], H[...,:3,3])
+
+    def as_matrix(self):
+        H = np.zeros(self.p.shape[:-1] + (4,4))
+        H[...,:3,:3] = self.R
+        H[...,:3,3] = self.p
+        H[...,3,3] = 1
+        return H
+
+    # Elementary transformations, value scalar or (N,) for a batch
+    @staticmethod
+    def rotation(axis, theta):
+        theta = np.asarray(theta, dtype=np.float64)
+        c, s = np.cos(theta), np.sin(theta)
+        a, b = {"x": (1, 2), "y": (2, 0), "z": (0, 1)}[axis]
+        R = np.broadcast_to(np.eye(3), theta.shape + (3,3)).copy()
+        R[...,a,a], R[...,b,a], R[...,a,b], R[...,b,b] = c, s, -s, c
+        return SE3(R, np.zeros(theta.shape + (3,)))
+
+    @staticmethod
+    def translation(axis, l):
+        l = np.asarray(l, dtype=np.float64)
+        p = np.zeros(l.shape + (3,))
+        p[...,"xyz".index(axis)] = l
+        return SE3(np.broadcast_to(np.eye(3), l.shape + (3,3)).copy(), p)
+
+    def inverse(self):
+        R_T = np.swapaxes(self.R, -1, -2)
+        return SE3(R_T, -np.einsum("...ij,...j->...i", R_T, self.p))
+
+    # self @ other: other is applied first (same order as the 4x4 matrices), a single pose broadcasts over a batch
+    def compose(self, other):
+        return SE3(self.R @ other.R, np.einsum("...ij,...j->...i", self.R, other.p) + self.p)
+
+    def __matmul__(self, other):
+        return self.compose(other)
+
+    # self^-1 @ other without forming the inverse
+    def inverse_compose(self, other):
+        R_T = np.swapaxes(self.R, -1, -2)
+        return SE3(R_T @ other.R, np.einsum("...ij,...j->...i", R_T, other.p - self.p))
+
+    # Points x (...,3) expressed in this frame -> in the reference frame
+    def transform_point(self, x):
+        return np.einsum("...ij,...j->...i", self.R, np.asarray(x, dtype=np.float64)) + self.p
+
+    def __len__(self):
+        return len(self.p) if self.p.ndim > 1 else 1
+
+    def __getitem__(self, idx):
+        return SE3(self.R[idx], self.p[idx])
+
+    def __repr__(self):
+        return f"SE3(R={self.R.tolist()}, p={self.p.tolist()})" if self.p.ndim == 1 else f"SE3(batch of {len(self)})"
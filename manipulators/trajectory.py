@@ -0,0 +1,455 @@
+# Cartesian trajectory planning of the full pose (position and orientation)
+# LIN: the position moves on the straight line p0 -> pf and the orientation rotates about the fixed axis of R0^T Rf
+# (rotation vector interpolation R(s) = R0 exp(s r), the same path as SLERP), both driven by one path parameter s in [0,1]
+# with a trapezoidal (or triangular) profile synchronized to the most constrained of the linear and the angular limits
+# The poses, IK, joints velocities dq = J^+ [v; w] and accelerations ddq = J^+ ([a; alpha] - dJ dq) use the full 6xdof jacobian
+# and are calculated for all the samples at once
+# The joint space planners (polynomials, synchronized trapezoidal PTP) and the plots of the trajectories are at the end of the class
+import warnings
+import numpy as np
+from math import sqrt, ceil
+from manipulators.transforms import rotation_vector, rotation_from_vector
+from manipulators.plotting import decimate_envelope, show_plot
+
+class TrajectoryPlanning:
+    # Profile of the path parameter s: 0 -> 1 sampled every dt, v_max, a_max: limits of ds and dds
+    # t1 and tau are discretized to multiples of dt (then the velocity and acceleration are scaled down to reach s = 1 exactly)
+    # return time (N,), s, ds, dds (N,)
+    @staticmethod
+    def trapezoidal_profile(v_max, a_max, dt):
+        # Triangular
+        if(sqrt(a_max) <= v_max):
+            t1 = sqrt(1/a_max)
+            tau = t1
+        # Trapezoidal
+        else:
+            t1 = v_max/a_max
+            tau = 1/v_max
+        n = max(1, ceil(t1/dt - 1e-9))
+        m = max(0, ceil((tau - t1)/dt - 1e-9))
+        t1 = n*dt
+        tau = t1 + m*dt
+        total_time = t1 + tau
+        v = 1/tau
+        a = 1/(tau*t1)
+        time = np.arange(2*n + m + 1)*dt
+        accelerate = time < t1
+        decelerate = time >= tau
+        s = np.where(accelerate, a*time**2/2, np.where(decelerate, 1 - a*(total_time - time)**2/2, a*t1**2/2 + v*(time - t1)))
+        ds = np.where(accelerate, a*time, np.where(decelerate, a*(total_time - time), v))
+        dds = np.where(accelerate, a, np.where(decelerate, -a, 0.0))
+        return time, s, ds, dds
+
+    # Limits of the path parameter from the limits of the linear (distance L) and angular (angle theta) motions
+    @staticmethod
+    def _path_limits(L, theta, dp_max, ddp_max, dw_max, ddw_max):
+        v_max, a_max = np.inf, np.inf
+        if(L > 1e-12):
+            v_max, a_max = min(v_max, dp_max/L), min(a_max, ddp_max/L)
+        if(theta > 1e-12):
+            v_max, a_max = min(v_max, dw_max/theta), min(a_max, ddw_max/theta)
+        return v_max, a_max
+
+    # Cartesian trajectory of the pose T0 -> Tf (4x4) sampled every 1/f
+    # dp_max, ddp_max: linear velocity and acceleration limits, dw_max, ddw_max: angular (rad/s, rad/s^2)
+    # return time (N,), T (N,4,4), traj (N,6,3): rows [x, y, z, phi_x, phi_y, phi_z], columns [position, velocity, acceleration]
+    # phi is the rotation from R0 expressed in the base frame, so its derivatives are the angular velocity and acceleration
+    @staticmethod
+    def cartesian_LIN(T0, Tf, f=10, dp_max=1, ddp_max=10, dw_max=1, ddw_max=10):
+        T0 = np.asarray(T0, dtype=np.float64)
+        Tf = np.asarray(Tf, dtype=np.float64)
+        p0, R0 = T0[:3,3], T0[:3,:3]
+        delta_p = Tf[:3,3] - p0
+        # Rotation vector of R0^T Rf in the frame of R0, and in the base frame
+        r = rotation_vector(R0.T @ Tf[:3,:3])
+        r_base = R0 @ r
+        v_max, a_max = TrajectoryPlanning._path_limits(np.linalg.norm(delta_p), np.linalg.norm(r), dp_max, ddp_max, dw_max, ddw_max)
+        if(not np.isfinite(v_max)):
+            # Same pose: a single sample
+            traj = np.zeros((1,6,3))
+            traj[0,:3,0] = p0
+            return np.zeros(1), T0[None].copy(), traj
+        time, s, ds, dds = TrajectoryPlanning.trapezoidal_profile(v_max, a_max, 1/f)
+        T = np.zeros((len(s), 4, 4))
+        T[:,:3,:3] = R0 @ rotation_from_vector(s[:,None]*r)
+        T[:,:3,3] = p0 + s[:,None]*delta_p
+        T[:,3,3] = 1
+        direction = np.concatenate([delta_p, r_base])
+        traj = np.stack([direction*s[:,None], direction*ds[:,None], direction*dds[:,None]], axis=-1)
+        traj[:,:3,0] += p0
+        return time, T, traj
+
+    # Seeds for a pose that does not converge from the configuration q (dof,): q with one joint moved to its equivalent +-2pi
+    # inside the joints limits (unwinding the joint that runs into its limit keeps the other joints on their branch)
+    @staticmethod
+    def _unwound_seeds(q, joints_limits):
+        seeds = []
+        for j in range(len(q)):
+            for shift in (-2*np.pi, 2*np.pi):
+                q_shifted = q.copy()
+                q_shifted[j] += shift
+                if(joints_limits is None or joints_limits[j,0] <= q_shifted[j] <= joints_limits[j,1]):
+                    seeds.append(q_shifted)
+        return np.array(seeds).reshape(-1, len(q))
+
+    # IK of the pose T (4,4) for the path: from q_previous, then the unwound seeds, then random restarts
+    # return q (dof,), success
+    @staticmethod
+    def _path_ik(ik, ik_restarts, T, q_previous, joints_limits):
+        q, success, _, _ = ik.solve(T, q_previous)
+        if(success):
+            return q, success
+        seeds = TrajectoryPlanning._unwound_seeds(q_previous, joints_limits)
+        if(len(seeds)):
+            q_seeds, success_seeds, _, _ = ik.solve_batch(np.repeat(T[None], len(seeds), axis=0), seeds)
+            if(np.any(success_seeds)):
+                distance = np.where(success_seeds, np.linalg.norm(q_seeds - q_previous, axis=-1), np.inf)
+                return q_seeds[np.argmin(distance)], True
+        if(ik_restarts is None):
+            return q, success
+        q, success, _, _ = ik_restarts.solve(T, q_previous)
+        return q, success
+
+    # Joints trajectory of the poses T (N,4,4) with the cartesian velocities and accelerations traj[:,:,1], traj[:,:,2] (N,6)
+    # IK: the keyframes are solved one after the other from q0 (warm start keeps the branch), the other samples are solved
+    # at once starting from the interpolation of the keyframes
+    # When the branch runs into a joint limit along the path, the keyframe is solved with that joint unwound by +-2pi
+    # (a joint jump at the switch, the samples across it start from the nearest keyframe), then from random configurations
+    # (restarts, seed: reproducible). The samples that did not converge in the batch are retried the same way from their
+    # keyframes, the ones that still fail are reported with a RuntimeWarning (success is False for them)
+    # return joint_traj (N,dof,3) [q, dq, ddq], success (N,)
+    @staticmethod
+    def cartesian_to_joints(robot, T, traj, q0=None, num_keyframes=20, eps=1e-6, restarts=10, seed=0):
+        ik = robot.numerical_ik()
+        ik_restarts = robot.numerical_ik(restarts=restarts, seed=seed) if restarts > 0 else None
+        limits = robot.joint_limits
+        N = len(T)
+        q0 = np.zeros(robot.dof) if q0 is None else np.asarray(q0, dtype=np.float64).reshape(-1)
+        keys = np.unique(np.linspace(0, N-1, min(N, num_keyframes)).round().astype(int))
+        q_keys = np.empty((len(keys), robot.dof))
+        q_previous = q0
+        for i, key in enumerate(keys):
+            q_keys[i], _ = TrajectoryPlanning._path_ik(ik, ik_restarts, T[key], q_previous, limits)
+            q_previous = q_keys[i]
+        samples = np.arange(N)
+        q_seed = np.stack([np.interp(samples, keys, q_keys[:,j]) for j in range(robot.dof)], axis=-1)
+        # Across a branch switch the interpolation is meaningless: previous keyframe before the middle, next one after it
+        segment = np.clip(np.searchsorted(keys, samples, side="right") - 1, 0, max(len(keys)-2, 0))
+        if(len(keys) > 1):
+            switch = np.max(np.abs(np.diff(q_keys, axis=0)), axis=1) > np.pi
+            nearest = np.where(samples - keys[segment] <= keys[np.minimum(segment+1, len(keys)-1)] - samples, segment, segment+1)
+            q_seed = np.where(switch[segment][:,None], q_keys[np.minimum(nearest, len(keys)-1)], q_seed)
+        q, success, _, _ = ik.solve_batch(T, q_seed)
+        for i in np.flatnonzero(~success):
+            q[i], success[i] = TrajectoryPlanning._path_ik(ik, ik_restarts, T[i], q_keys[segment[i]], limits)
+        if(not np.all(success)):
+            warnings.warn(f"IK did not converge for {np.sum(~success)} of {N} samples of the trajectory (success is False for them)", RuntimeWarning, stacklevel=2)
+        J = robot.jacobian(q)
+        J_pinv = np.linalg.pinv(J)
+        dq = (J_pinv @ traj[:,:,1,None])[...,0]
+        # dJ dq: derivative of J along dq (central difference)
+        dJdq = ((robot.jacobian(q + eps*dq) - robot.jacobian(q - eps*dq))/(2*eps) @ dq[...,None])[...,0]
+        ddq = (J_pinv @ (traj[:,:,2] - dJdq)[...,None])[...,0]
+        return np.stack([q, dq, ddq], axis=-1), success
+
+    # Performs LIN command of the full pose (Move in linear trajectory with the orientation interpolated)
+    # q0: current configuration of the robot (selects the IK branch)
+    # return traj (N,6,3), time (N,), joint_traj (N,dof,3), success (N,) (IK converged)
+    @staticmethod
+    def LIN(robot, T0, Tf, f=10, dp_max=1, ddp_max=10, dw_max=1, ddw_max=10, q0=None, num_keyframes=20, restarts=10, seed=0):
+        time, T, traj = TrajectoryPlanning.cartesian_LIN(T0, Tf, f, dp_max, ddp_max, dw_max, ddw_max)
+        joint_traj, success = TrajectoryPlanning.cartesian_to_joints(robot, T, traj, q0, num_keyframes, restarts=restarts, seed=seed)
+        return traj, time, joint_traj, success
+
+    # ------------------------------ Joint space planners ------------------------------
+    # The trajectories are (T,n,3) (or (T,n,3,1) from the polynomials): for each timestep and each joint (q_j, dq_j, ddq_j)
+
+    # (T,n,k) view of a trajectory (e.g. (T,n,k,1) from the planners), without the copy of squeeze
+    @staticmethod
+    def _as_trajectory(traj):
+        traj = np.asarray(traj)
+        while(traj.ndim > 3 and traj.shape[-1] == 1):
+            traj = traj[...,0]
+        return traj.reshape(len(traj), -1, traj.shape[-1])
+
+    @staticmethod
+    def plot_trajectory_cartesian(traj, dt=1/100, title="Trajectory", time=None, type=1, max_points=2000, save=None, block=True):
+        from matplotlib import pyplot as plt
+        if(type == 1):
+            traj = TrajectoryPlanning._as_trajectory(traj)
+            p, dp, ddp = traj[:,:, 0], traj[:,:, 1], traj[:,:, 2]
+            time = np.linspace(0, dt*len(traj), len(traj)) if time is None else time
+
+            fig, axs = plt.subplots(3,1)
+            axs[0].plot(*decimate_envelope(time, p, max_points))
+            axs[0].set_xlabel("Time - seconds")
+            axs[0].set_ylabel("p - m")
+            axs[0].legend(["X", "Y", "Z"], loc="upper left", bbox_to_anchor=(1, 1))
+            axs[0].set_title("Position")
+            
+            axs[1].plot(*decimate_envelope(time, dp, max_points))
+            axs[1].set_xlabel("Time - seconds")
+            axs[1].set_ylabel("dp - m/s")
+            axs[1].legend(["X", "Y", "Z"], loc="upper left", bbox_to_anchor=(1, 1))
+            axs[1].set_title("Velocity")
+
+            axs[2].plot(*decimate_envelope(time, ddp, max_points))
+            axs[2].set_xlabel("Time - seconds")
+            axs[2].set_ylabel("dp - m/s^2")
+            axs[2].legend(["X", "Y", "Z"], loc="upper left", bbox_to_anchor=(1, 1))
+            axs[2].set_title("Acceleration")
+
+            fig.suptitle(title, fontsize=12)
+            plt.tight_layout()
+            show_plot(fig, save, block)
+        # Deprecated
+        else:
+            p = traj[:,0,0]
+            dp = traj[:,0,1]
+            time = np.linspace(0, dt*len(traj), len(traj)) if time is None else time
+
+            fig, axs = plt.subplots(2,1)
+            axs[0].plot(time, p)
+            axs[0].set_xlabel("Time - seconds")
+            axs[0].set_ylabel("p - m")
+            axs[0].legend(["X", "Y", "Z"], loc="upper left", bbox_to_anchor=(1, 1))
+            axs[0].set_title("Position")
+            
+            axs[1].plot(time, dp)
+            axs[1].set_xlabel("Time - seconds")
+            axs[1].set_ylabel("dp - m/s")
+            axs[1].legend(["X", "Y", "Z"], loc="upper left", bbox_to_anchor=(1, 1))
+            axs[1].set_title("Velocity")
+
+            fig.suptitle(title, fontsize=12)
+            plt.tight_layout()
+            plt.show()
+
+    # Take the trajectory as a parameter
+    # Plot 3 figures (Position, Velocity & Acceleration)
+    @staticmethod
+    def plot_trajectory(traj, dt=1/100, title="Trajectory", time=None, max_points=2000, save=None, block=True):
+        from matplotlib import pyplot as plt
+        traj = TrajectoryPlanning._as_trajectory(traj)
+        ddq = None
+        q, dq = traj[:,:, 0], traj[:,:, 1]
+        if(traj.shape[2] == 3):
+            ddq = traj[:,:, 2]
+        time = np.linspace(0, dt*len(traj), len(traj)) if time is None else time
+        joints = [f"Joint{j+1}" for j in range(traj.shape[1])]
+
+        fig, axs = None, None
+        if(traj.shape[2] == 3):
+            fig, axs = plt.subplots(3,1)
+        else:
+            fig, axs = plt.subplots(2,1)
+        axs[0].plot(*decimate_envelope(time, q, max_points))
+        axs[0].set_xlabel("Time - seconds")
+        axs[0].set_ylabel("q - rad")
+        axs[0].legend(joints, loc="upper left", bbox_to_anchor=(1, 1))
+        axs[0].set_title("Position")
+
+        axs[1].plot(*decimate_envelope(time, dq, max_points))
+        axs[1].set_xlabel("Time - seconds")
+        axs[1].set_ylabel("dq - rad/sec")
+        axs[1].legend(joints, loc="upper left", bbox_to_anchor=(1, 1))
+        axs[1].set_title("Velocity")
+        
+        if(traj.shape[2] == 3):
+            axs[2].plot(*decimate_envelope(time, ddq, max_points))
+            axs[2].set_xlabel("Time - seconds")
+            axs[2].set_ylabel("dq - rad/sec^2")
+            axs[2].legend(joints, loc="upper left", bbox_to_anchor=(1, 1))
+            axs[2].set_title("Acceleration")
+
+        fig.suptitle(title, fontsize=12)
+        plt.tight_layout()
+        show_plot(fig, save, block)
+
+    # Samples every dt between t0 and tf of the polynomials of the joints with the coefficients x (order+1,n)
+    # return traj (T,n,3,1): (q_j, dq_j, ddq_j) for each timestep and each joint
+    @staticmethod
+    def _polynomial(x, t0, tf, dt):
+        time = np.linspace(t0, tf, int((tf-t0)/dt))
+        traj = np.empty((len(time), x.shape[1], 3, 1))
+        for d in range(3):
+            traj[:,:,d,0] = np.polynomial.polynomial.polyval(time, x).T
+            x = np.polynomial.polynomial.polyder(x)
+        return traj
+
+    # Take the constraints (position and velocity) for the initial and goal configurations of the n joints
+    # Returns a trajectory for each timestep, the entry has a 3 tuples for each joint
+    #   each tuple has 3 elements (q_j^i, dq_j^i, ddq_j^i) st. 0<=j<n (joint index), i is the index of the iteration
+    @staticmethod
+    def polynomial3(t0, q0, dq0, tf, qf, dqf, dt=1/1000):
+        A = np.array([[1, t0, t0**2, t0**3],
+                      [0, 1,  2*t0,  3*(t0**2)],
+                      [1, tf, tf**2, tf**3],
+                      [0, 1,  2*tf,  3*(tf**2)]])
+        b = np.array([q0, dq0, qf, dqf], dtype=np.float64)
+        return TrajectoryPlanning._polynomial(np.linalg.solve(A, b), t0, tf, dt)
+
+    # Same with the accelerations constraints as well
+    @staticmethod
+    def polynomial5(t0, q0, dq0, ddq0, tf, qf, dqf, ddqf, dt=1/1000):
+        A = np.array([[1, t0, t0**2, t0**3,    t0**4,       t0**5],
+                      [0, 1,  2*t0,  3*(t0**2), 4*(t0**3),  5*(t0**4)],
+                      [0, 0,  2,     6*t0,      12*(t0**2), 20*(t0**3)],
+                      [1, tf, tf**2, tf**3,    tf**4,       tf**5],
+                      [0, 1,  2*tf,  3*(tf**2), 4*(tf**3),  5*(tf**4)],
+                      [0, 0,  2,     6*tf,      12*(tf**2), 20*(tf**3)]])
+        b = np.array([q0, dq0, ddq0, qf, dqf, ddqf], dtype=np.float64)
+        return TrajectoryPlanning._polynomial(np.linalg.solve(A, b), t0, tf, dt)
+
+    # Synchronized trapezoidal (or triangular) profiles of the n joints q0 -> qf with the control frequency f
+    # Each joint gets its profile (triangular if it cannot reach dq_max), then all of them take the t1 and tau of the slowest one
+    # (trapezoidal for all if one of them is trapezoidal), t1 and tau are discretized to multiples of 1/f
+    # return traj (1000,n,3), time (1000,): simulated with 1000 timesteps
+    @staticmethod
+    def _trapezoidal(q0, qf, f=10, dq_max=[1,1,1], ddq_max=[10,10,10], debug=False):
+        dt = 1/f
+        n = len(q0)
+        joints_status = np.empty((n,5))
+        synchronization_flag = False    # Has two meaning (one of the profiles for the joints is trapezoidal) and (the case is trapezoidal after synchronization)
+        case = None
+        # Check the case and calculate t1 and tau for each joint
+        for j in range(n):
+            delta_q = abs(qf[j] - q0[j])
+            dq_max_dash = sqrt(delta_q*ddq_max[j])
+            dq_max_tmp = dq_max[j]
+            if(dq_max_dash <= dq_max[j]):
+                t1 = sqrt(delta_q/ddq_max[j])
+                tau = 0
+                c = 2#"Triangular"
+                dq_max_tmp = dq_max_dash
+            else:
+                t1 = dq_max[j]/ddq_max[j]
+                tau = delta_q/dq_max[j]
+                c = 1#"Trapezoidal"
+                synchronization_flag = True
+            joints_status[j,:] = np.array([c,t1,tau, dq_max_tmp, ddq_max[j]])
+
+        # Synhronize and select t1, tau and case for all the joints synchronized
+        if(synchronization_flag):
+            # It will Trapezoidal profile for all
+            case = 1#"Trapezoidal"
+        else:
+            # All of them are triangular and it will be triangular for all
+            case = 2#"Triangular"
+        if(debug):
+            print(f"After Selecting profiles: \n{joints_status}")
+        t1_dash = np.max(joints_status[:,1])
+        tau_dash = np.max(joints_status[:,2] - joints_status[:,1]) + t1_dash
+        # Replan after synchronization
+        joints_status_dash = np.empty((n,5))
+        for j in range(n):
+            delta_q = abs(q0[j] - qf[j])
+            # Triangular
+            if(synchronization_flag == False):
+                dq_max_2dash = delta_q / t1_dash
+                ddq_max_2dash = delta_q / (t1_dash*t1_dash)
+            # Trapezoidal
+            else:
+                dq_max_2dash = delta_q / tau_dash
+                ddq_max_2dash = delta_q / (tau_dash*t1_dash)
+            joints_status_dash[j,:] = np.array([case, t1_dash, tau_dash, dq_max_2dash, ddq_max_2dash])
+        if(debug):
+            print(f"After Synchroniztion: \n{joints_status_dash}")
+        # Discretecize
+        # Get n, m
+        n_steps = ceil(t1_dash/dt)
+        m_steps = ceil((tau_dash - t1_dash)/dt)
+        # Caluclate t1, tau
+        t1_2dash = n_steps*dt
+        tau_2dash = m_steps*dt + t1_2dash
+
+        # Calculate dq_max_3dash, ddq_max_3dash
+        joints_status_2dash = np.empty((n,5))
+        for j in range(n):
+            delta_q = abs(q0[j] - qf[j])
+            # Triangular
+            if(synchronization_flag == False):
+                dq_max_3dash = delta_q / t1_2dash
+                ddq_max_3dash = delta_q / (t1_2dash*t1_2dash)
+            else:
+                dq_max_3dash = delta_q / tau_2dash
+                ddq_max_3dash = delta_q / (tau_2dash*t1_2dash)
+            joints_status_2dash[j,:] = np.array([case, t1_2dash, tau_2dash, dq_max_3dash, ddq_max_3dash])
+        if(debug):
+            print(f"After Discretecization: \n{joints_status_2dash}")
+
+        # Apply the trajectory equations
+        # if trapezoidal
+        if(synchronization_flag):
+            total_time = (t1_2dash+tau_2dash)
+        # if triangular
+        else:
+            total_time = t1_2dash*2
+        if(debug):
+            print(f"t1 = {t1_2dash}, tau = {tau_2dash}")
+            print(f"Total time -> {total_time}s")
+        num_timesteps = 1000    # Number of steps for the simulation time
+        time = np.linspace(0, total_time+dt*2, num_timesteps)    # simulation time not control time
+        traj = np.empty((num_timesteps,n,3))
+        pos_prev = np.array(q0, dtype=np.float64)
+        direction = [np.sign(qf[j] - q0[j]) for j in range(n)]
+        if(debug):
+            if(joints_status_2dash[0][0] == 1):
+                print("Trapezoidal Profile")
+            else:
+                print("Triangular Profile")
+        for i,t in enumerate(time):
+            for j in range(n):
+                acc, vel, pos = 0, 0, 0
+                # Apply formulas
+                # Trapezoidal profile
+                if(joints_status_2dash[j][0] == 1):
+                    # Accelerate
+                    if(0 <= t and t < t1_2dash):
+                        acc = +joints_status_2dash[j][4]*direction[j]
+                        vel = acc*t
+                        pos = pos_prev[j] + vel*(time[1] - time[0])
+                    # Zero Acceleration
+                    elif(t1_2dash <= t and t < tau_2dash):
+                        acc = 0
+                        vel = joints_status_2dash[j][3]*direction[j]
+                        pos = pos_prev[j] + vel*(time[1] - time[0])
+                    # Deceleration
+                    elif(tau_2dash <= t and t <= total_time):
+                        acc = -joints_status_2dash[j][4]*direction[j]
+                        vel = direction[j]*joints_status_2dash[j][3] + acc*(t-tau_2dash)
+                        pos = pos_prev[j] + vel*(time[1] - time[0])
+                    else:
+                        acc = 0
+                        vel = 0
+                        pos = pos_prev[j]
+
+                # Triangular profile
+                else:
+                    # Accelerate
+                    if(0 <= t and t < t1_2dash):
+                        acc = +joints_status_2dash[j][4]*direction[j]
+                        vel = acc*t
+                        pos = pos_prev[j] + vel*(time[1] - time[0])
+
+                    # Deceleration
+                    elif(t1_2dash <= t and t <= total_time):
+                        acc = -joints_status_2dash[j][4]*direction[j]
+                        vel = direction[j]*joints_status_2dash[j][3] + acc*(t-t1_2dash)
+                        pos = pos_prev[j] + vel*(time[1] - time[0])
+
+                    else:
+                        acc = 0
+                        vel = 0
+                        pos = pos_prev[j]
+
+                traj[i][j] = np.array([pos, vel, acc])
+                pos_prev[j] = pos
+        return traj, time
+
+    # Performs PTP command in robotics manipulators (Point to Point) (Joint space trajectory planning)
+    # Returns a trajectory for each timestep, the entry has a 3 tuples for each joint
+    #   each tuple has 3 elements (q_j^i, dq_j^i, ddq_j^i) st. 0<=j<n (joint index), i is the index of the iteration
+    @staticmethod
+    def PTP(q0, qf, f=10, dq_max=[1,1,1], ddq_max=[10,10,10], debug=False):
+        return TrajectoryPlanning._trapezoidal(q0, qf, f, dq_max, ddq_max, debug)
@@ -0,0 +1,175 @@
+# Homogeneous transformations shared by all the robots (numpy only)
+# Single matrices (4x4, 3x3 for the *3 variants) and batched versions (...,4,4) for many angles at once
+import numpy as np
+
+def translation_x(l):
+    return np.array([[1,0,0, l],
+                     [0,1,0, 0],
+                     [0,0,1, 0],
+                     [0,0,0, 1]], dtype='float')
+
+def translation_y(l):
+    return np.array([[1,0,0, 0],
+                     [0,1,0, l],
+                     [0,0,1, 0],
+                     [0,0,0, 1]], dtype='float')
+
+def translation_z(l):
+    return np.array([[1,0,0, 0],
+                     [0,1,0, 0],
+                     [0,0,1, l],
+                     [0,0,0, 1]], dtype='float')
+
+def rotation_x(theta):
+    return np.array([[1,         0,          0, 0],
+                     [0,np.cos(theta),-np.sin(theta), 0],
+                     [0,np.sin(theta), np.cos(theta), 0],
+                     [0,         0,          0, 1]], dtype='float')
+
+def rotation_y(theta):
+    return np.array([[np.cos(theta) ,0,np.sin(theta), 0],
+                     [0          ,1,         0, 0],
+                     [-np.sin(theta),0,np.cos(theta), 0],
+                     [0          ,0,         0, 1]], dtype='float')
+
+def rotation_z(theta):
+    return np.array([[np.cos(theta),-np.sin(theta),0, 0],
+                     [np.sin(theta), np.cos(theta),0, 0],
+                     [0         ,0          ,1, 0],
+                     [0         ,0          ,0, 1]], dtype='float')
+
+def rotation_x3(theta):
+    return rotation_x(theta)[:3,:3]
+
+def rotation_y3(theta):
+    return rotation_y(theta)[:3,:3]
+
+def rotation_z3(theta):
+    return rotation_z(theta)[:3,:3]
+
+# Derivatives w.r.t. the translation/angle (the translations have zero diagonal)
+def dtranslation_x(l):
+    return np.array([[0,0,0, 1],
+                     [0,0,0, 0],
+                     [0,0,0, 0],
+                     [0,0,0, 0]], dtype='float')
+
+def dtranslation_y(l):
+    return np.array([[0,0,0, 0],
+                     [0,0,0, 1],
+                     [0,0,0, 0],
+                     [0,0,0, 0]], dtype='float')
+
+def dtranslation_z(l):
+    return np.array([[0,0,0, 0],
+                     [0,0,0, 0],
+                     [0,0,0, 1],
+                     [0,0,0, 0]], dtype='float')
+
+def drotation_x(theta):
+    return np.array([[0,         0,          0, 0],
+                     [0,-np.sin(theta), -np.cos(theta), 0],
+                     [0, np.cos(theta), -np.sin(theta), 0],
+                     [0,         0,          0, 0]], dtype='float')
+
+def drotation_y(theta):
+    return np.array([[-np.sin(theta), 0,  np.cos(theta), 0],
+                     [0          ,0,         0, 0],
+                     [-np.cos(theta), 0, -np.sin(theta), 0],
+                     [0          ,0,         0, 0]], dtype='float')
+
+def drotation_z(theta):
+    return np.array([[-np.sin(theta),-np.cos(theta),0, 0],
+                     [ np.cos(theta), -np.sin(theta),0, 0],
+                     [0         ,0          ,0, 0],
+                     [0         ,0          ,0, 0]], dtype='float')
+
+def get_rotation(H):
+    return H[:3,:3]
+
+def get_position(H):
+    return H[:3,3]
+
+def pos2hom(pos):
+    hom = np.zeros((4,4))
+    hom[:3,3] = pos.T
+    hom[3,3] = 1
+    return hom
+
+# Closed-form inverse of a homogeneous matrix (or a batch (...,4,4)): [R^T, -R^T p] instead of np.linalg.inv
+def inverse_homogeneous(H):
+    H = np.asarray(H, dtype='float')
+    H_inv = np.zeros(H.shape)
+    R_T = np.swapaxes(H[...,:3,:3], -1, -2)
+    H_inv[...,:3,:3] = R_T
+    H_inv[...,:3,3] = -np.einsum("...ij,...j->...i", R_T, H[...,:3,3])
+    H_inv[...,3,3] = 1
+    return H_inv
+
+# Batched rotations: theta (N,) -> (N,4,4)
+def rotation_x_batch(theta):
+    theta = np.asarray(theta, dtype='float')
+    H = np.zeros(theta.shape + (4,4))
+    c, s = np.cos(theta), np.sin(theta)
+    H[...,0,0], H[...,3,3] = 1, 1
+    H[...,1,1], H[...,1,2], H[...,2,1], H[...,2,2] = c, -s, s, c
+    return H
+
+def rotation_y_batch(theta):
+    theta = np.asarray(theta, dtype='float')
+    H = np.zeros(theta.shape + (4,4))
+    c, s = np.cos(theta), np.sin(theta)
+    H[...,1,1], H[...,3,3] = 1, 1
+    H[...,0,0], H[...,0,2], H[...,2,0], H[...,2,2] = c, s, -s, c
+    return H
+
+def rotation_z_batch(theta):
+    theta = np.asarray(theta, dtype='float')
+    H = np.zeros(theta.shape + (4,4))
+    c, s = np.cos(theta), np.sin(theta)
+    H[...,2,2], H[...,3,3] = 1, 1
+    H[...,0,0], H[...,0,1], H[...,1,0], H[...,1,1] = c, -s, s, c
+    return H
+
+# Rotation vector (axis*angle) of a batch of rotations (N,3,3) -> (N,3) (log map)
+def rotation_vector(R):
+    R = np.asarray(R, dtype=np.float64)
+    v = np.stack([R[...,2,1] - R[...,1,2], R[...,0,2] - R[...,2,0], R[...,1,0] - R[...,0,1]], axis=-1)
+    cos = np.clip((np.trace(R, axis1=-2, axis2=-1) - 1)/2, -1, 1)
+    sin = np.linalg.norm(v, axis=-1)/2
+    # atan2 keeps the precision of the small angles (arccos(cos) loses half of the digits when cos ~ 1)
+    angle = np.arctan2(sin, cos)
+    small = sin < 1e-6
+    scale = np.where(small, 0.5, angle/(2*np.where(small, 1, sin)))
+    r = scale[...,None]*v
+    # angle ~ pi: sin ~ 0, the axis is taken from the symmetric part (R + I)/2 = axis axis^T
+    flip = small & (cos < 0)
+    if(np.any(flip)):
+        B = (R[flip] + np.eye(3))/2
+        k = np.argmax(np.diagonal(B, axis1=-2, axis2=-1), axis=-1)
+        axis = B[np.arange(len(B)),:,k]
+        axis /= np.linalg.norm(axis, axis=-1, keepdims=True)
+        r[flip] = angle[flip,None]*axis
+    return r
+
+# Rotations of a batch of rotation vectors r (N,3) -> (N,3,3) (exp map, Rodrigues formula)
+def rotation_from_vector(r):
+    r = np.asarray(r, dtype=np.float64)
+    angle = np.linalg.norm(r, axis=-1)
+    small = angle < 1e-9
+    safe = np.where(small, 1, angle)
+    # sin(a)/a and (1-cos(a))/a^2, with their limits for a -> 0
+    A = np.where(small, 1, np.sin(safe)/safe)
+    B = np.where(small, 0.5, (1 - np.cos(safe))/safe**2)
+    K = np.zeros(r.shape[:-1] + (3,3))
+    K[...,0,1], K[...,0,2], K[...,1,2] = -r[...,2], r[...,1], -r[...,0]
+    K[...,1,0], K[...,2,0], K[...,2,1] = r[...,2], -r[...,1], r[...,0]
+    return np.eye(3) + A[...,None,None]*K + B[...,None,None]*(K @ K)
+
+# Rotation vector (axis*angle) of R_d R^T for a batch of rotations (N,3,3) -> (N,3)
+def rotation_error(R, R_d):
+    return rotation_vector(R_d @ np.swapaxes(R, -1, -2))
+
+# Pose error [p_d - p, rotation_error] for a batch of frames (N,4,4) -> (N,6)
+def pose_error(T, T_d):
+    return np.concatenate([T_d[...,:3,3] - T[...,:3,3], rotation_error(T[...,:3,:3], T_d[...,:3,:3])], axis=-1)
@@ -0,0 +1,181 @@
+# Tests of the shared core (python -m pytest -q from the root of the repository)
+# The references are the explicit products of the elementary transformations (the FK of the assignments before the package)
+# and finite differences, so the chain, the jacobian and the IK are checked against independent computations
+import importlib
+import os
+import sys
+import numpy as np
+import pytest
+from manipulators import (SE3, KinematicChain, NumericalIK, PlanarRRDynamics, KUKA_KR10_R1100_2, RPP_robot,
+                          load_description, rotation_vector, rotation_from_vector, pose_error,
+                          translation_x, translation_y, translation_z, rotation_x, rotation_y, rotation_z)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KUKA_LINKS = load_description("kuka_kr10_r1100_2").links_dimensions
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+def random_pose(rng):
+    return translation_x(rng.normal()) @ translation_y(rng.normal()) @ translation_z(rng.normal()) @ rotation_z(rng.normal()) @ rotation_y(rng.normal()) @ rotation_x(rng.normal())
+
+# FK of the KUKA as the product of the frames transitions (frame 0 is T_base, the last one includes T_tool)
+def kuka_frames(q, T_base, T_tool):
+    l = KUKA_LINKS
+    transitions = [T_base,
+                   rotation_z(q[0]) @ translation_z(l[0]) @ translation_x(l[1]),
+                   rotation_y(q[1]) @ translation_x(l[2]),
+                   rotation_y(q[2]) @ translation_x(l[3]),
+                   rotation_x(q[3]) @ translation_x(l[4]),
+                   rotation_y(q[4]),
+                   rotation_x(q[5]) @ translation_x(l[5]) @ T_tool]
+    frames = [transitions[0]]
+    for T in transitions[1:]:
+        frames.append(frames[-1] @ T)
+    return np.array(frames)
+
+# The src scripts of the assignments are flat modules (from robot import ..., from utils import ...) that share their names,
+# they are imported from their directory and removed from sys.modules afterwards
+@pytest.fixture
+def src_module(monkeypatch):
+    names = ["robot", "utils", "FK", "Jacobian"]
+    def load(directory, name):
+        monkeypatch.syspath_prepend(os.path.join(ROOT, directory))
+        for n in names:
+            monkeypatch.delitem(sys.modules, n, raising=False)
+        return importlib.import_module(name)
+    yield load
+    for n in names:
+        sys.modules.pop(n, None)
+
+
+def test_chain_fk_matches_product(rng):
+    robot = KUKA_KR10_R1100_2()
+    T_base, T_tool = random_pose(rng), random_pose(rng)
+    q = rng.uniform(-np.pi, np.pi, (20, 6))
+    frames = robot.chain.forward(q, T_base, T_tool, return_frames=True)
+    assert frames.shape == (20, 7, 4, 4)
+    for i in range(len(q)):
+        np.testing.assert_allclose(frames[i], kuka_frames(q[i], T_base, T_tool), atol=1e-9)
+        np.testing.assert_allclose(robot.chain.forward(q[i], T_base, T_tool, return_frames=False)[0], frames[i,-1], atol=1e-12)
+
+def test_template_fk_batch(rng, src_module):
+    FK = src_module("Midterm_preparation/Template/src", "FK")
+    T_base, T_tool = random_pose(rng), random_pose(rng)
+    q = rng.uniform(-np.pi, np.pi, (20, 6))
+    T = FK.FK_batch(q, T_base, T_tool)
+    assert T.shape == (20, 4, 4)
+    for i in range(len(q)):
+        expected = kuka_frames(q[i], T_base, T_tool)
+        np.testing.assert_allclose(T[i], expected[-1], atol=1e-9)
+        np.testing.assert_allclose(np.array(FK.FK(q[i], T_base, T_tool)), expected, atol=1e-9)
+    np.testing.assert_allclose(FK.FK_batch(q, T_base, T_tool, return_frames=True)[:,-1], T, atol=1e-12)
+
+def test_chain_empty_links():
+    chain = KinematicChain([[("rz", None)], [], [("tx", 2.0)]])
+    frames = chain.forward([np.pi/2])[0]
+    assert frames.shape == (4, 4, 4)
+    np.testing.assert_allclose(frames[2], frames[1])
+    np.testing.assert_allclose(frames[3][:3,3], [0, 2, 0], atol=1e-12)
+
+
+# Geometric jacobian [linear; angular] against central differences of the FK:
+# linear: dp/dq, angular: rotation vector of R(q+h) R(q-h)^T / 2h
+@pytest.mark.parametrize("robot", [KUKA_KR10_R1100_2(T_base=translation_z(50), T_tool=translation_x(30)), RPP_robot()], ids=["KUKA", "RPP"])
+def test_jacobian_finite_differences(robot, rng):
+    h = 1e-6
+    for q in rng.uniform(-np.pi, np.pi, (10, robot.dof)):
+        J = robot.jacobian(q)
+        J_fd = np.zeros((6, robot.dof))
+        for j in range(robot.dof):
+            dq = np.zeros(robot.dof)
+            dq[j] = h
+            T_p, T_m = robot.forward_kinematics(q + dq), robot.forward_kinematics(q - dq)
+            J_fd[:3,j] = (T_p[:3,3] - T_m[:3,3])/(2*h)
+            J_fd[3:,j] = rotation_vector(T_p[:3,:3] @ T_m[:3,:3].T)/(2*h)
+        scale = max(1, np.abs(J).max())
+        np.testing.assert_allclose(J, J_fd, atol=1e-6*scale)
+    q = rng.uniform(-np.pi, np.pi, (5, robot.dof))
+    np.testing.assert_allclose(robot.jacobian(q)[2], robot.jacobian(q[2]), atol=1e-12)
+
+def test_template_skew_jacobian(rng, src_module):
+    Jacobian = src_module("Midterm_preparation/Template/src", "Jacobian")
+    robot = KUKA_KR10_R1100_2()
+    q = rng.uniform(-np.pi, np.pi, (5, 6))
+    J = Jacobian.Jacobian()
+    for qi in q:
+        np.testing.assert_allclose(J.calc_skew(qi), robot.jacobian(qi), atol=1e-9)
+        np.testing.assert_allclose(J.calc_numerical(qi), robot.jacobian(qi), atol=1e-4*np.abs(robot.jacobian(qi)).max())
+
+
+def test_numerical_ik_converges(rng):
+    robot = KUKA_KR10_R1100_2()
+    limits = robot.joint_limits
+    q_true = rng.uniform(0.8*limits[:,0], 0.8*limits[:,1], (20, 6))
+    T = robot.forward_kinematics(q_true)
+    q0 = np.clip(q_true + rng.normal(scale=0.2, size=q_true.shape), limits[:,0], limits[:,1])
+    ik = NumericalIK(robot._batch_fk, robot._batch_jacobian, joints_limits=limits, batch=True, max_iterations=200, tol=1e-8)
+    q, success, error, iterations = ik.solve_batch(T, q0)
+    assert success.all()
+    assert robot.check_joints_limits(q).all()
+    np.testing.assert_allclose(pose_error(robot.forward_kinematics(q), T), 0, atol=1e-6)
+    # One target (non batched fk/jacobian)
+    ik = NumericalIK(robot.forward_kinematics, robot.jacobian, joints_limits=limits, tol=1e-8)
+    q, success, error, iterations = ik.solve(T[0], q0[0])
+    assert success and error <= 1e-8
+    np.testing.assert_allclose(robot.forward_kinematics(q), T[0], atol=1e-6)
+
+def test_analytic_ik_round_trip(rng):
+    robot = KUKA_KR10_R1100_2(T_base=translation_z(50), T_tool=translation_x(30))
+    limits = robot.joint_limits
+    q_true = rng.uniform(0.8*limits[:,0], 0.8*limits[:,1], (50, 6))
+    T = robot.forward_kinematics(q_true)
+    q_all, status, valid = robot.analytic_ik.solve_all(T, robot.T_base, robot.T_tool)
+    q, branch, found = robot.analytic_ik.closest_branch(q_all, valid, q_true)
+    assert found.all()
+    np.testing.assert_allclose(robot.forward_kinematics(q), T, atol=1e-6)
+    np.testing.assert_allclose(q, q_true, atol=1e-6)
+
+
+def test_se3_matches_matrices(rng):
+    H1 = np.array([random_pose(rng) for i in range(10)])
+    H2 = np.array([random_pose(rng) for i in range(10)])
+    A, B = SE3.from_matrix(H1), SE3.from_matrix(H2)
+    np.testing.assert_allclose((A @ B).as_matrix(), H1 @ H2, atol=1e-12)
+    np.testing.assert_allclose(A.inverse().as_matrix(), np.linalg.inv(H1), atol=1e-12)
+    np.testing.assert_allclose(A.inverse_compose(B).as_matrix(), np.linalg.inv(H1) @ H2, atol=1e-12)
+    x = rng.normal(size=(10, 3))
+    np.testing.assert_allclose(A.transform_point(x), (H1 @ np.concatenate([x, np.ones((10, 1))], axis=1)[...,None])[:,:3,0], atol=1e-12)
+    # A single pose broadcasts over a batch
+    np.testing.assert_allclose((A[0] @ B).as_matrix(), H1[0] @ H2, atol=1e-12)
+    np.testing.assert_allclose((SE3.rotation("y", 0.3) @ SE3.translation("x", 2.0)).as_matrix(), rotation_y(0.3) @ translation_x(2.0), atol=1e-12)
+    np.testing.assert_allclose(SE3.identity(3).as_matrix(), np.broadcast_to(np.eye(4), (3, 4, 4)))
+    assert len(A) == 10 and len(A[0]) == 1
+
+
+def test_rotation_vector_round_trip(rng):
+    axes = rng.normal(size=(200, 3))
+    axes /= np.linalg.norm(axes, axis=-1, keepdims=True)
+    # Random angles, then the limits: ~0 (first order) and ~pi (axis from the symmetric part)
+    angles = np.concatenate([rng.uniform(0, np.pi - 1e-3, 150), np.full(25, 1e-8), np.full(25, np.pi - 1e-9)])
+    r = axes*angles[:,None]
+    R = rotation_from_vector(r)
+    np.testing.assert_allclose(R @ np.swapaxes(R, -1, -2), np.broadcast_to(np.eye(3), R.shape), atol=1e-12)
+    np.testing.assert_allclose(np.linalg.det(R), 1, atol=1e-12)
+    np.testing.assert_allclose(rotation_vector(R)[:175], r[:175], atol=1e-9)
+    # At pi, r and -r are the same rotation
+    r_pi = rotation_vector(R[175:])
+    np.testing.assert_allclose(np.minimum(np.abs(r_pi - r[175:]), np.abs(r_pi + r[175:])), 0, atol=1e-6)
+    np.testing.assert_allclose(rotation_from_vector(np.zeros(3)), np.eye(3))
+    np.testing.assert_allclose(rotation_vector(rotation_x(0.5)[:3,:3]), [0.5, 0, 0], atol=1e-12)
+
+
+# The inverse dynamics of the simulated states gives back the controls (ddq of step i is computed from the state i-1)
+def test_planar_rr_dynamics_inverse_of_direct(rng):
+    dyn = PlanarRRDynamics()
+    ut = rng.normal(size=(200, 2))
+    qt, dqt, ddqt = dyn.direct([-np.pi/2, np.pi/2], [0.3, -0.2], ut)
+    assert qt.shape == (201, 1, 2)
+    np.testing.assert_allclose(dyn.inverse(qt[:-1], dqt[:-1], ddqt[1:]), ut, atol=1e-9)